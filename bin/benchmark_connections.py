@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Measure the memory used by each of many idle connections, in the default and
+the lightweight modes of 'Connection'.
+
+A local server is started which accepts connections but never responds, so
+that each client remains idle in the login state, with its networking thread
+waiting for packets. The connections of each mode are made from a new
+process, so that memory freed by one measurement cannot be reused by the
+next, and the server runs in this process, so that its own sockets are not
+counted. The Python heap usage (as measured by 'tracemalloc') and the
+resident and virtual memory sizes of the process are reported per connection.
+
+Usage: bin/benchmark_connections.py [COUNT [MODE ...]]
+"""
+from __future__ import print_function
+
+import gc
+import os
+import os.path
+import socket
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+# This file is in pyCraft/bin/; it needs to import from pyCraft/.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from minecraft import SUPPORTED_PROTOCOL_VERSIONS  # noqa: E402
+from minecraft.networking.connection import Connection  # noqa: E402
+
+
+def memory_bytes():
+    # The resident and virtual memory sizes of this process, or None if they
+    # are not available.
+    try:
+        with open('/proc/self/statm') as statm:
+            fields = statm.read().split()
+    except (IOError, OSError):
+        return None
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    return int(fields[1]) * page_size, int(fields[0]) * page_size
+
+
+def start_server():
+    # Return the port of a server which accepts and holds open connections,
+    # and the list of accepted sockets.
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1024)
+    accepted = []
+
+    def accept():
+        while True:
+            accepted.append(listener.accept()[0])
+
+    thread = threading.Thread(target=accept)
+    thread.daemon = True
+    thread.start()
+    return listener.getsockname()[1], accepted
+
+
+def measure(port, count, **kwds):
+    # Return the heap, resident and virtual bytes used by each of 'count'
+    # connections, the latter two being None if they are not available.
+    gc.collect()
+    heap_before = tracemalloc.get_traced_memory()[0]
+    memory_before = memory_bytes()
+
+    connections = []
+    for i in range(count):
+        connection = Connection(
+            '127.0.0.1', port, username='bot%d' % i,
+            allowed_versions=[SUPPORTED_PROTOCOL_VERSIONS[-1]],
+            handle_exception=False, **kwds)
+        connection.connect()
+        connections.append(connection)
+    time.sleep(1)
+
+    gc.collect()
+    heap = (tracemalloc.get_traced_memory()[0] - heap_before) // count
+    memory_after = memory_bytes()
+    if memory_before is None or memory_after is None:
+        rss = vsz = None
+    else:
+        rss, vsz = ((after - before) // count for before, after
+                    in zip(memory_before, memory_after))
+
+    for connection in connections:
+        connection.disconnect(immediate=True)
+    time.sleep(1)
+    return heap, rss, vsz
+
+
+MODES = {
+    'default': {},
+    'lightweight': {'lightweight': True},
+}
+
+
+def main():
+    if sys.argv[1:2] == ['--child']:
+        # Measure one mode, connecting to the server of the parent process.
+        count, mode, port = int(sys.argv[2]), sys.argv[3], int(sys.argv[4])
+        tracemalloc.start()
+        heap, rss, vsz = measure(port, count, **MODES[mode])
+        print('%-12s %6d connections: %6d heap, %s resident and %s virtual'
+              ' bytes per connection' % (mode, count, heap,
+                                         'unknown' if rss is None else rss,
+                                         'unknown' if vsz is None else vsz))
+        return
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    for mode in sys.argv[2:] or sorted(MODES):
+        port, accepted = start_server()
+        subprocess.check_call([sys.executable, __file__, '--child',
+                               str(count), mode, str(port)])
+        for server_socket in accepted:
+            server_socket.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Measure the time taken to import pyCraft's modules in a fresh interpreter.
+
+Each module is imported in a new Python process, a number of times, and the
+median time of the import itself (excluding the startup of the interpreter)
+is reported, along with the modules deferred by pyCraft which it imported.
+
+Usage: bin/benchmark_import.py [COUNT [MODULE ...]]
+"""
+from __future__ import print_function
+
+import os
+import os.path
+import subprocess
+import sys
+
+# This file is in pyCraft/bin/; its subprocesses need to import from pyCraft/.
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+DEFAULT_MODULES = (
+    'minecraft.networking.types',
+    'minecraft.networking.packets',
+    'minecraft.networking.connection',
+    'minecraft.networking.packets.clientbound.play',
+)
+
+# Modules which should only be imported when they are first used.
+DEFERRED_MODULES = (
+    'minecraft.networking.packets.clientbound.play',
+    'minecraft.networking.packets.serverbound.play',
+    'minecraft.networking.encryption', 'cryptography', 'numpy', 'dns',
+)
+
+SCRIPT = '''
+import sys, timeit
+start = timeit.default_timer()
+import %s
+end = timeit.default_timer()
+print(end - start)
+print(' '.join(m for m in %r if m in sys.modules))
+'''
+
+
+def time_import(module, count):
+    # Return the median import time of 'module', and the deferred modules it
+    # imported.
+    times = []
+    for _ in range(count):
+        output = subprocess.check_output(
+            [sys.executable, '-c', SCRIPT % (module, DEFERRED_MODULES)],
+            cwd=ROOT).decode('ascii').split('\n')
+        times.append(float(output[0]))
+    times.sort()
+    return times[len(times) // 2], output[1].split()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 11
+    for module in sys.argv[2:] or DEFAULT_MODULES:
+        seconds, deferred = time_import(module, count)
+        print('%-48s %7.1f ms   also imports: %s' % (
+            module, seconds * 1000, ', '.join(
+                m for m in deferred if m != module) or 'none'))
+
+
+if __name__ == '__main__':
+    main()
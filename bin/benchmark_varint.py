@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Compare the speed of reading VarInts with 'VarInt.read', 'VarInt.read_many'
+and 'VarInt.decode_many' against the byte-by-byte loop formerly used by
+'VarInt.read', for values of one byte (the most common case) and of several.
+
+Usage: bin/benchmark_varint.py [ITERATIONS]
+"""
+from __future__ import print_function
+
+import io
+import os.path
+import sys
+import timeit
+
+# This file is in pyCraft/bin/; it needs to import from pyCraft/.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from minecraft.networking.types import VarInt  # noqa: E402
+
+
+def reference_read(file_object):
+    # The implementation of 'VarInt.read' before it was optimised.
+    number = 0
+    bytes_encountered = 0
+    while True:
+        byte = file_object.read(1)
+        if len(byte) < 1:
+            raise EOFError("Unexpected end of message.")
+
+        byte = ord(byte)
+        number |= (byte & 0x7F) << 7 * bytes_encountered
+        if not byte & 0x80:
+            break
+
+        bytes_encountered += 1
+        if bytes_encountered > 5:
+            raise ValueError("Tried to read too long of a VarInt")
+    return number
+
+
+def best_time(function, iterations):
+    return min(timeit.repeat(function, number=iterations, repeat=5))
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    for name, values in (
+        ('1-byte values', [1, 5, 100, 127, 3, 64, 0, 9]),
+        ('mixed values', [1, 300, 100, 70000, 3, 2 ** 31 - 1, 0, 9]),
+    ):
+        data = b''.join(VarInt.encode(value) for value in values)
+        array = bytearray(data)
+        count = len(values)
+
+        def read_with(read):
+            def run():
+                file_object = io.BytesIO(data)
+                for _ in range(count):
+                    read(file_object)
+            return run
+
+        reference = best_time(read_with(reference_read), iterations)
+        print('%s, %d x %d values:' % (name, iterations, count))
+        print('  %-20s %7.3f s' % ('reference loop', reference))
+        for label, run in (
+            ('VarInt.read', read_with(VarInt.read)),
+            ('VarInt.read_many',
+             lambda: VarInt.read_many(io.BytesIO(data), count)),
+            ('VarInt.decode_many',
+             lambda: VarInt.decode_many(array, count)),
+        ):
+            seconds = best_time(run, iterations)
+            print('  %-20s %7.3f s  (%.2fx the reference time)'
+                  % (label, seconds, seconds / reference))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
 """
 This module stores code used for making pyCraft compatible with
-both Python2 and Python3 while using the same codebase.
+both Python2 and Python3 while using the same codebase, and with
+environments in which optional dependencies may not be installed.
 """
+import importlib
+import sys
 
 # Raw input -> input shenangians
 # example
@@ -22,3 +25,113 @@ try:
 except NameError:
     unicode = str
 # pylint: enable=undefined-variable,redefined-builtin,invalid-name
+
+
+def with_metaclass(meta, *bases):
+    """ Return a base class, to be inherited from in place of 'bases', which
+        causes the inheriting class to have the metaclass 'meta', in both
+        Python 2 and Python 3. This is equivalent to the function of the same
+        name in 'future.utils', which is slow to import.
+    """
+    class metaclass(meta):
+        def __new__(cls, name, this_bases, namespace):
+            return meta(name, bases, namespace)
+    return type.__new__(metaclass, 'temporary_class', (), {})
+
+
+if sys.version_info[0] >= 3:
+    def raise_(tp, value=None, tb=None):
+        """ Raise an exception with the given type, value and traceback, as
+            by 'future.utils.raise_', which is slow to import.
+        """
+        if value is None:
+            value = tp() if isinstance(tp, type) else tp
+        elif isinstance(tp, type) and not isinstance(value, tp):
+            value = tp(value)
+        raise value.with_traceback(tb)
+else:
+    exec('def raise_(tp, value=None, tb=None):\n'
+         '    raise tp, value, tb\n')
+
+
+class LazyModule(object):
+    """ A stand-in for an optional module, which imports the module only when
+        one of its attributes is first accessed, or when it is first tested
+        for truth. It is true if and only if the module can be imported, so
+        that 'if numpy:' may be used in place of 'if numpy is not None:'.
+
+        Any 'submodules' are imported along with the module, so that they may
+        be accessed as its attributes.
+    """
+    __slots__ = '_name', '_submodules', '_module'
+
+    def __init__(self, name, *submodules):
+        self._name = name
+        self._submodules = submodules
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            try:
+                for name in self._submodules or (self._name,):
+                    importlib.import_module(name)
+                self._module = sys.modules[self._name]
+            except ImportError:
+                self._module = False
+        return self._module
+
+    def __bool__(self):
+        return bool(self._load())
+
+    __nonzero__ = __bool__
+
+    def __getattr__(self, attr):
+        module = self._load()
+        if not module:
+            raise ImportError('No module named %s.' % self._name)
+        return getattr(module, attr)
+
+
+def lazy_import(namespace, names):
+    """ Make available, as attributes of the module whose global namespace is
+        'namespace', the objects given by 'names', a dict mapping each name
+        to a '(module_name, attribute)' pair: the value is the given
+        attribute of the named module, or the module itself if 'attribute' is
+        None. Relative module names are relative to the module's package. A
+        name may instead map to a function, whose result is the value.
+
+        On Python 3.7 and later, each module is imported only when one of its
+        names is first accessed (see PEP 562); otherwise, all are imported
+        immediately.
+    """
+    module_name = namespace['__name__']
+    package = module_name if '__path__' in namespace \
+        else module_name.rpartition('.')[0]
+
+    def resolve(name):
+        if callable(names[name]):
+            value = names[name]()
+        else:
+            import_name, attribute = names[name]
+            value = importlib.import_module(import_name, package)
+            if attribute is not None:
+                value = getattr(value, attribute)
+        namespace[name] = value
+        return value
+
+    if sys.version_info >= (3, 7):
+        def __getattr__(name):
+            if name in names:
+                return resolve(name)
+            raise AttributeError('module %r has no attribute %r'
+                                 % (module_name, name))
+
+        def __dir__():
+            return sorted(set(namespace) | set(names))
+
+        namespace['__getattr__'] = __getattr__
+        namespace['__dir__'] = __dir__
+    else:
+        # Functions are called last, as they may use the other names.
+        for name in sorted(names, key=lambda name: callable(names[name])):
+            resolve(name)
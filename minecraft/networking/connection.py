@@ -1,6 +1,5 @@
-from __future__ import print_function
+from __future__ import print_function, absolute_import
 
-from collections import deque
 from threading import RLock
 import zlib
 import threading
@@ -11,12 +10,19 @@ import sys
 import json
 import re
 
-from future.utils import raise_
+from ..compat import raise_, LazyModule
+
+try:
+    from types import MappingProxyType
+except ImportError:  # Python 2
+    MappingProxyType = dict
 
 from .types import VarInt
 from .packets import clientbound, serverbound
 from . import packets
-from . import encryption
+from .resolver import default_resolver, connect_socket
+from .outgoing import OutgoingPacketQueue
+from .player_list import PlayerListTracker
 from .. import SUPPORTED_PROTOCOL_VERSIONS, SUPPORTED_MINECRAFT_VERSIONS
 from ..exceptions import (
     VersionMismatch, LoginDisconnect, IgnorePacket, InvalidState
@@ -26,6 +32,28 @@ from ..exceptions import (
 STATE_STATUS = 1
 STATE_PLAYING = 2
 
+# The stack size, in bytes, of the networking threads of lightweight
+# connections, unless otherwise specified. See the 'lightweight' argument of
+# 'Connection'.
+LIGHTWEIGHT_STACK_SIZE = 256 * 1024
+
+# The cryptography library is slow to import, and only needed by connections
+# to servers which request encryption, so is imported only when first used.
+encryption = LazyModule('minecraft.networking.encryption')
+
+# The allowed protocol versions of lightweight connections, unless otherwise
+# specified, shared between all such connections.
+_ALL_PROTOCOL_VERSIONS = frozenset(SUPPORTED_PROTOCOL_VERSIONS)
+
+# Held while the stack size is changed to start a networking thread, since
+# 'threading.stack_size' affects all threads created in the meantime.
+_stack_size_lock = threading.Lock()
+
+# Maps each (get_clientbound_packets, protocol_version) pair to the read-only
+# table of packet types shared by all reactors using that function and
+# version. See 'PacketReactor.packet_table'.
+_packet_tables = {}
+
 
 class ConnectionContext(object):
     """A ConnectionContext encapsulates the static configuration parameters
@@ -34,15 +62,76 @@ class ConnectionContext(object):
     """
     def __init__(self, **kwds):
         self.protocol_version = kwds.get('protocol_version')
+        # If True, UUIDs are read as 'types.BinaryUUID' rather than strings.
+        self.binary_uuids = kwds.get('binary_uuids', False)
+
+
+class ProtocolVersionCache(object):
+    """A thread-safe record of the protocol versions that servers, identified
+    by their (address, port) pairs, were last found to be using.
+
+    An instance of this class may be shared between any number of Connection
+    objects (see the 'protocol_version_cache' argument of 'Connection'), which
+    then connect directly using a cached version, instead of first querying
+    the server's status to determine its version. Entries expire 'ttl' seconds
+    after they are stored, or after they last allowed a successful login. An
+    entry is discarded if a login using it fails.
+    """
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    def get(self, address, port):
+        """Return the cached protocol version of the given server, or None if
+           there is no unexpired entry for it.
+        """
+        with self._lock:
+            entry = self._versions.get((address, port))
+            if entry is None:
+                return None
+            protocol_version, expiry_time = entry
+            if timeit.default_timer() >= expiry_time:
+                del self._versions[(address, port)]
+                return None
+            return protocol_version
+
+    def set(self, address, port, protocol_version):
+        with self._lock:
+            expiry_time = timeit.default_timer() + self.ttl
+            self._versions[(address, port)] = protocol_version, expiry_time
+
+    def discard(self, address, port):
+        with self._lock:
+            self._versions.pop((address, port), None)
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
 
 
 class _ConnectionOptions(object):
+    __slots__ = ('address', 'port', 'connect_timeout', 'max_queued_packets',
+                 'packet_rate_limits', 'coalesce_movement',
+                 'serialize_in_caller', 'compression_threshold',
+                 'compression_enabled', 'thread_stack_size', 'pipeline_setup')
+
     def __init__(self, address=None, port=None, compression_threshold=-1,
-                 compression_enabled=False):
+                 compression_enabled=False, connect_timeout=None,
+                 max_queued_packets=None, packet_rate_limits=None,
+                 coalesce_movement=False, serialize_in_caller=False,
+                 thread_stack_size=None, pipeline_setup=True):
         self.address = address
         self.port = port
+        self.connect_timeout = connect_timeout
+        self.max_queued_packets = max_queued_packets
+        self.packet_rate_limits = packet_rate_limits
+        self.coalesce_movement = coalesce_movement
+        self.serialize_in_caller = serialize_in_caller
         self.compression_threshold = compression_threshold
         self.compression_enabled = compression_enabled
+        self.thread_stack_size = thread_stack_size
+        self.pipeline_setup = pipeline_setup
 
 
 class Connection(object):
@@ -60,6 +149,18 @@ class Connection(object):
         allowed_versions=None,
         handle_exception=None,
         handle_exit=None,
+        protocol_version_cache=None,
+        resolver=None,
+        connect_timeout=None,
+        max_queued_packets=None,
+        packet_rate_limits=None,
+        coalesce_movement=False,
+        serialize_in_caller=False,
+        track_player_list=True,
+        binary_uuids=False,
+        thread_stack_size=None,
+        lightweight=False,
+        pipeline_setup=True,
     ):
         """Sets up an instance of this object to be able to connect to a
         minecraft server.
@@ -102,10 +203,87 @@ class Connection(object):
                             and not with the intention to automatically
                             reconnect. Exceptions raised from this function
                             will be handled by any matching exception handlers.
+        :param protocol_version_cache: A :class:`ProtocolVersionCache`, which
+                                       may be shared with other connections,
+                                       or None. If given, and it holds the
+                                       server's version, the connection skips
+                                       the status query otherwise used to
+                                       determine the version, unless the
+                                       server rejects the cached version.
+        :param resolver: A :class:`minecraft.networking.resolver.Resolver`
+                         used to look up the server's address, which may be
+                         shared with other connections; or None, to use the
+                         default resolver, which caches results but does not
+                         look up SRV records.
+        :param connect_timeout: The maximum time, in seconds, to spend
+                                connecting to the server's address(es), or
+                                None to wait indefinitely.
+        :param max_queued_packets: The maximum number of packets that may be
+                                   waiting to be sent, or None. When this is
+                                   reached, 'write_packet' blocks until space
+                                   is available, except when called from the
+                                   networking thread or for packets of
+                                   priority 'PRIORITY_CONTROL' (see
+                                   :mod:`minecraft.networking.outgoing`).
+        :param packet_rate_limits: A dict mapping packet priorities to
+                                   '(rate, capacity)' pairs, limiting the
+                                   number of queued packets of each priority
+                                   sent per second, or None.
+        :param coalesce_movement: If True, a queued movement packet that has
+                                  not yet been sent is discarded when a newer
+                                  one is queued. The number of packets
+                                  discarded is given by 'elided_packets'.
+        :param serialize_in_caller: If True, packets queued by 'write_packet'
+                                    are serialised by the calling thread,
+                                    leaving the networking thread only to
+                                    frame, compress and encrypt them. This is
+                                    not done while there are any early
+                                    outgoing packet listeners, which may need
+                                    to modify packets before they are written.
+        :param track_player_list: If True, the connection keeps the list of
+                                  players sent by the server in its
+                                  'player_list' attribute, which is a
+                                  :class:`minecraft.networking.player_list.PlayerListTracker`;
+                                  otherwise, 'player_list' is None.
+        :param binary_uuids: If True, UUIDs in received packets are read as
+                             :class:`minecraft.networking.types.BinaryUUID`
+                             objects, which hold the raw 16 bytes and are
+                             formatted as strings only on demand, rather
+                             than as strings.
+        :param thread_stack_size: The stack size, in bytes, of the
+                                  connection's networking thread, or None to
+                                  use the default size (see
+                                  'threading.stack_size').
+        :param lightweight: If True, the connection uses as little memory as
+                            practical, for use when many connections are made
+                            at once, such as in load testing. The player list
+                            is not tracked, regardless of 'track_player_list';
+                            structures such as the set of allowed versions are
+                            shared with other connections; and the networking
+                            thread's stack size is 'LIGHTWEIGHT_STACK_SIZE',
+                            unless 'thread_stack_size' is given. Packet
+                            listeners that need a deep stack may then fail.
+        :param pipeline_setup: If True, the handshake and the first packet of
+                               the next state are written immediately after
+                               connecting, with a single call to the socket,
+                               so that they may be sent in one TCP segment,
+                               rather than being queued for the networking
+                               thread. Early outgoing packet listeners are
+                               then called for these packets in the thread
+                               calling 'connect' or 'status'.
         """  # NOQA
 
-        # This lock is re-entrant because it may be acquired in a re-entrant
-        # manner from within an outgoing packet listener
+        # This lock serialises writes to the socket, and is held by the
+        # networking thread while it writes out queued packets. It is
+        # re-entrant because it may be acquired in a re-entrant manner from
+        # within an outgoing packet listener. Threads calling 'write_packet'
+        # without 'force' do not acquire it.
+        self._send_lock = RLock()
+
+        # This lock is held only during transitions of the connection's
+        # state, such as connecting and disconnecting, and changes of its
+        # networking thread. If both locks are needed, '_send_lock' must be
+        # acquired first.
         self._write_lock = RLock()
 
         self.networking_thread = None
@@ -127,7 +305,9 @@ class Connection(object):
                 raise ValueError('Unsupported version number: %r.' % version)
             return proto_version
 
-        if allowed_versions is None:
+        if allowed_versions is None and lightweight:
+            self.allowed_proto_versions = _ALL_PROTOCOL_VERSIONS
+        elif allowed_versions is None:
             self.allowed_proto_versions = set(SUPPORTED_PROTOCOL_VERSIONS)
         else:
             allowed_versions = set(map(proto_version, allowed_versions))
@@ -139,11 +319,24 @@ class Connection(object):
             self.default_proto_version = proto_version(initial_version)
 
         self.context = ConnectionContext(
-            protocol_version=max(self.allowed_proto_versions))
+            protocol_version=max(self.allowed_proto_versions),
+            binary_uuids=binary_uuids)
 
         self.options = _ConnectionOptions()
         self.options.address = address
         self.options.port = port
+        self.options.connect_timeout = connect_timeout
+        self.options.max_queued_packets = max_queued_packets
+        self.options.packet_rate_limits = packet_rate_limits
+        self.options.coalesce_movement = coalesce_movement
+        self.options.serialize_in_caller = serialize_in_caller
+        self.options.thread_stack_size = LIGHTWEIGHT_STACK_SIZE \
+            if lightweight and thread_stack_size is None else thread_stack_size
+        self.options.pipeline_setup = pipeline_setup
+        self._outgoing_packet_queue = None
+        self._elided_packets = 0  # Elided by previous queues.
+        self.resolver = resolver if resolver is not None \
+            else default_resolver
         self.auth_token = auth_token
         self.username = username
         self.connected = False
@@ -151,11 +344,24 @@ class Connection(object):
         self.handle_exception = handle_exception
         self.exception, self.exc_info = None, None
         self.handle_exit = handle_exit
+        self.protocol_version_cache = protocol_version_cache
+        self.player_list = PlayerListTracker() \
+            if track_player_list and not lightweight else None
 
         # The reactor handles all the default responses to packets,
         # it should be changed per networking state
         self.reactor = PacketReactor(self)
 
+    @property
+    def elided_packets(self):
+        """The number of outgoing packets discarded by this connection
+           because they were replaced by newer packets before being sent,
+           if 'coalesce_movement' was enabled.
+        """
+        queue = self._outgoing_packet_queue
+        return self._elided_packets + (queue.elided if queue is not None
+                                       else 0)
+
     def _start_network_thread(self):
         with self._write_lock:
             if self.networking_thread is not None and \
@@ -164,14 +370,27 @@ class Connection(object):
                 raise InvalidState('A networking thread is already running.')
             elif self.networking_thread is None:
                 self.networking_thread = NetworkingThread(self)
-                self.networking_thread.start()
+                self._start_thread(self.networking_thread)
             else:
                 # This thread will wait until the existing thread exits, and
                 # then set 'networking_thread' to itself and
                 # 'new_networking_thread' to None.
                 self.new_networking_thread \
                     = NetworkingThread(self, previous=self.networking_thread)
-                self.new_networking_thread.start()
+                self._start_thread(self.new_networking_thread)
+
+    def _start_thread(self, thread):
+        # Start the given thread with the configured stack size, if any.
+        stack_size = self.options.thread_stack_size
+        if stack_size is None:
+            thread.start()
+            return
+        with _stack_size_lock:
+            previous_size = threading.stack_size(stack_size)
+            try:
+                thread.start()
+            finally:
+                threading.stack_size(previous_size)
 
     def write_packet(self, packet, force=False):
         """Writes a packet to the server.
@@ -180,17 +399,27 @@ class Connection(object):
         and write the packet out immediately, and as such may block.
 
         If force is false then the packet will be added to the end of the
-        packet writing queue to be sent 'as soon as possible'
+        packet writing queue to be sent 'as soon as possible', after any
+        queued packets of the same or a higher priority. If the queue is full,
+        this may block until space is available.
 
         :param packet: The :class:`network.packets.Packet` to write
         :param force(bool): Specifies if the packet write should be immediate
         """
-        packet.context = self.context
+        # A packet already serialised, e.g. by a 'PacketTemplate', has already
+        # been encoded for this connection's context, and is written as is.
+        if getattr(packet, '_serialized', None) is None:
+            packet.context = self.context
+            if not force and self.options.serialize_in_caller and \
+               not self.early_outgoing_packet_listeners:
+                packet.serialize()
+
         if force:
-            with self._write_lock:
+            with self._send_lock:
                 self._write_packet(packet)
         else:
-            self._outgoing_packet_queue.append(packet)
+            self._outgoing_packet_queue.put(packet, block=not isinstance(
+                threading.current_thread(), NetworkingThread))
 
     def listener(self, *packet_types, **kwds):
         """
@@ -282,24 +511,26 @@ class Connection(object):
         else:
             self._exception_handlers.append((handler_func, exc_types))
 
-    def _pop_packet(self):
-        # Pops the topmost packet off the outgoing queue and writes it out
-        # through the socket
+    def _pop_packet(self, rate_limited=True):
+        # Pops the next packet permitted by the rate limits (or, if
+        # 'rate_limited' is False, the next packet) off the outgoing queue
+        # and writes it out through the socket
         #
         # Mostly an internal convenience function, caller should make sure
-        # they have the write lock acquired to avoid issues caused by
+        # they have the send lock acquired to avoid issues caused by
         # asynchronous access to the socket.
         # This should be the only method that removes elements from the
         # outbound queue
-        if len(self._outgoing_packet_queue) == 0:
+        packet = self._outgoing_packet_queue.pop(rate_limited)
+        if packet is None:
             return False
         else:
-            self._write_packet(self._outgoing_packet_queue.popleft())
+            self._write_packet(packet)
             return True
 
     def _write_packet(self, packet):
         # Immediately writes the given packet to the network. The caller must
-        # have the write lock acquired before calling this method.
+        # have the send lock acquired before calling this method.
         try:
             for listener in self.early_outgoing_packet_listeners:
                 listener.call_packet(packet)
@@ -314,7 +545,8 @@ class Connection(object):
         except IgnorePacket:
             pass
 
-    def status(self, handle_status=None, handle_ping=False):
+    def status(self, handle_status=None, handle_ping=False,
+               pipeline_ping=False):
         """Issue a status request to the server and then disconnect.
 
         :param handle_status: a function to be called with the status
@@ -325,16 +557,23 @@ class Connection(object):
                             in milliseconds, None for the default handler,
                             which prints the latency to standard outout, or
                             False, to prevent measurement of the latency.
+        :param pipeline_ping: If True, and the latency is measured, the ping
+                              is sent together with the status request,
+                              rather than after the status is received,
+                              saving one round trip. The measured latency
+                              then includes the time taken by the server to
+                              respond to the status request.
         """
-        with self._write_lock:  # pylint: disable=not-context-manager
+        # pylint: disable=not-context-manager
+        with self._send_lock, self._write_lock:
             self._check_connection()
 
             self._connect()
-            self._handshake(next_state=STATE_STATUS)
-            self._start_network_thread()
 
             do_ping = handle_ping is not False
-            self.reactor = StatusReactor(self, do_ping=do_ping)
+            pipeline_ping = do_ping and pipeline_ping
+            self.reactor = StatusReactor(
+                self, do_ping=do_ping, ping_sent=pipeline_ping)
 
             if handle_status is False:
                 self.reactor.handle_status = lambda *args, **kwds: None
@@ -346,17 +585,24 @@ class Connection(object):
             elif handle_ping is not None:
                 self.reactor.handle_ping = handle_ping
 
-            request_packet = serverbound.status.RequestPacket()
-            self.write_packet(request_packet)
+            setup_packets = [self._handshake_packet(next_state=STATE_STATUS),
+                             serverbound.status.RequestPacket()]
+            if pipeline_ping:
+                ping_packet = serverbound.status.PingPacket()
+                ping_packet.time = int(1000 * timeit.default_timer())
+                setup_packets.append(ping_packet)
+            self._write_setup(*setup_packets)
+            self._start_network_thread()
 
     def connect(self):
         """
         Attempt to begin connecting to the server.
         May safely be called multiple times after the first, i.e. to reconnect.
         """
-        # Hold the lock throughout, in case connect() is called from the
+        # Hold the locks throughout, in case connect() is called from the
         # networking thread while another connection is in progress.
-        with self._write_lock:  # pylint: disable=not-context-manager
+        # pylint: disable=not-context-manager
+        with self._send_lock, self._write_lock:
             self._check_connection()
 
             # It is important that this is set correctly even when connecting
@@ -366,26 +612,52 @@ class Connection(object):
 
             self.spawned = False
             self._connect()
-            if len(self.allowed_proto_versions) == 1:
-                # There is exactly one allowed protocol version, so skip the
-                # process of determining the server's version, and immediately
-                # connect.
-                self._handshake(next_state=STATE_PLAYING)
+            cached_version = self._cached_proto_version()
+            if len(self.allowed_proto_versions) == 1 or \
+               cached_version is not None:
+                # There is exactly one allowed protocol version, or the
+                # server's version is known from a previous connection, so
+                # skip the process of determining the server's version, and
+                # immediately connect.
+                if cached_version is not None:
+                    self.context.protocol_version = cached_version
                 login_start_packet = serverbound.login.LoginStartPacket()
                 if self.auth_token:
                     login_start_packet.name = self.auth_token.profile.name
                 else:
                     login_start_packet.name = self.username
-                self.write_packet(login_start_packet)
-                self.reactor = LoginReactor(self)
+                try:
+                    self._write_setup(
+                        self._handshake_packet(next_state=STATE_PLAYING),
+                        login_start_packet)
+                except IOError:
+                    # As when the login fails, the server's version may have
+                    # changed since it was cached, so forget it.
+                    if cached_version is not None:
+                        self.protocol_version_cache.discard(
+                            self.options.address, self.options.port)
+                    raise
+                self.reactor = LoginReactor(
+                    self, cached_version=cached_version is not None)
             else:
                 # Determine the server's protocol version by first performing a
                 # status query.
-                self._handshake(next_state=STATE_STATUS)
-                self.write_packet(serverbound.status.RequestPacket())
+                self._write_setup(
+                    self._handshake_packet(next_state=STATE_STATUS),
+                    serverbound.status.RequestPacket())
                 self.reactor = PlayingStatusReactor(self)
             self._start_network_thread()
 
+    def _cached_proto_version(self):
+        # Return the server's protocol version as recorded in the protocol
+        # version cache, if it is usable in this connection, or else None.
+        if self.protocol_version_cache is None or \
+           len(self.allowed_proto_versions) == 1:
+            return None
+        proto = self.protocol_version_cache.get(
+            self.options.address, self.options.port)
+        return proto if proto in self.allowed_proto_versions else None
+
     def _check_connection(self):
         if self.networking_thread is not None and \
            not self.networking_thread.interrupt or \
@@ -399,21 +671,17 @@ class Connection(object):
         # since it's "guaranteed" to read the number of bytes specified,
         # the socket itself will mostly be used to write data upstream to
         # the server.
-        self._outgoing_packet_queue = deque()
-
-        info = socket.getaddrinfo(self.options.address, self.options.port,
-                                  0, socket.SOCK_STREAM)
-
-        # Prefer to use IPv4 (for backward compatibility with previous
-        # versions that always resolved hostnames to IPv4 addresses),
-        # then IPv6, then other address families.
-        def key(ai):
-            return 0 if ai[0] == socket.AF_INET else \
-                   1 if ai[0] == socket.AF_INET6 else 2
-        ai_faml, ai_type, ai_prot, _ai_cnam, ai_addr = min(info, key=key)
-
-        self.socket = socket.socket(ai_faml, ai_type, ai_prot)
-        self.socket.connect(ai_addr)
+        if self._outgoing_packet_queue is not None:
+            self._elided_packets += self._outgoing_packet_queue.elided
+        self._outgoing_packet_queue = OutgoingPacketQueue(
+            max_size=self.options.max_queued_packets,
+            rate_limits=self.options.packet_rate_limits,
+            coalesce=self.options.coalesce_movement)
+
+        addresses = self.resolver.resolve(
+            self.options.address, self.options.port)
+        self.socket = connect_socket(
+            addresses, timeout=self.options.connect_timeout)
         self.file_object = self.socket.makefile("rb", 0)
         self.options.compression_enabled = False
         self.options.compression_threshold = -1
@@ -423,13 +691,16 @@ class Connection(object):
         """Terminate the existing server connection, if there is one.
            If 'immediate' is True, do not attempt to write any packets.
         """
-        with self._write_lock:  # pylint: disable=not-context-manager
+        # pylint: disable=not-context-manager
+        with self._send_lock, self._write_lock:
             self.connected = False
 
             if not immediate and self.socket is not None:
                 # Flush any packets remaining in the queue.
-                while self._pop_packet():
+                while self._pop_packet(rate_limited=False):
                     pass
+            if self._outgoing_packet_queue is not None:
+                self._outgoing_packet_queue.close()
 
             if self.networking_thread is not None:
                 self.networking_thread.interrupt = True
@@ -443,14 +714,44 @@ class Connection(object):
                     self.socket.close()
                     self.socket = None
 
-    def _handshake(self, next_state=STATE_PLAYING):
+    def _handshake_packet(self, next_state=STATE_PLAYING):
         handshake = serverbound.handshake.HandShakePacket()
         handshake.protocol_version = self.context.protocol_version
         handshake.server_address = self.options.address
         handshake.server_port = self.options.port
         handshake.next_state = next_state
-
-        self.write_packet(handshake)
+        return handshake
+
+    def _write_setup(self, *setup_packets):
+        # Writes the packets beginning a new connection. If 'pipeline_setup'
+        # is enabled, they are written immediately, with a single call to the
+        # socket, so that they may be sent in one TCP segment; otherwise, they
+        # are queued. The caller must have the send lock acquired.
+        if not self.options.pipeline_setup:
+            for packet in setup_packets:
+                self.write_packet(packet)
+            return
+
+        packet_buffer = packets.PacketBuffer()
+        written = []
+        for packet in setup_packets:
+            packet.context = self.context
+            try:
+                for listener in self.early_outgoing_packet_listeners:
+                    listener.call_packet(packet)
+            except IgnorePacket:
+                continue
+            # Compression is never enabled before these packets are sent.
+            packet.write(packet_buffer)
+            written.append(packet)
+        self.socket.sendall(packet_buffer.get_writable())
+
+        for packet in written:
+            try:
+                for listener in self.outgoing_packet_listeners:
+                    listener.call_packet(packet)
+            except IgnorePacket:
+                pass
 
     def _handle_exception(self, exc, exc_info):
         # Call the current PacketReactor's exception handler.
@@ -532,6 +833,7 @@ class NetworkingThread(threading.Thread):
         self.daemon = True
 
         self.previous_thread = previous
+        self.readable = _ReadableWaiter()
 
     def run(self):
         try:
@@ -554,7 +856,7 @@ class NetworkingThread(threading.Thread):
         while not self.interrupt:
             # Attempt to write out as many as 300 packets.
             num_packets = 0
-            with self.connection._write_lock:
+            with self.connection._send_lock:
                 try:
                     while not self.interrupt and self.connection._pop_packet():
                         num_packets += 1
@@ -565,12 +867,11 @@ class NetworkingThread(threading.Thread):
                     exc_info = sys.exc_info()
 
                 # If any packets remain to be written, resume writing as soon
-                # as possible after reading any available packets; otherwise,
-                # wait for up to 50ms (1 tick) for new packets to arrive.
-                if self.connection._outgoing_packet_queue:
-                    read_timeout = 0
-                else:
-                    read_timeout = 0.05
+                # as possible (or when next allowed by the rate limits) after
+                # reading any available packets; otherwise, wait for up to
+                # 50ms (1 tick) for new packets to arrive.
+                delay = self.connection._outgoing_packet_queue.ready_delay()
+                read_timeout = 0.05 if delay is None else min(delay, 0.05)
 
             # Read and react to as many as 50 packets.
             while num_packets < 50 and not self.interrupt:
@@ -592,6 +893,42 @@ class NetworkingThread(threading.Thread):
                 raise_(*exc_info)
 
 
+class _ReadableWaiter(object):
+    # Waits for streams to become readable. Where available, 'poll' is used,
+    # as 'select' cannot handle file descriptors numbered FD_SETSIZE (usually
+    # 1024) or higher, which are common when there are many connections. The
+    # same poll object is used for as long as the file descriptor waited for
+    # is unchanged, as it is while a connection's socket remains open.
+    __slots__ = '_poller', '_fd'
+
+    def __init__(self):
+        self._poller = None
+        self._fd = None
+
+    def wait(self, stream, timeout):
+        # Return True if 'stream' becomes readable within 'timeout' seconds.
+        if not hasattr(select, 'poll'):
+            return bool(select.select([stream], [], [], timeout)[0])
+        fd = stream.fileno()
+        if fd != self._fd:
+            if self._poller is None:
+                self._poller = select.poll()
+            elif self._fd is not None:
+                self._poller.unregister(self._fd)
+            self._poller.register(fd, select.POLLIN)
+            self._fd = fd
+        return bool(self._poller.poll(
+            None if timeout is None else timeout * 1000))
+
+
+def _state_packets(state_name):
+    # A 'get_packets' function for the clientbound packets of the named
+    # state, whose module is imported only when the function is first called.
+    def get_packets(context):
+        return getattr(clientbound, state_name).get_packets(context)
+    return get_packets
+
+
 class PacketReactor(object):
     """
     Reads and reacts to packets
@@ -599,21 +936,34 @@ class PacketReactor(object):
     state_name = None
 
     # Handshaking is considered the "default" state
-    get_clientbound_packets = staticmethod(clientbound.handshake.get_packets)
+    get_clientbound_packets = staticmethod(_state_packets('handshake'))
 
     def __init__(self, connection):
         self.connection = connection
-        context = self.connection.context
-        self.clientbound_packets = {
-            packet.get_id(context): packet
-            for packet in self.__class__.get_clientbound_packets(context)}
+        self.clientbound_packets = self.packet_table(connection.context)
+
+    @classmethod
+    def packet_table(cls, context):
+        """ A read-only mapping from packet IDs to the types of the packets
+            returned by 'get_clientbound_packets' for the protocol version of
+            'context'. It is computed once, and then shared by all reactors
+            with the same 'get_clientbound_packets'.
+        """
+        key = cls.get_clientbound_packets, context.protocol_version
+        table = _packet_tables.get(key)
+        if table is None:
+            table = MappingProxyType({
+                packet.get_id(context): packet
+                for packet in cls.get_clientbound_packets(context)})
+            table = _packet_tables.setdefault(key, table)
+        return table
 
     def read_packet(self, stream, timeout=0):
         # Block for up to `timeout' seconds waiting for `stream' to become
         # readable, returning `None' if the timeout elapses.
-        ready_to_read = select.select([stream], [], [], timeout)[0]
-
-        if ready_to_read:
+        thread = self.connection.networking_thread
+        waiter = _ReadableWaiter() if thread is None else thread.readable
+        if waiter.wait(stream, timeout):
             length = VarInt.read(stream)
 
             packet_data = packets.PacketBuffer()
@@ -668,7 +1018,13 @@ class PacketReactor(object):
 
 
 class LoginReactor(PacketReactor):
-    get_clientbound_packets = staticmethod(clientbound.login.get_packets)
+    get_clientbound_packets = staticmethod(_state_packets('login'))
+
+    def __init__(self, connection, cached_version=False):
+        super(LoginReactor, self).__init__(connection)
+        # True if the protocol version was taken from the connection's
+        # protocol version cache, rather than being determined or fixed.
+        self.cached_version = cached_version
 
     def react(self, packet):
         if packet.packet_name == "encryption request":
@@ -718,7 +1074,15 @@ class LoginReactor(PacketReactor):
                                   'with: "%s".' % msg)
 
         elif packet.packet_name == "login success":
+            if self.cached_version:
+                # The cached version is confirmed, so keep it for a full TTL.
+                self.connection.protocol_version_cache.set(
+                    self.connection.options.address,
+                    self.connection.options.port,
+                    self.connection.context.protocol_version)
             self.connection.reactor = PlayingReactor(self.connection)
+            if self.connection.player_list is not None:
+                self.connection.player_list.clear()
 
         elif packet.packet_name == "set compression":
             self.connection.options.compression_threshold = packet.threshold
@@ -729,9 +1093,26 @@ class LoginReactor(PacketReactor):
                 serverbound.login.PluginResponsePacket(
                     message_id=packet.message_id, successful=False))
 
+    def handle_exception(self, exc, exc_info):
+        if not self.cached_version or not isinstance(exc, (
+           VersionMismatch, LoginDisconnect, EOFError, IOError)):
+            return False
+
+        # The login failed, possibly because the server's version has changed
+        # since it was cached, so forget the cached version.
+        self.connection.protocol_version_cache.discard(
+            self.connection.options.address, self.connection.options.port)
+        if isinstance(exc, VersionMismatch):
+            # The version has certainly changed, so reconnect, this time
+            # determining the version afresh.
+            self.connection.disconnect(immediate=True)
+            self.connection.connect()
+            return True
+        return False
+
 
 class PlayingReactor(PacketReactor):
-    get_clientbound_packets = staticmethod(clientbound.play.get_packets)
+    get_clientbound_packets = staticmethod(_state_packets('play'))
 
     def react(self, packet):
         if packet.packet_name == "set compression":
@@ -759,27 +1140,33 @@ class PlayingReactor(PacketReactor):
                 self.connection.write_packet(position_response)
             self.connection.spawned = True
 
+        elif packet.packet_name == "player list item":
+            if self.connection.player_list is not None:
+                self.connection.player_list.apply(packet)
+
         elif packet.packet_name == "disconnect":
             self.connection.disconnect()
 
 
 class StatusReactor(PacketReactor):
-    get_clientbound_packets = staticmethod(clientbound.status.get_packets)
+    get_clientbound_packets = staticmethod(_state_packets('status'))
 
-    def __init__(self, connection, do_ping=False):
+    def __init__(self, connection, do_ping=False, ping_sent=False):
         super(StatusReactor, self).__init__(connection)
         self.do_ping = do_ping
+        # True if the ping was sent along with the status request.
+        self.ping_sent = ping_sent
 
     def react(self, packet):
         if packet.packet_name == "response":
             status_dict = json.loads(packet.json_response)
-            if self.do_ping:
+            if self.do_ping and not self.ping_sent:
                 ping_packet = serverbound.status.PingPacket()
                 # NOTE: it may be better to depend on the `monotonic' package
                 # or something similar for more accurate time measurement.
                 ping_packet.time = int(1000 * timeit.default_timer())
                 self.connection.write_packet(ping_packet)
-            else:
+            elif not self.do_ping:
                 self.connection.disconnect()
             self.handle_status(status_dict)
 
@@ -815,6 +1202,11 @@ class PlayingStatusReactor(StatusReactor):
                 server_protocol=proto,
                 server_version=status['version'].get('name'))
 
+        cache = self.connection.protocol_version_cache
+        if cache is not None:
+            cache.set(self.connection.options.address,
+                      self.connection.options.port, proto)
+
         self.handle_proto_version(proto)
 
     def handle_proto_version(self, proto_version):
@@ -831,3 +1223,22 @@ class PlayingStatusReactor(StatusReactor):
             self.connection.disconnect(immediate=True)
             self.handle_failure()
             return True
+
+
+def warm_packet_tables(protocol_versions=None, reactors=None):
+    """ Compute in advance the tables of packet types (see
+        'PacketReactor.packet_table') used by the given reactor types, or by
+        default by all those defined in this module, for the given protocol
+        versions, or by default all supported versions. Connections made
+        afterwards need not compute them, which may be useful before making
+        many connections at once.
+    """
+    if protocol_versions is None:
+        protocol_versions = SUPPORTED_PROTOCOL_VERSIONS
+    if reactors is None:
+        reactors = (PacketReactor, LoginReactor, PlayingReactor,
+                    StatusReactor)
+    for protocol_version in protocol_versions:
+        context = ConnectionContext(protocol_version=protocol_version)
+        for reactor in reactors:
+            reactor.packet_table(context)
@@ -0,0 +1,492 @@
+"""
+Contains 'EntityTracker', which maintains the positions, velocities and
+orientations of the entities known to a 'Connection', and 'SpatialIndex',
+which finds the entities near a given point.
+"""
+import threading
+import heapq
+from array import array
+
+from .packets import clientbound
+from ..compat import LazyModule
+from .types import Vector, Direction
+from .player_list import uuid_key
+
+# numpy is optional, and slow to import, so is imported only when first used.
+numpy = LazyModule('numpy')
+
+
+__all__ = ('EntityTracker', 'SpatialIndex', 'PLAYER_TYPE')
+
+
+# The value of 'EntityTracker.type_ids' for entities spawned by
+# 'SpawnPlayerPacket', which have no entity type ID.
+PLAYER_TYPE = -1
+
+# The number of units of entity velocity in one block per tick.
+VELOCITY_SCALE = 8000.0
+
+
+def _signed(entity_id):
+    # Entity IDs are signed 32-bit integers, but those read as VarInts are
+    # given as unsigned integers, so that -1 is read as 2**32 - 1.
+    return entity_id - 0x100000000 if entity_id > 0x7FFFFFFF else entity_id
+
+
+class EntityTracker(object):
+    """ The entities known to a client, as given by the spawn, movement and
+        destruction packets which are applied by 'register'.
+
+        The state of each entity is stored in columns: a row of each of the
+        arrays 'entity_ids', 'type_ids', 'x', 'y', 'z', 'velocity_x',
+        'velocity_y', 'velocity_z', 'yaw' and 'pitch' holds the values of one
+        entity, in no particular order. Positions are in blocks and
+        velocities in blocks per tick. This needs much less memory than an
+        object per entity, and allows queries such as 'within' to be evaluated
+        over all entities at once using numpy, if it is installed.
+
+        The columns may be read directly, for example using 'numpy.frombuffer',
+        while holding 'lock', but must not otherwise be modified.
+
+        Entity IDs are signed 32-bit integers, as in 'JoinGamePacket'. Those
+        given as unsigned integers, as they are read from VarInts, are
+        converted, so that 2**32 - 1 refers to the same entity as -1.
+
+        Entities may also be looked up by UUID, which is held as its raw 16
+        bytes (see 'Connection's 'binary_uuids' option).
+
+        If a 'SpatialIndex' is given as 'index', it is kept updated with the
+        position of each tracked entity, so that the cost of maintaining it is
+        proportional to the number of entities which move.
+    """
+    def __init__(self, index=None):
+        """
+        :param index: A :class:`SpatialIndex` to update, or None.
+        """
+        self.index = index
+        self.lock = threading.RLock()
+        self._rows = {}    # Maps each entity ID to its row in the columns.
+        self._uuids = {}   # Maps each entity ID to its UUID key, if known.
+        self._ids_by_uuid = {}
+
+        self.entity_ids = array('i')
+        self.type_ids = array('i')
+        self.x, self.y, self.z = array('d'), array('d'), array('d')
+        self.velocity_x = array('d')
+        self.velocity_y = array('d')
+        self.velocity_z = array('d')
+        self.yaw, self.pitch = array('f'), array('f')
+
+    def _columns(self):
+        return (self.entity_ids, self.type_ids, self.x, self.y, self.z,
+                self.velocity_x, self.velocity_y, self.velocity_z,
+                self.yaw, self.pitch)
+
+    def register(self, connection):
+        """ Keep this tracker updated from the packets received by
+            'connection'. All entities are forgotten when the client joins the
+            game or changes dimension.
+        """
+        connection.register_packet_listener(self.apply, *self._handlers)
+        connection.register_packet_listener(
+            lambda packet: self.clear(),
+            clientbound.play.JoinGamePacket, clientbound.play.RespawnPacket)
+
+    def apply(self, packet):
+        """ Update the tracked entities from a packet of any type handled by
+            this class, ignoring entities which are not tracked.
+        """
+        self._handlers[type(packet)](self, packet)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, entity_id):
+        return _signed(entity_id) in self._rows
+
+    def __iter__(self):
+        """ Iterate over the IDs of the tracked entities. """
+        return iter(list(self._rows))
+
+    def add(self, entity_id, type_id, x, y, z, yaw=0.0, pitch=0.0,
+            velocity_x=0.0, velocity_y=0.0, velocity_z=0.0, uuid=None):
+        """ Track the given entity, replacing any with the same ID. """
+        entity_id = _signed(entity_id)
+        values = (entity_id, type_id, x, y, z,
+                  velocity_x, velocity_y, velocity_z, yaw, pitch)
+        with self.lock:
+            self._forget_uuid(entity_id)
+            if uuid is not None:
+                key = self._uuids[entity_id] = uuid_key(uuid)
+                self._ids_by_uuid[key] = entity_id
+            row = self._rows.get(entity_id)
+            if row is None:
+                self._rows[entity_id] = len(self.entity_ids)
+                for column, value in zip(self._columns(), values):
+                    column.append(value)
+            else:
+                for column, value in zip(self._columns(), values):
+                    column[row] = value
+            if self.index is not None:
+                self.index.update(entity_id, x, y, z)
+
+    def remove(self, entity_id):
+        """ Stop tracking the given entity, if it is tracked. """
+        entity_id = _signed(entity_id)
+        with self.lock:
+            row = self._rows.pop(entity_id, None)
+            if row is None:
+                return
+            self._forget_uuid(entity_id)
+            if self.index is not None:
+                self.index.remove(entity_id)
+            # Move the last row into the place of the removed row.
+            last = len(self.entity_ids) - 1
+            if row != last:
+                self._rows[self.entity_ids[last]] = row
+            for column in self._columns():
+                column[row] = column[last]
+                column.pop()
+
+    def clear(self):
+        """ Stop tracking all entities. """
+        with self.lock:
+            self._rows.clear()
+            self._uuids.clear()
+            self._ids_by_uuid.clear()
+            for column in self._columns():
+                del column[:]
+            if self.index is not None:
+                self.index.clear()
+
+    def _forget_uuid(self, entity_id):
+        key = self._uuids.pop(entity_id, None)
+        if key is not None and self._ids_by_uuid.get(key) == entity_id:
+            del self._ids_by_uuid[key]
+
+    def by_uuid(self, entity_uuid):
+        """ The ID of the entity with the given UUID (in any form accepted by
+            'minecraft.networking.player_list.uuid_key'), or None.
+        """
+        return self._ids_by_uuid.get(uuid_key(entity_uuid))
+
+    def uuid(self, entity_id):
+        """ The UUID of the given entity as 16 bytes, or None. """
+        return self._uuids.get(_signed(entity_id))
+
+    def type_id(self, entity_id):
+        """ The entity type ID of the given entity, or 'PLAYER_TYPE', or None
+            if the entity is not tracked.
+        """
+        row = self._rows.get(_signed(entity_id))
+        return None if row is None else self.type_ids[row]
+
+    def position(self, entity_id):
+        """ The position of the given entity as a 'Vector', or None. """
+        with self.lock:
+            row = self._rows.get(_signed(entity_id))
+            if row is not None:
+                return Vector(self.x[row], self.y[row], self.z[row])
+
+    def velocity(self, entity_id):
+        """ The velocity of the given entity as a 'Vector', or None. """
+        with self.lock:
+            row = self._rows.get(_signed(entity_id))
+            if row is not None:
+                return Vector(self.velocity_x[row], self.velocity_y[row],
+                              self.velocity_z[row])
+
+    def look(self, entity_id):
+        """ The orientation of the given entity as a 'Direction', or None. """
+        with self.lock:
+            row = self._rows.get(_signed(entity_id))
+            if row is not None:
+                return Direction(self.yaw[row], self.pitch[row])
+
+    def within(self, position, radius, type_id=None):
+        """ A list of the IDs of the entities whose distance from 'position',
+            which is a tuple (x, y, z), is at most 'radius', optionally only
+            those with the given entity type ID (or 'PLAYER_TYPE').
+        """
+        cx, cy, cz = position
+        limit = radius * radius
+        with self.lock:
+            if not self._rows:
+                return []
+            if not numpy:
+                return [
+                    entity_id for (entity_id, kind, x, y, z) in zip(
+                        self.entity_ids, self.type_ids, self.x, self.y, self.z)
+                    if (x-cx)*(x-cx) + (y-cy)*(y-cy) + (z-cz)*(z-cz) <= limit
+                    and (type_id is None or kind == type_id)]
+
+            # The views of the columns must be released before the lock is,
+            # as the arrays cannot be resized while they exist.
+            x, y, z = (numpy.frombuffer(c, dtype=numpy.float64)
+                       for c in (self.x, self.y, self.z))
+            mask = (x - cx) ** 2 + (y - cy) ** 2 + (z - cz) ** 2 <= limit
+            del x, y, z
+            if type_id is not None:
+                types = numpy.frombuffer(self.type_ids, dtype=numpy.intc)
+                mask &= types == type_id
+                del types
+            ids = numpy.frombuffer(self.entity_ids, dtype=numpy.intc)
+            result = ids[mask].tolist()
+            del ids
+            return result
+
+    def _spawn_object(self, packet):
+        # Before protocol 100, the coordinates were not converted from fixed
+        # point by 'SpawnObjectPacket'.
+        scale = 1.0 if packet.context.protocol_version >= 100 else 32.0
+        self.add(packet.entity_id, packet.type_id, packet.x / scale,
+                 packet.y / scale, packet.z / scale, packet.yaw, packet.pitch,
+                 getattr(packet, 'velocity_x', 0) / VELOCITY_SCALE,
+                 getattr(packet, 'velocity_y', 0) / VELOCITY_SCALE,
+                 getattr(packet, 'velocity_z', 0) / VELOCITY_SCALE,
+                 getattr(packet, 'object_uuid', None))
+
+    def _spawn_player(self, packet):
+        self.add(packet.entity_id, PLAYER_TYPE, packet.x, packet.y, packet.z,
+                 packet.yaw, packet.pitch, uuid=packet.player_UUID)
+
+    def _velocity(self, packet):
+        with self.lock:
+            row = self._rows.get(_signed(packet.entity_id))
+            if row is not None:
+                self.velocity_x[row] = packet.velocity_x / VELOCITY_SCALE
+                self.velocity_y[row] = packet.velocity_y / VELOCITY_SCALE
+                self.velocity_z[row] = packet.velocity_z / VELOCITY_SCALE
+
+    def _look(self, packet):
+        with self.lock:
+            row = self._rows.get(_signed(packet.entity_id))
+            if row is not None:
+                self.yaw[row], self.pitch[row] = packet.yaw, packet.pitch
+
+    def _move(self, packet):
+        with self.lock:
+            row = self._rows.get(_signed(packet.entity_id))
+            if row is not None:
+                scale = float(packet.delta_scale(packet.context))
+                self.x[row] += packet.delta_x / scale
+                self.y[row] += packet.delta_y / scale
+                self.z[row] += packet.delta_z / scale
+                if hasattr(packet, 'yaw'):
+                    self.yaw[row], self.pitch[row] = packet.yaw, packet.pitch
+                if self.index is not None:
+                    self.index.update(self.entity_ids[row], self.x[row],
+                                      self.y[row], self.z[row])
+
+    def _teleport(self, packet):
+        with self.lock:
+            row = self._rows.get(_signed(packet.entity_id))
+            if row is not None:
+                self.x[row], self.y[row], self.z[row] = \
+                    packet.x, packet.y, packet.z
+                self.yaw[row], self.pitch[row] = packet.yaw, packet.pitch
+                if self.index is not None:
+                    self.index.update(self.entity_ids[row],
+                                      packet.x, packet.y, packet.z)
+
+    def _destroy(self, packet):
+        with self.lock:
+            for entity_id in packet.entity_ids:
+                self.remove(entity_id)
+
+    _handlers = {
+        clientbound.play.SpawnObjectPacket: _spawn_object,
+        clientbound.play.SpawnPlayerPacket: _spawn_player,
+        clientbound.play.EntityVelocityPacket: _velocity,
+        clientbound.play.EntityLookPacket: _look,
+        clientbound.play.EntityRelativeMovePacket: _move,
+        clientbound.play.EntityLookAndRelativeMovePacket: _move,
+        clientbound.play.EntityTeleportPacket: _teleport,
+        clientbound.play.DestroyEntitiesPacket: _destroy,
+    }
+
+
+class SpatialIndex(object):
+    """ A uniform grid of square vertical columns, 'cell_size' blocks wide,
+        each holding the IDs of the entities within it, for finding entities
+        near a point without examining all entities.
+
+        Moving an entity with 'update' costs constant time, so an index kept
+        updated by an 'EntityTracker' costs time proportional to the number of
+        entities which move. The default cell size, 16, makes each cell a
+        chunk column.
+    """
+    def __init__(self, cell_size=16):
+        """
+        :param cell_size: The width of each cell, in blocks.
+        """
+        self.cell_size = cell_size
+        self.lock = threading.RLock()
+        self._cells = {}       # Maps each cell key to a set of entity IDs.
+        self._entities = {}    # Maps each entity ID to (cell, x, y, z).
+
+    def _cell(self, x, z):
+        # The integer key of the cell containing the given coordinates.
+        size = self.cell_size
+        return (int(x // size) & 0xFFFFFFFF) << 32 | \
+            int(z // size) & 0xFFFFFFFF
+
+    def __len__(self):
+        return len(self._entities)
+
+    def __contains__(self, entity_id):
+        return entity_id in self._entities
+
+    def update(self, entity_id, x, y, z):
+        """ Add the given entity at the given position, or move it there. """
+        cell = self._cell(x, z)
+        with self.lock:
+            entry = self._entities.get(entity_id)
+            if entry is None or entry[0] != cell:
+                if entry is not None:
+                    self._discard(entity_id, entry[0])
+                ids = self._cells.get(cell)
+                if ids is None:
+                    ids = self._cells[cell] = set()
+                ids.add(entity_id)
+            self._entities[entity_id] = (cell, x, y, z)
+
+    def remove(self, entity_id):
+        """ Remove the given entity, if it is present. """
+        with self.lock:
+            entry = self._entities.pop(entity_id, None)
+            if entry is not None:
+                self._discard(entity_id, entry[0])
+
+    def _discard(self, entity_id, cell):
+        ids = self._cells[cell]
+        ids.discard(entity_id)
+        if not ids:
+            del self._cells[cell]
+
+    def clear(self):
+        """ Remove all entities. """
+        with self.lock:
+            self._cells.clear()
+            self._entities.clear()
+
+    def position(self, entity_id):
+        """ The position of the given entity as a 'Vector', or None. """
+        entry = self._entities.get(entity_id)
+        return None if entry is None else Vector(*entry[1:])
+
+    def _candidates(self, min_x, min_z, max_x, max_z):
+        # Yield (entity_id, x, y, z) for each entity in the cells overlapping
+        # the given horizontal rectangle. The caller must hold 'lock'.
+        size, cells, entities = self.cell_size, self._cells, self._entities
+        for cell_x in range(int(min_x // size), int(max_x // size) + 1):
+            for cell_z in range(int(min_z // size), int(max_z // size) + 1):
+                ids = cells.get((cell_x & 0xFFFFFFFF) << 32 |
+                                cell_z & 0xFFFFFFFF)
+                if ids is not None:
+                    for entity_id in ids:
+                        yield (entity_id,) + entities[entity_id][1:]
+
+    def in_box(self, min_corner, max_corner):
+        """ A list of the IDs of the entities within the axis-aligned box with
+            the given opposite corners, each a tuple (x, y, z), inclusive.
+        """
+        (min_x, min_y, min_z), (max_x, max_y, max_z) = min_corner, max_corner
+        with self.lock:
+            return [
+                entity_id for (entity_id, x, y, z)
+                in self._candidates(min_x, min_z, max_x, max_z)
+                if min_x <= x <= max_x and min_y <= y <= max_y
+                and min_z <= z <= max_z]
+
+    def within(self, position, radius, predicate=None):
+        """ A list of the IDs of the entities whose distance from 'position',
+            a tuple (x, y, z), is at most 'radius', and, if 'predicate' is
+            given, for whose ID it returns a true value.
+        """
+        cx, cy, cz = position
+        limit = radius * radius
+        with self.lock:
+            return [
+                entity_id for (entity_id, x, y, z) in self._candidates(
+                    cx - radius, cz - radius, cx + radius, cz + radius)
+                if (x-cx)*(x-cx) + (y-cy)*(y-cy) + (z-cz)*(z-cz) <= limit
+                and (predicate is None or predicate(entity_id))]
+
+    def nearest(self, position, k=1, max_distance=None, predicate=None):
+        """ A list of the IDs of the 'k' entities closest to 'position', a
+            tuple (x, y, z), in order of increasing distance, considering only
+            those within 'max_distance' (if not None) and for whose ID
+            'predicate' returns a true value (if not None).
+
+            Cells are examined in rings of increasing distance from the cell
+            containing 'position', stopping as soon as no further ring can
+            contain a closer entity.
+        """
+        if k <= 0:
+            return []
+        cx, cy, cz = position
+        size = self.cell_size
+        limit = None if max_distance is None else max_distance * max_distance
+        home_x, home_z = int(cx // size), int(cz // size)
+        found = []   # A heap of (-distance squared, entity_id).
+
+        def visit(ids):
+            for entity_id in ids:
+                _, x, y, z = self._entities[entity_id]
+                dist = (x-cx)*(x-cx) + (y-cy)*(y-cy) + (z-cz)*(z-cz)
+                if limit is not None and dist > limit:
+                    continue
+                if predicate is not None and not predicate(entity_id):
+                    continue
+                if len(found) < k:
+                    heapq.heappush(found, (-dist, entity_id))
+                elif dist < -found[0][0]:
+                    heapq.heapreplace(found, (-dist, entity_id))
+
+        with self.lock:
+            remaining = len(self._entities)
+            ring = 0
+            while remaining > 0:
+                if 8 * ring > len(self._cells):
+                    # The ring has more cells than are occupied, so it is
+                    # faster to visit the remaining occupied cells directly.
+                    for cell, ids in self._cells.items():
+                        cell_x, cell_z = cell >> 32, cell & 0xFFFFFFFF
+                        cell_x -= (cell_x & 0x80000000) << 1
+                        cell_z -= (cell_z & 0x80000000) << 1
+                        if max(abs(cell_x - home_x),
+                               abs(cell_z - home_z)) >= ring:
+                            visit(ids)
+                    break
+
+                for cell_x, cell_z in self._ring(home_x, home_z, ring):
+                    ids = self._cells.get((cell_x & 0xFFFFFFFF) << 32 |
+                                          cell_z & 0xFFFFFFFF)
+                    if ids is not None:
+                        remaining -= len(ids)
+                        visit(ids)
+
+                # Any entity outside the rings examined so far is at least
+                # this far from 'position'.
+                bound = ring * size
+                if limit is not None and bound * bound > limit:
+                    break
+                if len(found) == k and bound * bound >= -found[0][0]:
+                    break
+                ring += 1
+
+        return [entity_id for (_, entity_id) in sorted(found, reverse=True)]
+
+    @staticmethod
+    def _ring(home_x, home_z, ring):
+        # Yield the cells at a Chebyshev distance of exactly 'ring' cells.
+        if ring == 0:
+            yield home_x, home_z
+            return
+        for dx in range(-ring, ring + 1):
+            yield home_x + dx, home_z - ring
+            yield home_x + dx, home_z + ring
+        for dz in range(-ring + 1, ring):
+            yield home_x - ring, home_z + dz
+            yield home_x + ring, home_z + dz
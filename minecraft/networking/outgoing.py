@@ -0,0 +1,348 @@
+"""
+Contains 'OutgoingPacketQueue', the queue of packets waiting to be written by
+the networking thread of a 'minecraft.networking.connection.Connection'.
+"""
+import threading
+import timeit
+from collections import deque
+
+
+__all__ = (
+    'OutgoingPacketQueue', 'TokenBucket', 'PRIORITY_CONTROL',
+    'PRIORITY_MOVEMENT', 'PRIORITY_DEFAULT',
+)
+
+
+# Packets which must be answered promptly to avoid being disconnected by the
+# server, such as keep-alive responses and teleport confirmations.
+PRIORITY_CONTROL = 0
+
+# Packets reporting the client's position or orientation.
+PRIORITY_MOVEMENT = 1
+
+# All other packets, including chat messages and bulk actions.
+PRIORITY_DEFAULT = 2
+
+PRIORITIES = PRIORITY_CONTROL, PRIORITY_MOVEMENT, PRIORITY_DEFAULT
+
+# The priority of each packet type with a priority other than the default,
+# given by the name of the type in 'packets.serverbound.play'. Subclasses of
+# these types have the same priority, unless listed separately.
+DEFAULT_PACKET_PRIORITIES = {
+    'KeepAlivePacket':       PRIORITY_CONTROL,
+    'TeleportConfirmPacket': PRIORITY_CONTROL,
+    'PositionAndLookPacket': PRIORITY_MOVEMENT,
+}
+
+# The names of the packet types in 'packets.serverbound.play' which are
+# coalesced, if coalescing is enabled.
+DEFAULT_COALESCED_TYPES = frozenset((
+    'PositionAndLookPacket',
+))
+
+# The packet types given by the above names, which are looked up only when
+# first needed, so that importing this module does not import the packets of
+# the play state.
+_default_types = {}
+
+# The priorities of packet types, as found by queues using the default
+# priorities, which share this cache rather than each having their own.
+_default_priority_cache = {}
+
+
+def _default_packet_priorities():
+    if 'priorities' not in _default_types:
+        from .packets.serverbound import play
+        _default_types['priorities'] = {
+            getattr(play, name): priority
+            for name, priority in DEFAULT_PACKET_PRIORITIES.items()}
+    return _default_types['priorities']
+
+
+def _default_coalesced_types():
+    if 'coalesced' not in _default_types:
+        from .packets.serverbound import play
+        _default_types['coalesced'] = frozenset(
+            getattr(play, name) for name in DEFAULT_COALESCED_TYPES)
+    return _default_types['coalesced']
+
+
+class TokenBucket(object):
+    """Limits the rate of an event to 'rate' occurrences per second on
+       average, with bursts of up to 'capacity' occurrences.
+    """
+    __slots__ = 'rate', 'capacity', 'tokens', 'time'
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None
+                              else max(1, rate))
+        self.tokens = self.capacity
+        self.time = timeit.default_timer()
+
+    def _refill(self, now):
+        if now > self.time:
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.time) * self.rate)
+        self.time = now
+
+    def take(self, now=None):
+        """Consume and return True if an occurrence is currently permitted,
+           or otherwise return False.
+        """
+        self._refill(timeit.default_timer() if now is None else now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def delay(self, now=None):
+        """The time, in seconds, until an occurrence will be permitted."""
+        self._refill(timeit.default_timer() if now is None else now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class _CoalescedEntry(object):
+    # A queue entry holding a packet which may be replaced by a newer one,
+    # or None if it has been.
+    __slots__ = 'packet',
+
+    def __init__(self, packet):
+        self.packet = packet
+
+
+class OutgoingPacketQueue(object):
+    """A queue of outgoing packets, divided into priority classes.
+
+    Packets of a higher priority (i.e. a lower number) are always removed
+    before those of a lower priority, and packets of the same priority are
+    removed in the order in which they were added.
+
+    Any number of threads may add packets to the queue, but only one thread
+    (normally the networking thread of a connection) may remove them.
+
+    :param max_size: The maximum number of queued packets, or None. When the
+                     queue is full, 'put' blocks until space is available,
+                     except for packets with priority 'PRIORITY_CONTROL',
+                     which are always accepted, and packets which replace
+                     unsent packets by coalescing. Replaced packets are not
+                     counted.
+    :param rate_limits: A dict mapping priorities to 'TokenBucket' instances
+                        or to '(rate, capacity)' pairs, limiting the rate at
+                        which packets of that priority are removed.
+    :param priorities: A dict mapping packet types to priorities, used instead
+                       of the types named in 'DEFAULT_PACKET_PRIORITIES'.
+    :param coalesce: If True, a packet whose exact type is in
+                     'coalesced_types' replaces any unsent packet of the same
+                     type, which is discarded. The new packet is placed at the
+                     end of the queue, as usual, so that it is still sent
+                     after any packets queued before it. The number of packets
+                     discarded in this way is counted by 'elided' when they
+                     reach the front of the queue.
+    :param coalesced_types: A set of packet types, used instead of the types
+                            named in 'DEFAULT_COALESCED_TYPES'.
+    """
+    def __init__(self, max_size=None, rate_limits=None, priorities=None,
+                 coalesce=False, coalesced_types=None):
+        self.max_size = max_size
+        self.coalesce = coalesce
+        self._coalesced_types = None if coalesced_types is None \
+            else frozenset(coalesced_types)
+        self.elided = 0
+        self._priorities = None if priorities is None else dict(priorities)
+        self.rate_limits = {}
+        for priority, limit in (rate_limits or {}).items():
+            if not isinstance(limit, TokenBucket):
+                limit = TokenBucket(*limit)
+            self.rate_limits[priority] = limit
+
+        # The queue of each priority is created only when first needed, as
+        # most of them remain empty while a connection is idle.
+        self._queues = [None] * len(PRIORITIES)
+        self._closed = False
+        self._priority_cache = _default_priority_cache if priorities is None \
+            else {}
+        self._latest = {}  # Maps coalesced types to their newest entries.
+        self._replaced = 0  # The number of queued entries which were replaced.
+        self._not_full = threading.Condition(threading.Lock()) \
+            if max_size is not None else None
+        # Held while creating queues or replacing packets.
+        self._lock = threading.Lock()
+
+    @property
+    def priorities(self):
+        """A dict mapping packet types to their priorities."""
+        if self._priorities is None:
+            return _default_packet_priorities()
+        return self._priorities
+
+    @property
+    def coalesced_types(self):
+        """The set of packet types which are coalesced, if enabled."""
+        if self._coalesced_types is None:
+            return _default_coalesced_types()
+        return self._coalesced_types
+
+    def priority(self, packet):
+        """The priority of the given packet."""
+        packet_type = type(packet)
+        priority = self._priority_cache.get(packet_type)
+        if priority is None:
+            priorities = self.priorities
+            for cls in packet_type.__mro__:
+                if cls in priorities:
+                    priority = priorities[cls]
+                    break
+            else:
+                priority = PRIORITY_DEFAULT
+            self._priority_cache[packet_type] = priority
+        return priority
+
+    def put(self, packet, block=True):
+        """Add a packet to the end of the queue of its priority. If the queue
+           is full and 'block' is True, wait until it is not full or until
+           the queue is closed, in which case the packet is discarded.
+
+           This may be called from any thread. Unless the queue is bounded,
+           the packet is to be coalesced, or it is the first packet of its
+           priority, it does not acquire any lock.
+        """
+        priority = self.priority(packet)
+        if block and priority != PRIORITY_CONTROL and \
+           self.max_size is not None:
+            with self._not_full:
+                while len(self) >= self.max_size and not self._closed \
+                        and not self._replaces(packet):
+                    self._not_full.wait()
+                if self._closed:
+                    return
+                self._append(packet, priority)
+        else:
+            self._append(packet, priority)
+
+    def _replaces(self, packet):
+        # Return True if 'packet' would replace an unsent packet, and so would
+        # not increase the size of the queue. A packet's entry is removed from
+        # '_latest' when it is sent.
+        return self.coalesce and type(packet) in self._latest and \
+            type(packet) in self.coalesced_types
+
+    def _append(self, packet, priority):
+        # Each step is atomic, so this is safe to call from several threads at
+        # once, as well as concurrently with 'pop'. Each priority's queue is
+        # created under a lock, so that no packet is appended to a queue which
+        # is then replaced. A coalesced packet is appended and recorded as the
+        # latest of its type under the same lock, so that the packet which
+        # survives is always the last to be queued, and that the number of
+        # replaced entries is exact.
+        packet_type = type(packet)
+        queue = self._queues[priority]
+        if queue is None:
+            with self._lock:
+                queue = self._queues[priority]
+                if queue is None:
+                    queue = self._queues[priority] = deque()
+        if self.coalesce and packet_type in self.coalesced_types:
+            entry = _CoalescedEntry(packet)
+            with self._lock:
+                queue.append(entry)
+                previous = self._latest.get(packet_type)
+                self._latest[packet_type] = entry
+                if previous is not None:
+                    previous.packet = None
+                    self._replaced += 1
+        else:
+            queue.append(packet)
+
+    def _discard_elided(self, queue):
+        # Remove any entries from the front of 'queue' (which may be None, if
+        # it has not been created) whose packets have been replaced by newer
+        # packets, and return True if any remain.
+        while queue:
+            entry = queue[0]
+            if type(entry) is not _CoalescedEntry or entry.packet is not None:
+                return True
+            with self._lock:
+                queue.popleft()
+                self._replaced -= 1
+            self.elided += 1
+        return False
+
+    def pop(self, rate_limited=True):
+        """Remove and return the next packet that may be sent, or return None
+           if there is no such packet. If 'rate_limited' is False, rate limits
+           are ignored.
+
+           Only one thread may remove packets from the queue at a time.
+        """
+        now = timeit.default_timer()
+        for priority, queue in enumerate(self._queues):
+            limit = self.rate_limits.get(priority) if rate_limited else None
+            packet = self._pop_from(queue, limit, now)
+            if packet is not None:
+                if self.max_size is not None:
+                    with self._not_full:
+                        self._not_full.notify()
+                return packet
+        return None
+
+    def _pop_from(self, queue, limit, now):
+        # Remove and return the first packet in 'queue', or return None if
+        # there is none, or if it is not permitted by the TokenBucket 'limit'
+        # (which may be None). A rate limit token is only taken once a packet
+        # is certain to be sent.
+        while self._discard_elided(queue):
+            entry = queue[0]
+            if type(entry) is not _CoalescedEntry:
+                if limit is not None and not limit.take(now):
+                    return None
+                return queue.popleft()
+            # A coalesced entry is removed under the lock, so that its packet
+            # cannot be replaced once it has been sent.
+            with self._lock:
+                packet = entry.packet
+                if packet is None:
+                    # The packet was replaced after '_discard_elided' was
+                    # called, so look for the one which replaced it.
+                    continue
+                if limit is not None and not limit.take(now):
+                    return None
+                queue.popleft()
+                if self._latest.get(type(packet)) is entry:
+                    del self._latest[type(packet)]
+                return packet
+        return None
+
+    def ready_delay(self):
+        """Return None if the queue is empty, or otherwise the time, in
+           seconds, until the next packet will be allowed by the rate limits.
+           Like 'pop', this may only be called by the thread removing packets.
+        """
+        now = timeit.default_timer()
+        delay = None
+        for priority, queue in enumerate(self._queues):
+            if not self._discard_elided(queue):
+                continue
+            limit = self.rate_limits.get(priority)
+            if limit is None:
+                return 0
+            delay = limit.delay(now) if delay is None \
+                else min(delay, limit.delay(now))
+        return delay
+
+    def close(self):
+        """Wake any threads waiting to add packets, and cause any subsequent
+           attempts to add packets to a full queue to discard the packets.
+        """
+        if self._not_full is None:
+            self._closed = True
+            return
+        with self._not_full:
+            self._closed = True
+            self._not_full.notify_all()
+
+    def __len__(self):
+        # Replaced packets are not counted, even before they are discarded.
+        with self._lock:
+            return sum(len(queue) for queue in self._queues
+                       if queue is not None) - self._replaced
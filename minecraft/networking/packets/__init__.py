@@ -7,79 +7,105 @@ in pyCraft, and (2) some are named oddly, for historical reasons.
 Use the packet classes under packets.clientbound.* and
 packets.serverbound.* instead.
 '''
+import sys
 
 # Packet-Related Utilities
 from .packet_buffer import PacketBuffer
 from .packet_listener import PacketListener
+from .packet_template import PacketTemplate
 
 # Abstract Packet Classes
-from .packet import Packet
+from .packet import Packet, slotted_packet
 from .keep_alive_packet import AbstractKeepAlivePacket
 from .plugin_message_packet import AbstractPluginMessagePacket
 
+from ...compat import lazy_import
 
-# Legacy Packets (Handshake State)
-from .clientbound.handshake import get_packets as state_handshake_clientbound
-from .serverbound.handshake import HandShakePacket
-from .serverbound.handshake import get_packets as state_handshake_serverbound
-
-# Legacy Packets (Status State)
-from .clientbound.status import ResponsePacket
-from .clientbound.status import PingResponsePacket as PingPacketResponse
-from .clientbound.status import get_packets as state_status_clientbound
-from .serverbound.status import RequestPacket
-from .serverbound.status import PingPacket
-from .serverbound.status import get_packets as state_status_serverbound
-
-# Legacy Packets (Login State)
-from .clientbound.login import DisconnectPacket
-from .clientbound.login import EncryptionRequestPacket
-from .clientbound.login import LoginSuccessPacket
-from .clientbound.login import SetCompressionPacket
-from .clientbound.login import get_packets as state_login_clientbound
-from .serverbound.login import LoginStartPacket
-from .serverbound.login import EncryptionResponsePacket
-from .serverbound.login import get_packets as state_login_serverbound
 
 # Legacy Packets (Playing State)
-from .keep_alive_packet import KeepAlivePacket
-from .clientbound.play import KeepAlivePacket as KeepAlivePacketClientbound
-from .serverbound.play import KeepAlivePacket as KeepAlivePacketServerbound
-from .clientbound.play import JoinGamePacket
-from .clientbound.play import ChatMessagePacket
-from .clientbound.play import PlayerPositionAndLookPacket
-from .clientbound.play import DisconnectPacket as DisconnectPacketPlayState
-from .clientbound.play import (
-    SetCompressionPacket as SetCompressionPacketPlayState
-)
-from .clientbound.play import PlayerListItemPacket
-from .clientbound.play import MapPacket
-from .clientbound.play import get_packets as state_playing_clientbound
-from .serverbound.play import ChatPacket
-from .serverbound.play import PositionAndLookPacket
-from .serverbound.play import TeleportConfirmPacket
-from .serverbound.play import AnimationPacket as AnimationPacketServerbound
-from .serverbound.play import get_packets as state_playing_serverbound
-
-__all_legacy_packets__ = (
-    state_handshake_clientbound, HandShakePacket,
-    state_handshake_serverbound, ResponsePacket,
-    PingPacketResponse, state_status_clientbound,
-    RequestPacket, PingPacket, state_status_serverbound,
-    DisconnectPacket, EncryptionRequestPacket, LoginSuccessPacket,
-    SetCompressionPacket, state_login_clientbound,
-    LoginStartPacket, EncryptionResponsePacket,
-    state_login_serverbound, KeepAlivePacketClientbound,
-    KeepAlivePacketServerbound, JoinGamePacket, ChatMessagePacket,
-    PlayerPositionAndLookPacket, DisconnectPacketPlayState,
-    SetCompressionPacketPlayState, PlayerListItemPacket,
-    MapPacket, state_playing_clientbound, ChatPacket,
-    PositionAndLookPacket, TeleportConfirmPacket,
-    AnimationPacketServerbound, state_playing_serverbound,
-    KeepAlivePacket,
+from .keep_alive_packet import KeepAlivePacket  # noqa: F401
+
+# Other Legacy Packets, which are imported only when first accessed, so that
+# packets of each state need not be imported until that state is used.
+# Each name maps to the module and attribute of the packet it refers to.
+_legacy_packets = {
+    # Handshake State
+    'state_handshake_clientbound': ('.clientbound.handshake', 'get_packets'),
+    'HandShakePacket': ('.serverbound.handshake', 'HandShakePacket'),
+    'state_handshake_serverbound': ('.serverbound.handshake', 'get_packets'),
+
+    # Status State
+    'ResponsePacket': ('.clientbound.status', 'ResponsePacket'),
+    'PingPacketResponse': ('.clientbound.status', 'PingResponsePacket'),
+    'state_status_clientbound': ('.clientbound.status', 'get_packets'),
+    'RequestPacket': ('.serverbound.status', 'RequestPacket'),
+    'PingPacket': ('.serverbound.status', 'PingPacket'),
+    'state_status_serverbound': ('.serverbound.status', 'get_packets'),
+
+    # Login State
+    'DisconnectPacket': ('.clientbound.login', 'DisconnectPacket'),
+    'EncryptionRequestPacket':
+        ('.clientbound.login', 'EncryptionRequestPacket'),
+    'LoginSuccessPacket': ('.clientbound.login', 'LoginSuccessPacket'),
+    'SetCompressionPacket': ('.clientbound.login', 'SetCompressionPacket'),
+    'state_login_clientbound': ('.clientbound.login', 'get_packets'),
+    'LoginStartPacket': ('.serverbound.login', 'LoginStartPacket'),
+    'EncryptionResponsePacket':
+        ('.serverbound.login', 'EncryptionResponsePacket'),
+    'state_login_serverbound': ('.serverbound.login', 'get_packets'),
+
+    # Playing State
+    'KeepAlivePacketClientbound': ('.clientbound.play', 'KeepAlivePacket'),
+    'KeepAlivePacketServerbound': ('.serverbound.play', 'KeepAlivePacket'),
+    'JoinGamePacket': ('.clientbound.play', 'JoinGamePacket'),
+    'ChatMessagePacket': ('.clientbound.play', 'ChatMessagePacket'),
+    'PlayerPositionAndLookPacket':
+        ('.clientbound.play', 'PlayerPositionAndLookPacket'),
+    'DisconnectPacketPlayState': ('.clientbound.play', 'DisconnectPacket'),
+    'SetCompressionPacketPlayState':
+        ('.clientbound.play', 'SetCompressionPacket'),
+    'PlayerListItemPacket': ('.clientbound.play', 'PlayerListItemPacket'),
+    'MapPacket': ('.clientbound.play', 'MapPacket'),
+    'state_playing_clientbound': ('.clientbound.play', 'get_packets'),
+    'ChatPacket': ('.serverbound.play', 'ChatPacket'),
+    'PositionAndLookPacket': ('.serverbound.play', 'PositionAndLookPacket'),
+    'TeleportConfirmPacket': ('.serverbound.play', 'TeleportConfirmPacket'),
+    'AnimationPacketServerbound': ('.serverbound.play', 'AnimationPacket'),
+    'state_playing_serverbound': ('.serverbound.play', 'get_packets'),
+}
+
+# The names of the legacy packets, in the order of '__all_legacy_packets__'.
+__all_legacy_packet_names__ = (
+    'state_handshake_clientbound', 'HandShakePacket',
+    'state_handshake_serverbound', 'ResponsePacket',
+    'PingPacketResponse', 'state_status_clientbound',
+    'RequestPacket', 'PingPacket', 'state_status_serverbound',
+    'DisconnectPacket', 'EncryptionRequestPacket', 'LoginSuccessPacket',
+    'SetCompressionPacket', 'state_login_clientbound',
+    'LoginStartPacket', 'EncryptionResponsePacket',
+    'state_login_serverbound', 'KeepAlivePacketClientbound',
+    'KeepAlivePacketServerbound', 'JoinGamePacket', 'ChatMessagePacket',
+    'PlayerPositionAndLookPacket', 'DisconnectPacketPlayState',
+    'SetCompressionPacketPlayState', 'PlayerListItemPacket',
+    'MapPacket', 'state_playing_clientbound', 'ChatPacket',
+    'PositionAndLookPacket', 'TeleportConfirmPacket',
+    'AnimationPacketServerbound', 'state_playing_serverbound',
+    'KeepAlivePacket',
 )
 
+
+def _all_legacy_packets():
+    # The legacy packets themselves, which are all imported when this is
+    # first accessed as '__all_legacy_packets__'.
+    module = sys.modules[__name__]
+    return tuple(getattr(module, name)
+                 for name in __all_legacy_packet_names__)
+
+
+lazy_import(globals(), dict(
+    _legacy_packets, __all_legacy_packets__=_all_legacy_packets))
+
 __all_other__ = (
-    Packet, PacketBuffer, PacketListener,
+    Packet, PacketBuffer, PacketListener, PacketTemplate, slotted_packet,
     AbstractKeepAlivePacket, AbstractPluginMessagePacket,
 )
@@ -1,3 +1,11 @@
 """
 Contains the clientbound packets for `pyminecraft`.
 """
+from ....compat import lazy_import
+
+
+# The packets of each state are imported only when that state is first used,
+# since many clients never use some states, and the play state is large.
+__all__ = ('handshake', 'status', 'login', 'play')
+
+lazy_import(globals(), {state: ('.' + state, None) for state in __all__})
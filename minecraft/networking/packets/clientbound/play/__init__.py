@@ -1,5 +1,6 @@
 from minecraft.networking.packets import (
-    Packet, AbstractKeepAlivePacket, AbstractPluginMessagePacket
+    Packet, AbstractKeepAlivePacket, AbstractPluginMessagePacket,
+    slotted_packet,
 )
 
 from minecraft.networking.types import (
@@ -18,6 +19,7 @@ from .block_change_packet import BlockChangePacket, MultiBlockChangePacket
 from .explosion_packet import ExplosionPacket
 from .sound_effect_packet import SoundEffectPacket
 from .face_player_packet import FacePlayerPacket
+from .chunk_data_packet import ChunkDataPacket, UnloadChunkPacket
 
 
 # Formerly known as state_playing_clientbound.
@@ -42,12 +44,21 @@ def get_packets(context):
         RespawnPacket,
         PluginMessagePacket,
         PlayerListHeaderAndFooterPacket,
-        EntityLookPacket
+        EntityLookPacket,
+        EntityRelativeMovePacket,
+        EntityLookAndRelativeMovePacket,
+        EntityTeleportPacket,
+        DestroyEntitiesPacket,
+        ChunkDataPacket,
     }
     if context.protocol_version <= 47:
         packets |= {
             SetCompressionPacket,
         }
+    if context.protocol_version >= 107:
+        packets |= {
+            UnloadChunkPacket,
+        }
     if context.protocol_version >= 94:
         packets |= {
             SoundEffectPacket,
@@ -203,6 +214,7 @@ class SpawnPlayerPacket(Packet):
         PositionAndLook, 'x', 'y', 'z', 'yaw', 'pitch')
 
 
+@slotted_packet
 class EntityVelocityPacket(Packet):
     @staticmethod
     def get_id(context):
@@ -318,6 +330,7 @@ class PlayerListHeaderAndFooterPacket(Packet):
         {'footer': String}]
 
 
+@slotted_packet
 class EntityLookPacket(Packet):
     @staticmethod
     def get_id(context):
@@ -336,3 +349,132 @@ class EntityLookPacket(Packet):
         {'pitch': Angle},
         {'on_ground': Boolean}
     ]
+
+
+@slotted_packet
+class EntityRelativeMovePacket(Packet):
+    @staticmethod
+    def get_id(context):
+        return 0x29 if context.protocol_version >= 550 else \
+               0x28 if context.protocol_version >= 389 else \
+               0x27 if context.protocol_version >= 345 else \
+               0x26 if context.protocol_version >= 318 else \
+               0x25 if context.protocol_version >= 94 else \
+               0x26 if context.protocol_version >= 70 else \
+               0x15
+
+    packet_name = 'entity relative move'
+    get_definition = staticmethod(lambda context: [
+        {'entity_id': VarInt},
+        {'delta_x': Short if context.protocol_version >= 100 else Byte},
+        {'delta_y': Short if context.protocol_version >= 100 else Byte},
+        {'delta_z': Short if context.protocol_version >= 100 else Byte},
+        {'on_ground': Boolean},
+    ])
+
+    @staticmethod
+    def delta_scale(context):
+        """ The number of units of 'delta_x', 'delta_y' and 'delta_z' in one
+            block.
+        """
+        return 4096 if context.protocol_version >= 100 else 32
+
+    # Access the 'delta_x', 'delta_y', 'delta_z' fields as a Vector tuple.
+    delta = multi_attribute_alias(Vector, 'delta_x', 'delta_y', 'delta_z')
+
+
+@slotted_packet
+class EntityLookAndRelativeMovePacket(Packet):
+    @staticmethod
+    def get_id(context):
+        return 0x2A if context.protocol_version >= 550 else \
+               0x29 if context.protocol_version >= 389 else \
+               0x28 if context.protocol_version >= 345 else \
+               0x27 if context.protocol_version >= 318 else \
+               0x26 if context.protocol_version >= 94 else \
+               0x27 if context.protocol_version >= 70 else \
+               0x17
+
+    packet_name = 'entity look and relative move'
+    get_definition = staticmethod(lambda context: [
+        {'entity_id': VarInt},
+        {'delta_x': Short if context.protocol_version >= 100 else Byte},
+        {'delta_y': Short if context.protocol_version >= 100 else Byte},
+        {'delta_z': Short if context.protocol_version >= 100 else Byte},
+        {'yaw': Angle},
+        {'pitch': Angle},
+        {'on_ground': Boolean},
+    ])
+
+    delta_scale = staticmethod(EntityRelativeMovePacket.delta_scale)
+
+    # Access the 'delta_x', 'delta_y', 'delta_z' fields as a Vector tuple.
+    delta = multi_attribute_alias(Vector, 'delta_x', 'delta_y', 'delta_z')
+
+    # Access the 'yaw', 'pitch' fields as a Direction tuple.
+    look = multi_attribute_alias(Direction, 'yaw', 'pitch')
+
+
+@slotted_packet
+class EntityTeleportPacket(Packet):
+    @staticmethod
+    def get_id(context):
+        return 0x57 if context.protocol_version >= 550 else \
+               0x56 if context.protocol_version >= 471 else \
+               0x52 if context.protocol_version >= 451 else \
+               0x51 if context.protocol_version >= 441 else \
+               0x50 if context.protocol_version >= 393 else \
+               0x4F if context.protocol_version >= 352 else \
+               0x4C if context.protocol_version >= 338 else \
+               0x4B if context.protocol_version >= 335 else \
+               0x49 if context.protocol_version >= 110 else \
+               0x4A if context.protocol_version >= 107 else \
+               0x18
+
+    packet_name = 'entity teleport'
+    get_definition = staticmethod(lambda context: [
+        {'entity_id': VarInt},
+        {'x': Double} if context.protocol_version >= 100
+        else {'x': FixedPointInteger},
+        {'y': Double} if context.protocol_version >= 100
+        else {'y': FixedPointInteger},
+        {'z': Double} if context.protocol_version >= 100
+        else {'z': FixedPointInteger},
+        {'yaw': Angle},
+        {'pitch': Angle},
+        {'on_ground': Boolean},
+    ])
+
+    # Access the 'x', 'y', 'z' fields as a Vector tuple.
+    position = multi_attribute_alias(Vector, 'x', 'y', 'z')
+
+    # Access the 'yaw', 'pitch' fields as a Direction tuple.
+    look = multi_attribute_alias(Direction, 'yaw', 'pitch')
+
+
+class DestroyEntitiesPacket(Packet):
+    @staticmethod
+    def get_id(context):
+        return 0x38 if context.protocol_version >= 550 else \
+               0x37 if context.protocol_version >= 471 else \
+               0x35 if context.protocol_version >= 461 else \
+               0x36 if context.protocol_version >= 451 else \
+               0x35 if context.protocol_version >= 389 else \
+               0x34 if context.protocol_version >= 352 else \
+               0x33 if context.protocol_version >= 345 else \
+               0x32 if context.protocol_version >= 336 else \
+               0x31 if context.protocol_version >= 332 else \
+               0x32 if context.protocol_version >= 318 else \
+               0x30 if context.protocol_version >= 70 else \
+               0x13
+
+    packet_name = 'destroy entities'
+    fields = 'entity_ids',
+
+    def read(self, file_object):
+        count = VarInt.read(file_object)
+        self.entity_ids = VarInt.read_many(file_object, count)
+
+    def write_fields(self, packet_buffer):
+        VarInt.send(len(self.entity_ids), packet_buffer)
+        VarInt.write_many(self.entity_ids, packet_buffer)
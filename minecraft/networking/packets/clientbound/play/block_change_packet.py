@@ -42,6 +42,14 @@ class BlockChangePacket(Packet):
     # This alias is retained for backward compatibility.
     blockStateId = attribute_alias('block_state_id')
 
+    def apply(self, target):
+        """ Set the changed block in 'target', which may be a
+            'minecraft.networking.types.Chunk' or any other object with a
+            'set_block_state(x, y, z, state)' method.
+        """
+        target.set_block_state(self.location.x, self.location.y,
+                               self.location.z, self.block_state_id)
+
 
 class MultiBlockChangePacket(Packet):
     @staticmethod
@@ -118,3 +126,12 @@ class MultiBlockChangePacket(Packet):
         VarInt.send(len(self.records), packet_buffer)
         for record in self.records:
             record.write(packet_buffer)
+
+    def apply(self, target):
+        """ Set each changed block in 'target', as in
+            'BlockChangePacket.apply'.
+        """
+        x, z = self.chunk_x << 4, self.chunk_z << 4
+        for record in self.records:
+            target.set_block_state(x + record.x, record.y, z + record.z,
+                                   record.block_state_id)
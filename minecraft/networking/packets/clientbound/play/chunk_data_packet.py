@@ -0,0 +1,316 @@
+import struct
+
+from minecraft.networking.packets import Packet
+from minecraft.networking.types import (
+    Integer, Boolean, UnsignedShort, VarInt, ChunkSection, Chunk,
+)
+from minecraft.networking.types.chunk import (
+    MAX_PALETTE_BITS, SECTION_VOLUME,
+)
+
+
+# The format of the block data of a section in Minecraft 1.8.
+SECTION_FORMAT_1_8 = struct.Struct('<%dH' % SECTION_VOLUME)
+
+# The size in bytes of the block light or sky light data of a section.
+LIGHT_SIZE = SECTION_VOLUME // 2
+
+# An empty NBT compound tag, sent if a packet has no heightmaps.
+EMPTY_NBT_COMPOUND = b'\x0a\x00\x00\x00'
+
+# The sizes of the payloads of fixed-size NBT tags, by tag ID.
+NBT_SIZES = {1: 1, 2: 2, 3: 4, 4: 8, 5: 4, 6: 8}
+
+
+def read_raw_nbt(file_object):
+    """ Read a named NBT tag, returning its raw bytes without decoding it. """
+    parts = []
+
+    def read(length):
+        data = file_object.read(length)
+        if len(data) < length:
+            raise EOFError("Unexpected end of message.")
+        parts.append(data)
+        return data
+
+    def read_int(fmt):
+        return struct.unpack(fmt, read(struct.calcsize(fmt)))[0]
+
+    def read_payload(tag):
+        if tag in NBT_SIZES:
+            read(NBT_SIZES[tag])
+        elif tag == 7:                              # Byte Array
+            read(read_int('>i'))
+        elif tag == 8:                              # String
+            read(read_int('>H'))
+        elif tag == 9:                              # List
+            item_tag = read_int('>B')
+            for _ in range(read_int('>i')):
+                read_payload(item_tag)
+        elif tag == 10:                             # Compound
+            while True:
+                item_tag = read_int('>B')
+                if item_tag == 0:
+                    break
+                read(read_int('>H'))
+                read_payload(item_tag)
+        elif tag == 11:                             # Int Array
+            read(4 * read_int('>i'))
+        elif tag == 12:                             # Long Array
+            read(8 * read_int('>i'))
+        else:
+            raise ValueError('Invalid NBT tag ID: %r.' % tag)
+
+    tag = read_int('>B')
+    if tag != 0:
+        read(read_int('>H'))
+        read_payload(tag)
+    return b''.join(parts)
+
+
+class ChunkDataPacket(Packet):
+    """ Chunk data, decoded into 'ChunkSection's whose block data is decoded
+        only when first accessed. Heightmaps, biomes and block entities are
+        left in their raw network representation.
+    """
+    @staticmethod
+    def get_id(context):
+        return 0x22 if context.protocol_version >= 550 else \
+               0x21 if context.protocol_version >= 471 else \
+               0x22 if context.protocol_version >= 389 else \
+               0x21 if context.protocol_version >= 345 else \
+               0x20 if context.protocol_version >= 332 else \
+               0x21 if context.protocol_version >= 318 else \
+               0x20 if context.protocol_version >= 107 else \
+               0x21
+
+    packet_name = 'chunk data'
+
+    # 'sections' is a list of 16 'ChunkSection's, each of which is None if
+    # not included in the packet. 'heightmaps' is the raw NBT data of the
+    # heightmaps, or None before 1.14. 'biomes' is the raw biome data, or
+    # None if 'full_chunk' is False. 'block_entities' is a list of the raw
+    # NBT data of each block entity, or None before 1.9.4.
+    fields = 'chunk_x', 'chunk_z', 'full_chunk', 'primary_bit_mask', \
+             'heightmaps', 'biomes', 'sections', 'block_entities'
+
+    heightmaps = None
+    biomes = None
+    block_entities = None
+
+    def field_string(self, field):
+        if field in ('heightmaps', 'biomes') and \
+           getattr(self, field, None) is not None:
+            return 'bytes(...)'
+        return super(ChunkDataPacket, self).field_string(field)
+
+    @staticmethod
+    def global_bits(context):
+        """ The number of bits in a global block state ID. """
+        if context.protocol_version >= 345:
+            return 14
+        return 13 if context.protocol_version >= 107 else 16
+
+    def biomes_size(self):
+        """ The size in bytes of the biome data of a full chunk. """
+        if self.context.protocol_version >= 550:
+            return 4096
+        return 1024 if self.context.protocol_version >= 345 else 256
+
+    def read(self, file_object):
+        proto = self.context.protocol_version
+        self.chunk_x = Integer.read(file_object)
+        self.chunk_z = Integer.read(file_object)
+        self.full_chunk = Boolean.read(file_object)
+        self.primary_bit_mask = VarInt.read(file_object) if proto >= 107 \
+            else UnsignedShort.read(file_object)
+        self.heightmaps = read_raw_nbt(file_object) if proto >= 443 else None
+
+        biomes_size = self.biomes_size() if self.full_chunk else 0
+        self.biomes = None
+        if proto >= 550 and self.full_chunk:
+            self.biomes = file_object.read(biomes_size)
+
+        data = file_object.read(VarInt.read(file_object))
+        if proto < 107 and self.full_chunk and not self.primary_bit_mask \
+           and not data:
+            # Before 1.9, a chunk may be unloaded by a full chunk with no
+            # sections, which may also have no biomes.
+            biomes_size = 0
+        if proto >= 550:
+            end = self._read_sections(data)
+        else:
+            # Sky light is included only in some dimensions, which is only
+            # known from the size of the data.
+            end = self._read_sections(data, has_sky_light=True)
+            if end != len(data) - biomes_size:
+                end = self._read_sections(data, has_sky_light=False)
+            if biomes_size:
+                self.biomes = data[end:end + biomes_size]
+                end += biomes_size
+        if end != len(data):
+            raise ValueError('Chunk data has %d bytes, but %d were expected.'
+                             % (len(data), end))
+
+        if proto >= 110:
+            self.block_entities = [
+                read_raw_nbt(file_object)
+                for _ in range(VarInt.read(file_object))]
+        else:
+            self.block_entities = None
+
+    def _read_sections(self, data, has_sky_light=False):
+        # Set 'sections' from the section data in 'data', returning the
+        # offset of the end of the section data, which may be greater than
+        # the size of 'data' if the data is inconsistent with 'has_sky_light'.
+        self.sections = [None] * 16
+        indices = [i for i in range(16) if self.primary_bit_mask & 1 << i]
+        if self.context.protocol_version < 107:
+            return self._read_sections_1_8(data, indices, has_sky_light)
+
+        proto = self.context.protocol_version
+        global_bits = self.global_bits(self.context)
+        view = bytearray(data)
+        offset = 0
+        for index in indices:
+            if offset >= len(view):
+                return offset + 1
+            block_count = None
+            if proto >= 443:
+                block_count = struct.unpack('>h', data[offset:offset + 2])[0]
+                offset += 2
+            bits = view[offset]
+            offset += 1
+            if bits <= MAX_PALETTE_BITS:
+                length, offset = VarInt.decode(view, offset)
+                palette, offset = VarInt.decode_many(view, length, offset)
+            else:
+                palette = None
+                if proto < 345:
+                    _, offset = VarInt.decode(view, offset)
+            length, offset = VarInt.decode(view, offset)
+            packed = data[offset:offset + 8 * length]
+            offset += 8 * length
+
+            block_light = sky_light = None
+            if proto < 443:
+                block_light = data[offset:offset + LIGHT_SIZE]
+                offset += LIGHT_SIZE
+                if has_sky_light:
+                    sky_light = data[offset:offset + LIGHT_SIZE]
+                    offset += LIGHT_SIZE
+
+            self.sections[index] = ChunkSection(
+                bits_per_block=bits, palette=palette, data=packed,
+                global_bits=global_bits, block_count=block_count,
+                block_light=block_light, sky_light=sky_light)
+        return offset
+
+    def _read_sections_1_8(self, data, indices, has_sky_light):
+        # In Minecraft 1.8, the block data of all sections is followed by the
+        # block light of all sections, and then by the sky light, if any.
+        count = len(indices)
+        light_offset = count * 2 * SECTION_VOLUME
+        end = light_offset + count * LIGHT_SIZE * (2 if has_sky_light else 1)
+        if end > len(data):
+            return end
+        for i, index in enumerate(indices):
+            sky_light = None
+            if has_sky_light:
+                start = light_offset + (count + i) * LIGHT_SIZE
+                sky_light = data[start:start + LIGHT_SIZE]
+            start = light_offset + i * LIGHT_SIZE
+            self.sections[index] = ChunkSection.from_states(
+                SECTION_FORMAT_1_8.unpack_from(data, i * 2 * SECTION_VOLUME),
+                global_bits=16, block_light=data[start:start + LIGHT_SIZE],
+                sky_light=sky_light)
+        return end
+
+    def write_fields(self, packet_buffer):
+        proto = self.context.protocol_version
+        Integer.send(self.chunk_x, packet_buffer)
+        Integer.send(self.chunk_z, packet_buffer)
+        Boolean.send(self.full_chunk, packet_buffer)
+        if proto >= 107:
+            VarInt.send(self.primary_bit_mask, packet_buffer)
+        else:
+            UnsignedShort.send(self.primary_bit_mask, packet_buffer)
+        if proto >= 443:
+            packet_buffer.send(self.heightmaps if self.heightmaps is not None
+                               else EMPTY_NBT_COMPOUND)
+        if proto >= 550 and self.full_chunk:
+            packet_buffer.send(self.biomes)
+
+        sections = [self.sections[i] for i in range(16)
+                    if self.primary_bit_mask & 1 << i]
+        parts = self._write_sections_1_8(sections) if proto < 107 \
+            else [self._write_section(s) for s in sections]
+        if proto < 550 and self.full_chunk:
+            parts.append(self.biomes)
+        data = b''.join(parts)
+        VarInt.send(len(data), packet_buffer)
+        packet_buffer.send(data)
+
+        if proto >= 110:
+            block_entities = self.block_entities or ()
+            VarInt.send(len(block_entities), packet_buffer)
+            for block_entity in block_entities:
+                packet_buffer.send(block_entity)
+
+    def _write_section(self, section):
+        proto = self.context.protocol_version
+        parts = []
+        if proto >= 443:
+            block_count = section.block_count
+            if block_count is None:
+                block_count = sum(1 for s in section.states() if s != 0)
+            parts.append(struct.pack('>h', block_count))
+        parts.append(struct.pack('>B', section.bits_per_block))
+        if section.palette is not None:
+            parts.append(VarInt.encode(len(section.palette)))
+            parts.extend(VarInt.encode(s) for s in section.palette)
+        elif proto < 345:
+            parts.append(VarInt.encode(0))
+        packed = section.data_bytes()
+        parts.append(VarInt.encode(len(packed) // 8))
+        parts.append(packed)
+        if proto < 443:
+            parts.append(section.block_light or b'\0' * LIGHT_SIZE)
+            if section.sky_light is not None:
+                parts.append(section.sky_light)
+        return b''.join(parts)
+
+    def _write_sections_1_8(self, sections):
+        parts = [SECTION_FORMAT_1_8.pack(*s.states()) for s in sections]
+        parts.extend(s.block_light or b'\0' * LIGHT_SIZE for s in sections)
+        parts.extend(s.sky_light for s in sections
+                     if s.sky_light is not None)
+        return parts
+
+    def chunk(self):
+        """ A new 'Chunk' containing the data in this packet. """
+        chunk = Chunk(self.chunk_x, self.chunk_z,
+                      global_bits=self.global_bits(self.context))
+        self.apply(chunk)
+        return chunk
+
+    def apply(self, chunk):
+        """ Update the given 'Chunk' with the data in this packet. """
+        chunk.update(self.sections, self.biomes, self.full_chunk)
+
+
+class UnloadChunkPacket(Packet):
+    @staticmethod
+    def get_id(context):
+        return 0x1E if context.protocol_version >= 550 else \
+               0x1D if context.protocol_version >= 471 else \
+               0x1F if context.protocol_version >= 389 else \
+               0x1E if context.protocol_version >= 345 else \
+               0x1D if context.protocol_version >= 332 else \
+               0x1E if context.protocol_version >= 318 else \
+               0x1D
+
+    packet_name = 'unload chunk'
+    definition = [
+        {'chunk_x': Integer},
+        {'chunk_z': Integer}]
@@ -1,5 +1,5 @@
 from minecraft.networking.types import (
-    Vector, Float, Byte, Integer, multi_attribute_alias,
+    Vector, Float, Byte, Integer, PrefixedArray, multi_attribute_alias,
 )
 from minecraft.networking.packets import Packet
 
@@ -19,6 +19,20 @@ class ExplosionPacket(Packet):
 
     packet_name = 'explosion'
 
+    class Record(Vector):
+        __slots__ = ()
+
+    definition = [
+        {'x': Float},
+        {'y': Float},
+        {'z': Float},
+        {'radius': Float},
+        {'records': PrefixedArray(Integer, (Byte, Byte, Byte), Record)},
+        {'player_motion_x': Float},
+        {'player_motion_y': Float},
+        {'player_motion_z': Float}]
+
+    # The fields are given explicitly so that they are known without a context.
     fields = 'x', 'y', 'z', 'radius', 'records', \
              'player_motion_x', 'player_motion_y', 'player_motion_z'
 
@@ -28,37 +42,3 @@ class ExplosionPacket(Packet):
     # Access the 'player_motion_{x,y,z}' fields as a Vector tuple.
     player_motion = multi_attribute_alias(
         Vector, 'player_motion_x', 'player_motion_y', 'player_motion_z')
-
-    class Record(Vector):
-        __slots__ = ()
-
-    def read(self, file_object):
-        self.x = Float.read(file_object)
-        self.y = Float.read(file_object)
-        self.z = Float.read(file_object)
-        self.radius = Float.read(file_object)
-        records_count = Integer.read(file_object)
-        self.records = []
-        for i in range(records_count):
-            rec_x = Byte.read(file_object)
-            rec_y = Byte.read(file_object)
-            rec_z = Byte.read(file_object)
-            record = ExplosionPacket.Record(rec_x, rec_y, rec_z)
-            self.records.append(record)
-        self.player_motion_x = Float.read(file_object)
-        self.player_motion_y = Float.read(file_object)
-        self.player_motion_z = Float.read(file_object)
-
-    def write_fields(self, packet_buffer):
-        Float.send(self.x, packet_buffer)
-        Float.send(self.y, packet_buffer)
-        Float.send(self.z, packet_buffer)
-        Float.send(self.radius, packet_buffer)
-        Integer.send(len(self.records), packet_buffer)
-        for record in self.records:
-            Byte.send(record.x, packet_buffer)
-            Byte.send(record.y, packet_buffer)
-            Byte.send(record.z, packet_buffer)
-        Float.send(self.player_motion_x, packet_buffer)
-        Float.send(self.player_motion_y, packet_buffer)
-        Float.send(self.player_motion_z, packet_buffer)
@@ -63,8 +63,8 @@ class PlayerListItemPacket(Packet):
     class Action(MutableRecord):
         __slots__ = 'uuid',
 
-        def read(self, file_object):
-            self.uuid = UUID.read(file_object)
+        def read(self, file_object, context=None):
+            self.uuid = UUID.read_with_context(file_object, context)
             self._read(file_object)
 
         def send(self, packet_buffer):
@@ -202,7 +202,7 @@ class PlayerListItemPacket(Packet):
         self.actions = []
         for i in range(action_count):
             action = self.action_type()
-            action.read(file_object)
+            action.read(file_object, self.context)
             self.actions.append(action)
 
     def write_fields(self, packet_buffer):
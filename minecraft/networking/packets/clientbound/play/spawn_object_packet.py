@@ -2,7 +2,7 @@ from minecraft.networking.packets import Packet
 from minecraft.networking.types.utility import descriptor
 
 from minecraft.networking.types import (
-    VarInt, UUID, Byte, Double, Integer, Angle, Short, Enum, Vector,
+    VarInt, UUID, Byte, Double, Integer, Angle, Short, VersionedEnum, Vector,
     Direction, PositionAndLook, attribute_alias, multi_attribute_alias,
 )
 
@@ -42,57 +42,13 @@ class SpawnObjectPacket(Packet):
     def field_enum(cls, field, context):
         if field != 'type_id' or context is None:
             return
-
-        pv = context.protocol_version
-        name = 'EntityType_%d' % pv
-        if hasattr(cls, name):
-            return getattr(cls, name)
-
-        class EntityType(Enum):
-            ACTIVATED_TNT     = 50 if pv < 458 else 55  # PrimedTnt
-            AREA_EFFECT_CLOUD =  3 if pv < 458 else  0
-            ARMORSTAND        = 78 if pv < 458 else  1
-            ARROW             = 60 if pv < 458 else  2
-            BOAT              =  1 if pv < 458 else  5
-            DRAGON_FIREBALL   = 93 if pv < 458 else 13
-            EGG               = 62 if pv < 458 else 74  # ThrownEgg
-            ENDERCRYSTAL      = 51 if pv < 458 else 16
-            ENDERPEARL        = 65 if pv < 458 else 75  # ThrownEnderpearl
-            EVOCATION_FANGS   = 79 if pv < 458 else 20
-            EXP_BOTTLE        = 75 if pv < 458 else 76  # ThrownExpBottle
-            EYE_OF_ENDER      = 72 if pv < 458 else 23  # EyeOfEnderSignal
-            FALLING_OBJECT    = 70 if pv < 458 else 24  # FallingSand
-            FIREBALL          = 63 if pv < 458 else 34  # Fireball (ghast)
-            FIRECHARGE        = 64 if pv < 458 else 65  # SmallFireball (blaze)
-            FIREWORK_ROCKET   = 76 if pv < 458 else 25  # FireworksRocketEntity
-            FISHING_HOOK      = 90 if pv < 458 else 93  # Fishing bobber
-            ITEM_FRAMES       = 71 if pv < 458 else 33  # ItemFrame
-            ITEM_STACK        =  2 if pv < 458 else 32  # Item
-            LEASH_KNOT        = 77 if pv < 458 else 35
-            LLAMA_SPIT        = 68 if pv < 458 else 37
-            MINECART          = 10 if pv < 458 else 39  # MinecartRideable
-            POTION            = 73 if pv < 458 else 77  # ThrownPotion
-            SHULKER_BULLET    = 67 if pv < 458 else 60
-            SNOWBALL          = 61 if pv < 458 else 67
-            SPECTRAL_ARROW    = 91 if pv < 458 else 68
-            WITHER_SKULL      = 66 if pv < 458 else 85
-            if pv >= 393:
-                TRIDENT = 94
-            if pv >= 458:
-                MINECART_CHEST =         40
-                MINECART_COMMAND_BLOCK = 41
-                MINECART_FURNACE =       42
-                MINECART_HOPPER =        43
-                MINECART_SPAWNER =       44
-                MINECART_TNT =           45
-
-        setattr(cls, name, EntityType)
-        return EntityType
+        return EntityType.for_version(context.protocol_version)
 
     def read(self, file_object):
         self.entity_id = VarInt.read(file_object)
         if self.context.protocol_version >= 49:
-            self.object_uuid = UUID.read(file_object)
+            self.object_uuid = UUID.read_with_context(
+                file_object, self.context)
 
         if self.context.protocol_version >= 458:
             self.type_id = VarInt.read(file_object)
@@ -170,3 +126,52 @@ class SpawnObjectPacket(Packet):
 
     # This alias is retained for backward compatibility.
     objectUUID = attribute_alias('object_uuid')
+
+
+class EntityType(VersionedEnum):
+    """ The types of object that may be spawned by a 'SpawnObjectPacket', in
+        each protocol version.
+    """
+    @classmethod
+    def get_members(cls, protocol_version):
+        pv = protocol_version
+        members = {
+            'ACTIVATED_TNT':    50 if pv < 458 else 55,  # PrimedTnt
+            'AREA_EFFECT_CLOUD': 3 if pv < 458 else  0,
+            'ARMORSTAND':       78 if pv < 458 else  1,
+            'ARROW':            60 if pv < 458 else  2,
+            'BOAT':              1 if pv < 458 else  5,
+            'DRAGON_FIREBALL':  93 if pv < 458 else 13,
+            'EGG':              62 if pv < 458 else 74,  # ThrownEgg
+            'ENDERCRYSTAL':     51 if pv < 458 else 16,
+            'ENDERPEARL':       65 if pv < 458 else 75,  # ThrownEnderpearl
+            'EVOCATION_FANGS':  79 if pv < 458 else 20,
+            'EXP_BOTTLE':       75 if pv < 458 else 76,  # ThrownExpBottle
+            'EYE_OF_ENDER':     72 if pv < 458 else 23,  # EyeOfEnderSignal
+            'FALLING_OBJECT':   70 if pv < 458 else 24,  # FallingSand
+            'FIREBALL':         63 if pv < 458 else 34,  # Fireball (ghast)
+            'FIRECHARGE':       64 if pv < 458 else 65,  # SmallFireball
+            'FIREWORK_ROCKET':  76 if pv < 458 else 25,  # FireworksRocket
+            'FISHING_HOOK':     90 if pv < 458 else 93,  # Fishing bobber
+            'ITEM_FRAMES':      71 if pv < 458 else 33,  # ItemFrame
+            'ITEM_STACK':        2 if pv < 458 else 32,  # Item
+            'LEASH_KNOT':       77 if pv < 458 else 35,
+            'LLAMA_SPIT':       68 if pv < 458 else 37,
+            'MINECART':         10 if pv < 458 else 39,  # MinecartRideable
+            'POTION':           73 if pv < 458 else 77,  # ThrownPotion
+            'SHULKER_BULLET':   67 if pv < 458 else 60,
+            'SNOWBALL':         61 if pv < 458 else 67,
+            'SPECTRAL_ARROW':   91 if pv < 458 else 68,
+            'WITHER_SKULL':     66 if pv < 458 else 85,
+        }
+        if pv >= 393:
+            members['TRIDENT'] = 94
+        if pv >= 458:
+            members.update(
+                MINECART_CHEST=40,
+                MINECART_COMMAND_BLOCK=41,
+                MINECART_FURNACE=42,
+                MINECART_HOPPER=43,
+                MINECART_SPAWNER=44,
+                MINECART_TNT=45)
+        return members
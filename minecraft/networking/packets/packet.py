@@ -1,20 +1,56 @@
+from collections import namedtuple
 from .packet_buffer import PacketBuffer
 from zlib import compress
+from minecraft.compat import with_metaclass
+from minecraft import SUPPORTED_PROTOCOL_VERSIONS
 from minecraft.networking.types import (
-    VarInt, Enum
+    VarInt, Enum, CachingType
 )
 
 
-class Packet(object):
+class context_cached(object):
+    """ A non-data descriptor giving the value of a class method, such as
+        'get_id', for the context of the instance through which it is
+        accessed, or None if there is no instance or context. The value is
+        cached by the class for each protocol version, and may be overridden
+        by a class attribute or an instance attribute of the same name.
+    """
+    __slots__ = 'method_name'
+
+    def __init__(self, method_name):
+        self.method_name = method_name
+
+    def __get__(self, instance, owner):
+        context = None if instance is None else instance._context
+        if context is None:
+            return None
+        cache = owner.class_cache()
+        key = self.method_name, context.protocol_version
+        if key not in cache:
+            cache[key] = getattr(owner, self.method_name)(context)
+        return cache[key]
+
+
+class Packet(with_metaclass(CachingType, object)):
+    # Subclasses without '__slots__' have a '__dict__' as usual, so any
+    # attribute may be set on their instances. To save space, '__slots__' may
+    # be generated for a subclass by 'slotted_packet'. Instances of 'Packet'
+    # itself are created as '_DynamicPacket', which also has a '__dict__'.
+    __slots__ = '_context', '_serialized'
+
+    def __new__(cls, *args, **kwds):
+        return object.__new__(_DynamicPacket if cls is Packet else cls)
+
     packet_name = "base"
-    id = None
-    definition = None
 
     # To define the packet ID, either:
     #  1. Define the attribute `id', of type int, in a subclass; or
     #  2. Override `get_id' in a subclass and return the correct packet ID
     #     for the given ConnectionContext. This is necessary if the packet ID
     #     has changed across protocol versions, for example.
+    # The result of 'get_id' is cached by the class for each protocol version.
+    id = context_cached('get_id')
+
     @classmethod
     def get_id(cls, context):
         return cls.id
@@ -28,12 +64,16 @@ class Packet(object):
     #  3. Override the methods `read' and/or `write_fields' in a subclass.
     #     This may be necessary if the packet layout cannot be described as a
     #     simple list of fields.
+    # The result of 'get_definition' is cached by the class for each protocol
+    # version, and so should not be modified.
+    definition = context_cached('get_definition')
+
     @classmethod
     def get_definition(cls, context):
         return cls.definition
 
     def __init__(self, context=None, **kwargs):
-        self.context = context
+        self._context = context
         self.set_values(**kwargs)
 
     @property
@@ -43,15 +83,6 @@ class Packet(object):
     @context.setter
     def context(self, _context):
         self._context = _context
-        self._context_changed()
-
-    def _context_changed(self):
-        if self._context is not None:
-            self.id = self.get_id(self._context)
-            self.definition = self.get_definition(self._context)
-        else:
-            self.id = None
-            self.definition = None
 
     def set_values(self, **kwargs):
         for key, value in kwargs.items():
@@ -90,13 +121,28 @@ class Packet(object):
 
     def write(self, socket, compression_threshold=None):
         # buffer the data since we need to know the length of each packet's
-        # payload
+        # payload, unless this has already been done by 'serialize'
+        packet_buffer = getattr(self, '_serialized', None)
+        if packet_buffer is None:
+            packet_buffer = self._serialize()
+        else:
+            del self._serialized
+        self._write_buffer(socket, packet_buffer, compression_threshold)
+
+    def serialize(self):
+        """ Serialise the packet's ID and fields now, so that the next call
+            to 'write' need only frame (and possibly compress) the resulting
+            data. Any changes to the packet made in between are not written.
+        """
+        self._serialized = self._serialize()
+
+    def _serialize(self):
         packet_buffer = PacketBuffer()
         # write packet's id right off the bat in the header
         VarInt.send(self.id, packet_buffer)
         # write every individual field
         self.write_fields(packet_buffer)
-        self._write_buffer(socket, packet_buffer, compression_threshold)
+        return packet_buffer
 
     def write_fields(self, packet_buffer):
         # Write the fields comprising the body of the packet (excluding the
@@ -143,8 +189,58 @@ class Packet(object):
         """ The subclass of 'minecraft.networking.types.Enum' associated with
             this field, or None if there is no such class.
         """
-        enum_name = ''.join(s.capitalize() for s in field.split('_'))
-        if hasattr(cls, enum_name):
-            enum_class = getattr(cls, enum_name)
-            if isinstance(enum_class, type) and issubclass(enum_class, Enum):
-                return enum_class
+        cache = cls.class_cache()
+        key = 'field_enum', field
+        if key not in cache:
+            enum_name = ''.join(s.capitalize() for s in field.split('_'))
+            enum_class = getattr(cls, enum_name, None)
+            if not (isinstance(enum_class, type) and
+                    issubclass(enum_class, Enum)):
+                enum_class = None
+            cache[key] = enum_class
+        return cache[key]
+
+
+class _DynamicPacket(Packet):
+    # The type of instances of 'Packet' itself, which has a '__dict__', unlike
+    # 'Packet', so that any attribute may be set on them.
+    pass
+
+
+_DynamicPacket.__name__ = Packet.__name__
+
+
+# A stand-in for a ConnectionContext with only a protocol version.
+_VersionContext = namedtuple('_VersionContext', 'protocol_version')
+
+
+def slotted_packet(packet_class):
+    """ A class decorator which recreates a subclass of 'Packet' with
+        '__slots__' for the names of all fields in its definition in any
+        supported protocol version, so that its instances do not have a
+        '__dict__', and use less memory. Other attributes may not then be
+        set on such instances, so this should only be used for packets whose
+        fields are all given by their definitions, and whose base classes
+        all have '__slots__'.
+    """
+    names = []
+    for protocol_version in SUPPORTED_PROTOCOL_VERSIONS:
+        definition = packet_class.get_definition(
+            _VersionContext(protocol_version))
+        for field in definition or ():
+            for name in field:
+                if name not in names and not hasattr(packet_class, name):
+                    names.append(name)
+
+    for base in packet_class.__mro__[1:-1]:
+        if '__slots__' not in base.__dict__:
+            raise TypeError('%s cannot have __slots__, as its base class %s'
+                            ' has none.' % (packet_class.__name__,
+                                            base.__name__))
+
+    namespace = dict(packet_class.__dict__)
+    for name in '__dict__', '__weakref__', '_class_cache':
+        namespace.pop(name, None)
+    namespace['__slots__'] = tuple(names)
+    return type(packet_class)(
+        packet_class.__name__, packet_class.__bases__, namespace)
@@ -0,0 +1,107 @@
+from .packet_buffer import PacketBuffer
+from minecraft.networking.types import VarInt
+
+
+class PacketTemplate(object):
+    """ A packet type with some of its fields fixed, which may be instantiated
+        repeatedly with different values of the remaining fields, without
+        resolving the packet's ID and definition or re-encoding its fixed
+        fields each time. This is useful for packets sent very frequently.
+
+        For example, to respond to keep-alive packets:
+
+            template = PacketTemplate(
+                serverbound.play.KeepAlivePacket, connection.context)
+            ...
+            connection.write_packet(template.packet(keep_alive_id=id))
+
+        The encoding is redone automatically if the protocol version of the
+        context changes. Only packets whose layout is given by a definition
+        (rather than by an overridden 'write_fields' method) are supported.
+    """
+    def __init__(self, packet_type, context, **fixed_values):
+        """
+        :param packet_type: A subclass of 'Packet'.
+        :param context: The 'ConnectionContext' of the packets to be created,
+                        which must also be that of the connection by which
+                        they are written.
+        :param fixed_values: The values of the fields which are to be fixed.
+                             All other fields must be given when each packet
+                             is created.
+        """
+        self.packet_type = packet_type
+        self.context = context
+        self.fixed_values = fixed_values
+        self._protocol_version = None
+
+    def _encode(self):
+        # Split the packet's ID and fields into a list of parts, each of
+        # which is either a byte string encoding consecutive fixed fields or
+        # a (name, type) pair denoting a variable field.
+        context = self.context
+        packet_type = self.packet_type
+        packet_id = packet_type.get_id(context)
+        definition = packet_type.get_definition(context)
+        if definition is None:
+            raise ValueError('%s has no definition.' % packet_type.__name__)
+
+        parts, variable_names = [], set()
+        fixed_buffer = PacketBuffer()
+        VarInt.send(packet_id, fixed_buffer)
+        for field in definition:
+            for name, data_type in field.items():
+                if name in self.fixed_values:
+                    data_type.send_with_context(
+                        self.fixed_values[name], fixed_buffer, context)
+                    continue
+                if fixed_buffer.get_writable():
+                    parts.append(fixed_buffer.get_writable())
+                    fixed_buffer.reset()
+                parts.append((name, data_type))
+                variable_names.add(name)
+        if fixed_buffer.get_writable():
+            parts.append(fixed_buffer.get_writable())
+
+        self._parts = parts
+        self._variable_names = frozenset(variable_names)
+        self._protocol_version = context.protocol_version
+
+    def encode(self, **values):
+        """ Return the packet's ID and fields, encoded as a byte string, given
+            the values of its variable fields.
+        """
+        return self._write(values).get_writable()
+
+    def _write(self, values):
+        if self.context.protocol_version != self._protocol_version:
+            self._encode()
+        if set(values) != self._variable_names:
+            raise ValueError(
+                'Values must be given for exactly the fields %s of %s.' % (
+                    ', '.join(sorted(self._variable_names)) or '(none)',
+                    self.packet_type.__name__))
+
+        packet_buffer = PacketBuffer()
+        for part in self._parts:
+            if isinstance(part, bytes):
+                packet_buffer.send(part)
+            else:
+                name, data_type = part
+                data_type.send_with_context(
+                    values[name], packet_buffer, self.context)
+        return packet_buffer
+
+    def packet(self, **values):
+        """ Return a new instance of the packet type, with the given values of
+            its variable fields, which has already been serialised (see
+            'Packet.serialize') and so may be written without being encoded.
+        """
+        packet_buffer = self._write(values)
+        packet = self.packet_type.__new__(self.packet_type)
+        packet._context = self.context
+        for name, value in self.fixed_values.items():
+            setattr(packet, name, value)
+        for name, value in values.items():
+            setattr(packet, name, value)
+        packet._serialized = packet_buffer
+        return packet
@@ -0,0 +1,156 @@
+"""
+Contains 'PlayerListTracker', which maintains the list of players shown to a
+client (the "tab list"), as given by 'PlayerListItemPacket'.
+"""
+import threading
+import numbers
+import uuid
+
+from .packets import clientbound
+
+
+__all__ = ('PlayerListTracker', 'uuid_key',
+           'PLAYER_ADDED', 'PLAYER_UPDATED', 'PLAYER_REMOVED')
+
+
+# The kinds of change passed to the listeners of a 'PlayerListTracker'.
+PLAYER_ADDED = 'added'
+PLAYER_UPDATED = 'updated'
+PLAYER_REMOVED = 'removed'
+
+
+def uuid_key(value):
+    """ The raw 16-byte representation of a UUID given as a string, a
+        'uuid.UUID', a 128-bit integer, or already as 16 bytes.
+    """
+    if isinstance(value, bytes) and len(value) == 16:
+        return value
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    if isinstance(value, numbers.Integral):
+        return uuid.UUID(int=value).bytes
+    return uuid.UUID(value).bytes
+
+
+class PlayerListTracker(object):
+    """ The players in the player list, each represented by a
+        'PlayerListItemPacket.PlayerListItem', which is updated in place by
+        later changes to the same player.
+
+        Players are keyed by the raw 16 bytes of their UUIDs, and may also be
+        looked up case-insensitively by name. Functions registered by
+        'register_listener' are called as 'listener(change, player)' after
+        each change, where 'change' is one of 'PLAYER_ADDED',
+        'PLAYER_UPDATED' or 'PLAYER_REMOVED'.
+
+        Unless created with 'track_player_list=False', a 'Connection' keeps
+        one of these as its 'player_list' attribute. Otherwise, 'register' may
+        be used to keep one updated from a connection's packets.
+    """
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.listeners = []
+        self._players = {}         # Maps each UUID key to its player.
+        self._players_by_name = {}  # Maps each lower-case name to a player.
+
+    def register(self, connection):
+        """ Keep this player list updated from the packets received by
+            'connection'. The list is cleared when the client joins the game.
+        """
+        connection.register_packet_listener(
+            self.apply, clientbound.play.PlayerListItemPacket)
+        connection.register_packet_listener(
+            lambda packet: self.clear(), clientbound.play.JoinGamePacket)
+
+    def register_listener(self, method):
+        """ Call 'method(change, player)' after each change to the list. """
+        self.listeners.append(method)
+
+    def __len__(self):
+        return len(self._players)
+
+    def __contains__(self, player_uuid):
+        return uuid_key(player_uuid) in self._players
+
+    def __iter__(self):
+        """ Iterate over the players in the list. """
+        return iter(list(self._players.values()))
+
+    def get(self, player_uuid):
+        """ The player with the given UUID (in any form accepted by
+            'uuid_key'), or None.
+        """
+        return self._players.get(uuid_key(player_uuid))
+
+    def by_name(self, name):
+        """ The player with the given name, ignoring case, or None. """
+        return self._players_by_name.get(name.lower())
+
+    def clear(self):
+        """ Remove all players, without calling any listeners. """
+        with self.lock:
+            self._players.clear()
+            self._players_by_name.clear()
+
+    def apply(self, packet):
+        """ Apply a 'PlayerListItemPacket'. """
+        packet_type = clientbound.play.PlayerListItemPacket
+        action_type = packet.action_type
+        changes = []
+        with self.lock:
+            if action_type is packet_type.AddPlayerAction:
+                for action in packet.actions:
+                    changes.append(self._add(action))
+            elif action_type is packet_type.RemovePlayerAction:
+                for action in packet.actions:
+                    player = self._players.pop(uuid_key(action.uuid), None)
+                    if player is not None:
+                        self._unindex(player)
+                        changes.append((PLAYER_REMOVED, player))
+            else:
+                field = self._update_fields[action_type.action_id]
+                for action in packet.actions:
+                    player = self._players.get(uuid_key(action.uuid))
+                    if player is not None:
+                        setattr(player, field, getattr(action, field))
+                        changes.append((PLAYER_UPDATED, player))
+
+        if self.listeners:
+            for change, player in changes:
+                for listener in self.listeners:
+                    listener(change, player)
+
+    def _add(self, action):
+        key = uuid_key(action.uuid)
+        player = self._players.get(key)
+        if player is None:
+            player = clientbound.play.PlayerListItemPacket.PlayerListItem(
+                uuid=action.uuid, name=action.name,
+                properties=action.properties, gamemode=action.gamemode,
+                ping=action.ping, display_name=action.display_name)
+            self._players[key] = player
+            change = PLAYER_ADDED
+        else:
+            self._unindex(player)
+            player.name = action.name
+            player.properties = action.properties
+            player.gamemode = action.gamemode
+            player.ping = action.ping
+            player.display_name = action.display_name
+            change = PLAYER_UPDATED
+        self._players_by_name[player.name.lower()] = player
+        return change, player
+
+    def _unindex(self, player):
+        name = player.name.lower()
+        if self._players_by_name.get(name) is player:
+            del self._players_by_name[name]
+
+    # Maps the 'action_id' of each kind of update to the field it updates.
+    # The IDs are used, rather than the action types, so that the packets of
+    # the play state need not be imported until they are first received.
+    _update_fields = {
+        1: 'gamemode',      # UpdateGameModeAction
+        2: 'ping',          # UpdateLatencyAction
+        3: 'display_name',  # UpdateDisplayNameAction
+    }
@@ -0,0 +1,292 @@
+"""
+Contains 'ReconnectSupervisor', which automatically reconnects terminated
+connections, for use by clients maintaining many simultaneous connections.
+"""
+import threading
+import timeit
+import random
+import heapq
+import itertools
+
+from .connection import ProtocolVersionCache
+from .packets import clientbound
+from ..exceptions import VersionMismatch, InvalidState
+
+
+__all__ = ('ReconnectSupervisor',)
+
+
+# The maximum time, in seconds, to wait for the networking thread of a
+# terminated connection to exit before reconnecting.
+THREAD_JOIN_TIMEOUT_S = 5
+
+
+class _SupervisedConnection(object):
+    __slots__ = 'connection', 'allowed_proto_versions', 'handle_exit', \
+                'handle_exception', 'join_listener', 'attempts', \
+                'in_flight', 'scheduled', 'released'
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.allowed_proto_versions = set(connection.allowed_proto_versions)
+        self.handle_exit = connection.handle_exit
+        self.handle_exception = connection.handle_exception
+        self.join_listener = None
+        self.attempts = 0        # Consecutive failed attempts to reconnect.
+        self.in_flight = False   # True while connecting but not yet joined.
+        self.scheduled = False   # True while waiting in the queue.
+        self.released = False
+
+
+class ReconnectSupervisor(object):
+    """Reconnects each of a set of 'Connection' objects whenever it terminates,
+    for example because the server restarted or kicked the client.
+
+    Reconnection attempts are delayed by a random amount of time, chosen
+    uniformly between 0 and an upper bound that begins at 'initial_delay'
+    seconds and is multiplied by 'multiplier' after each consecutive failed
+    attempt, up to 'max_delay' seconds, so that many clients disconnected at
+    the same moment do not all reconnect at once. Moreover, at most
+    'max_concurrent' connections managed by the same supervisor may be in the
+    process of connecting (from the start of 'Connection.connect' until the
+    server's 'JoinGamePacket' is received) at any one time. Each reconnection
+    is made in a separate thread, so a server which is slow to accept
+    connections does not delay the reconnection of others.
+
+    Because reconnection reuses the same 'Connection' object, all registered
+    packet listeners and exception handlers are preserved. The server's
+    protocol version is remembered in a 'ProtocolVersionCache' shared by all
+    supervised connections that do not already have one, so that it need not
+    be queried again, unless the server's version changes.
+
+    Supervision of a connection replaces its 'handle_exit' and
+    'handle_exception' attributes with functions that call the original
+    values (if not None or False) and then schedule a reconnection. In
+    particular, exceptions raised in the networking thread are not re-raised.
+    To terminate a supervised connection without it being reconnected, call
+    'release' before 'Connection.disconnect'.
+    """
+    def __init__(self, max_concurrent=16, initial_delay=1.0, max_delay=60.0,
+                 multiplier=2.0, max_attempts=None,
+                 protocol_version_cache=None):
+        """
+        :param max_concurrent: The maximum number of connections which may be
+                               simultaneously connecting.
+        :param initial_delay: The upper bound of the first delay, in seconds.
+        :param max_delay: The maximum upper bound of any delay, in seconds.
+        :param multiplier: The factor by which the upper bound of the delay
+                           increases after each consecutive failed attempt.
+        :param max_attempts: The number of consecutive failed attempts after
+                             which a connection is released, or None to retry
+                             indefinitely.
+        :param protocol_version_cache: The :class:`ProtocolVersionCache` given
+                                       to connections which do not have one,
+                                       or None to create a new cache.
+        """
+        self.max_concurrent = max_concurrent
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.max_attempts = max_attempts
+        self.protocol_version_cache = protocol_version_cache \
+            if protocol_version_cache is not None else ProtocolVersionCache()
+
+        self._cond = threading.Condition()
+        self._states = {}    # Maps each supervised connection to its state.
+        self._queue = []     # A heap of (due_time, seq, state) triples.
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._stopping = False
+        self._thread = None
+
+    def supervise(self, connection, connect=True):
+        """Begin reconnecting 'connection' whenever it terminates. If 'connect'
+           is True, the connection is also initially connected by this
+           supervisor, subject to the limit on concurrent connections;
+           otherwise, the caller is responsible for connecting it.
+        """
+        with self._cond:
+            if self._stopping:
+                raise InvalidState('This supervisor has been stopped.')
+            if connection in self._states:
+                return
+            state = _SupervisedConnection(connection)
+            self._states[connection] = state
+
+            if connection.protocol_version_cache is None:
+                connection.protocol_version_cache = \
+                    self.protocol_version_cache
+            connection.handle_exit = \
+                lambda: self._handle_exit(state)
+            connection.handle_exception = \
+                lambda exc, exc_info: self._handle_exception(
+                    state, exc, exc_info)
+            state.join_listener = \
+                lambda packet: self._handle_join_game(state)
+            connection.register_packet_listener(
+                state.join_listener, clientbound.play.JoinGamePacket)
+
+            if connect:
+                self._schedule(state, 0)
+            self._start_thread()
+
+    def release(self, connection):
+        """Stop supervising 'connection', restoring its original 'handle_exit'
+           and 'handle_exception' attributes. This does not disconnect it.
+        """
+        with self._cond:
+            state = self._states.pop(connection, None)
+            if state is None:
+                return
+            self._release(state)
+
+    def stop(self):
+        """Release all supervised connections and stop the supervisor's
+           thread. The supervisor cannot be used again afterwards.
+        """
+        with self._cond:
+            self._stopping = True
+            for state in self._states.values():
+                self._release(state)
+            self._states.clear()
+            self._cond.notify_all()
+
+    def backoff_delay(self, attempts):
+        """The randomised delay, in seconds, before attempting to reconnect a
+           connection after the given number of consecutive failed attempts.
+        """
+        bound = min(self.max_delay,
+                    self.initial_delay * self.multiplier ** attempts)
+        return random.uniform(0, bound)
+
+    def should_reconnect(self, connection, exc):
+        """Return True if 'connection', having terminated due to the exception
+           'exc', should be reconnected. Override to customise this decision.
+        """
+        return not isinstance(exc, VersionMismatch)
+
+    def _release(self, state):
+        state.released = True
+        if state.in_flight:
+            state.in_flight = False
+            self._in_flight -= 1
+            self._cond.notify_all()
+        connection = state.connection
+        connection.handle_exit = state.handle_exit
+        connection.handle_exception = state.handle_exception
+        connection.packet_listeners = [
+            listener for listener in connection.packet_listeners
+            if listener.callback is not state.join_listener]
+
+    def _start_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run)
+            self._thread.name = 'Reconnect Supervisor'
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _schedule(self, state, delay):
+        if state.scheduled:
+            return
+        state.scheduled = True
+        due_time = timeit.default_timer() + delay
+        heapq.heappush(self._queue, (due_time, next(self._sequence), state))
+        self._cond.notify_all()
+
+    def _end_attempt(self, state, failed):
+        # Record the end of a connection attempt, or of an established
+        # connection, and return the number of consecutive failed attempts.
+        if state.in_flight:
+            state.in_flight = False
+            self._in_flight -= 1
+            self._cond.notify_all()
+            if failed:
+                state.attempts += 1
+        return state.attempts
+
+    def _connection_ended(self, state, exc):
+        with self._cond:
+            if state.released or self._stopping:
+                return
+            attempts = self._end_attempt(state, failed=True)
+            if exc is not None and \
+               not self.should_reconnect(state.connection, exc) or \
+               self.max_attempts is not None and \
+               attempts >= self.max_attempts:
+                del self._states[state.connection]
+                self._release(state)
+                return
+            self._schedule(state, self.backoff_delay(attempts))
+
+    def _handle_exit(self, state):
+        try:
+            if state.handle_exit is not None:
+                state.handle_exit()
+        finally:
+            self._connection_ended(state, None)
+
+    def _handle_exception(self, state, exc, exc_info):
+        try:
+            if state.handle_exception not in (None, False):
+                state.handle_exception(exc, exc_info)
+        finally:
+            self._connection_ended(state, exc)
+
+    def _handle_join_game(self, state):
+        with self._cond:
+            if state.in_flight:
+                self._end_attempt(state, failed=False)
+            state.attempts = 0
+
+    def _run(self):
+        # Each reconnection is made by its own worker thread, so that one slow
+        # or unresponsive server cannot delay the reconnection of others. The
+        # number of workers is bounded by 'max_concurrent', since each
+        # reconnection remains in flight at least until its worker exits.
+        while True:
+            with self._cond:
+                state = self._next_due()
+                if state is None:
+                    return
+            worker = threading.Thread(target=self._reconnect, args=(state,))
+            worker.name = 'Reconnect Worker'
+            worker.daemon = True
+            worker.start()
+
+    def _next_due(self):
+        # Wait until a scheduled connection is due and may be reconnected
+        # without exceeding the concurrency limit, and return its state; or
+        # return None if the supervisor is stopped.
+        while not self._stopping:
+            if not self._queue or self._in_flight >= self.max_concurrent:
+                self._cond.wait()
+                continue
+            due_time, _seq, state = self._queue[0]
+            now = timeit.default_timer()
+            if due_time > now:
+                self._cond.wait(due_time - now)
+                continue
+            heapq.heappop(self._queue)
+            state.scheduled = False
+            if state.released:
+                continue
+            state.in_flight = True
+            self._in_flight += 1
+            return state
+        return None
+
+    def _reconnect(self, state):
+        connection = state.connection
+        thread = connection.networking_thread
+        if thread is not None and thread is not threading.current_thread():
+            # Wait for the previous connection to be fully torn down.
+            thread.join(THREAD_JOIN_TIMEOUT_S)
+
+        # Restore the versions allowed before the server's version was first
+        # determined, so that it is determined anew if it has changed.
+        connection.allowed_proto_versions = \
+            set(state.allowed_proto_versions)
+        try:
+            connection.connect()
+        except Exception as exc:
+            self._connection_ended(state, exc)
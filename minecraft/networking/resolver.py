@@ -0,0 +1,214 @@
+"""
+Contains the host name resolution and socket connection logic used by
+'minecraft.networking.connection.Connection'.
+"""
+import threading
+import timeit
+import socket
+import select
+import errno
+
+from ..compat import LazyModule
+
+# dnspython is optional, and slow to import, so is imported only when an SRV
+# record is first looked up.
+dns = LazyModule('dns', 'dns.resolver', 'dns.exception')
+
+
+__all__ = ('Resolver', 'default_resolver', 'connect_socket')
+
+
+class Resolver(object):
+    """Resolves server addresses into lists of socket address information,
+    caching the results for 'ttl' seconds. An instance of this class may be
+    safely shared between any number of threads and connections.
+
+    If 'srv' is True, the Minecraft SRV record ('_minecraft._tcp.<address>')
+    of each address is first looked up, and, if it exists, the host and port
+    given by the record are used instead of those given by the caller. This
+    requires the 'dnspython' package: if it is not installed, no SRV lookup
+    is performed.
+    """
+    def __init__(self, ttl=60, srv=False):
+        self.ttl = ttl
+        self.srv = srv
+        self._lock = threading.Lock()
+        self._addresses = {}
+        self._srv_records = {}
+
+    def resolve(self, address, port):
+        """Return a list of 5-tuples of the form returned by
+           'socket.getaddrinfo', giving the possible addresses of the server,
+           in the order in which they should be tried.
+        """
+        if self.srv:
+            address, port = self.lookup_srv(address, port)
+
+        key = address, port
+        addresses = self._cache_get(self._addresses, key)
+        if addresses is None:
+            info = socket.getaddrinfo(address, port, 0, socket.SOCK_STREAM)
+            addresses = _interleave_families(info)
+            self._cache_set(self._addresses, key, addresses)
+        return addresses
+
+    def lookup_srv(self, address, port):
+        """Return the (host, port) pair given by the Minecraft SRV record of
+           'address', or '(address, port)' if there is no such record.
+        """
+        if not dns:
+            return address, port
+        record = self._cache_get(self._srv_records, address)
+        if record is None:
+            try:
+                resolve = getattr(dns.resolver, 'resolve', None) \
+                          or dns.resolver.query
+                answers = resolve('_minecraft._tcp.%s' % address, 'SRV')
+                best = min(answers, key=lambda r: (r.priority, -r.weight))
+                record = str(best.target).rstrip('.'), best.port
+            except dns.exception.DNSException:
+                record = False
+            self._cache_set(self._srv_records, address, record)
+        return record if record else (address, port)
+
+    def clear(self):
+        with self._lock:
+            self._addresses.clear()
+            self._srv_records.clear()
+
+    def _cache_get(self, cache, key):
+        with self._lock:
+            entry = cache.get(key)
+            if entry is None:
+                return None
+            value, expiry_time = entry
+            if timeit.default_timer() >= expiry_time:
+                del cache[key]
+                return None
+            return value
+
+    def _cache_set(self, cache, key, value):
+        with self._lock:
+            cache[key] = value, timeit.default_timer() + self.ttl
+
+
+# The resolver used by connections for which no other resolver is specified.
+default_resolver = Resolver()
+
+
+def _interleave_families(info):
+    # Prefer to use IPv4 (for backward compatibility with previous
+    # versions that always resolved hostnames to IPv4 addresses),
+    # then IPv6, then other address families, but alternate between
+    # families so that a single unreachable family delays the connection
+    # by at most one connection attempt.
+    def key(ai):
+        return 0 if ai[0] == socket.AF_INET else \
+               1 if ai[0] == socket.AF_INET6 else 2
+    families = {}
+    for ai in info:
+        families.setdefault(key(ai), []).append(ai)
+    groups = [families[k] for k in sorted(families)]
+    result = []
+    while groups:
+        for group in groups:
+            result.append(group.pop(0))
+        groups = [group for group in groups if group]
+    return result
+
+
+def connect_socket(addresses, timeout=None, attempt_delay=0.25):
+    """Connect a TCP socket to the first reachable address in 'addresses',
+       which is a list of 5-tuples as returned by 'Resolver.resolve'.
+
+       The addresses are tried in order, but each attempt begins as soon as
+       the previous one fails, or 'attempt_delay' seconds after it began,
+       whichever is sooner, so that several attempts may be in progress at
+       once. The first attempt to succeed is used, and the others are
+       abandoned. If 'timeout' is not None, and no attempt has succeeded
+       after 'timeout' seconds, 'socket.timeout' is raised.
+
+       The returned socket is in blocking mode.
+    """
+    if not addresses:
+        raise socket.error('No addresses to connect to.')
+
+    start_time = timeit.default_timer()
+    pending = list(addresses)
+    attempts = {}  # Maps each socket being connected to its address.
+    next_attempt_time = start_time
+    last_error = None
+    try:
+        while pending or attempts:
+            now = timeit.default_timer()
+            if pending and (now >= next_attempt_time or not attempts):
+                family, type, proto, _canonname, sockaddr = pending.pop(0)
+                try:
+                    sock = socket.socket(family, type, proto)
+                except socket.error as e:
+                    last_error = e
+                    continue
+                sock.setblocking(False)
+                error = sock.connect_ex(sockaddr)
+                if error in (0, errno.EISCONN):
+                    return _connected(sock)
+                elif error in _IN_PROGRESS_ERRORS:
+                    attempts[sock] = sockaddr
+                    next_attempt_time = now + attempt_delay
+                else:
+                    sock.close()
+                    last_error = socket.error(error, 'Connection to %r '
+                                              'failed.' % (sockaddr,))
+                continue
+
+            wait = None
+            if pending:
+                wait = max(0, next_attempt_time - now)
+            if timeout is not None:
+                remaining = max(0, start_time + timeout - now)
+                wait = remaining if wait is None else min(wait, remaining)
+                if remaining == 0:
+                    raise socket.timeout('Connection timed out.')
+
+            for sock in _wait_writable(list(attempts), wait):
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                sockaddr = attempts.pop(sock)
+                if error == 0:
+                    return _connected(sock)
+                sock.close()
+                last_error = socket.error(error, 'Connection to %r '
+                                          'failed.' % (sockaddr,))
+                # Begin the next attempt immediately.
+                next_attempt_time = timeit.default_timer()
+        raise last_error
+    finally:
+        for sock in attempts:
+            sock.close()
+
+
+def _wait_writable(socks, timeout):
+    # Return the set of sockets in 'socks' that are writable or have failed,
+    # after waiting for up to 'timeout' seconds, or indefinitely if None.
+    # Where available, 'poll' is used, as 'select' cannot handle file
+    # descriptors numbered FD_SETSIZE (usually 1024) or higher.
+    if not hasattr(select, 'poll'):
+        _, writable, failed = select.select([], socks, socks, timeout)
+        return set(writable) | set(failed)
+    poller = select.poll()
+    socks_by_fd = {}
+    for sock in socks:
+        socks_by_fd[sock.fileno()] = sock
+        poller.register(sock, select.POLLOUT)
+    events = poller.poll(None if timeout is None else timeout * 1000)
+    return set(socks_by_fd[fd] for fd, _event in events)
+
+
+def _connected(sock):
+    sock.setblocking(True)
+    return sock
+
+
+_IN_PROGRESS_ERRORS = tuple(
+    getattr(errno, name) for name in ('EINPROGRESS', 'EWOULDBLOCK', 'EAGAIN',
+                                      'WSAEWOULDBLOCK')
+    if hasattr(errno, name))
@@ -1,3 +1,5 @@
 from .basic import *    # noqa: F401, F403
 from .enum import *     # noqa: F401, F403
 from .utility import *  # noqa: F401, F403
+from .arrays import *   # noqa: F401, F403
+from .chunk import *    # noqa: F401, F403
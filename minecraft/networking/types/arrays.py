@@ -0,0 +1,152 @@
+"""Types representing arrays of fixed-width elements, which are read and
+   written with a single call to 'struct' (or 'numpy', if requested).
+"""
+import struct
+import sys
+from itertools import chain
+
+
+from .basic import (
+    Type, Boolean, UnsignedByte, Byte, Short, UnsignedShort, Integer, Long,
+    UnsignedLong, Float, Double,
+)
+from ...compat import LazyModule
+
+# numpy is optional, and slow to import, so is imported only when first used.
+numpy = LazyModule('numpy')
+
+
+__all__ = (
+    'FixedWidthArray', 'PrefixedArray', 'FixedArray',
+)
+
+
+# The 'struct' format character of each fixed-width type.
+STRUCT_FORMATS = {
+    Boolean:       '?',
+    UnsignedByte:  'B',
+    Byte:          'b',
+    Short:         'h',
+    UnsignedShort: 'H',
+    Integer:       'i',
+    Long:          'q',
+    UnsignedLong:  'Q',
+    Float:         'f',
+    Double:        'd',
+}
+
+
+class FixedWidthArray(Type):
+    """ The base class of the types created by 'PrefixedArray' and
+        'FixedArray', whose attributes are set by those functions.
+    """
+    __slots__ = ()
+
+    length_type = None   # The type of the length prefix, if any.
+    length = None        # The fixed number of elements, if any.
+    element_types = ()   # The types of the fields of each element.
+    record_type = None   # The type constructed from each element's fields.
+    use_numpy = False    # Whether to read elements into a numpy array.
+    element_format = ''  # The 'struct' format of each element.
+    element_size = 0     # The size of each element, in bytes.
+
+    @classmethod
+    def read(cls, file_object):
+        count = cls.length if cls.length_type is None \
+            else cls.length_type.read(file_object)
+        size = count * cls.element_size
+        data = file_object.read(size)
+        if len(data) < size:
+            raise EOFError("Unexpected end of message.")
+
+        width = len(cls.element_types)
+        if cls.use_numpy and numpy:
+            return cls._numpy_read(data, count, width)
+        values = struct.unpack('>' + cls.element_format * count, data)
+        if width == 1:
+            return list(values)
+        groups = zip(*[iter(values)] * width)
+        if cls.record_type is None:
+            return list(groups)
+        return [cls.record_type(*group) for group in groups]
+
+    @classmethod
+    def _numpy_read(cls, data, count, width):
+        dtypes = ['>' + f for f in cls.element_format]
+        if len(set(dtypes)) == 1:
+            array = numpy.frombuffer(data, dtype=dtypes[0], count=count*width)
+            return array if width == 1 else array.reshape(count, width)
+        return numpy.frombuffer(data, count=count, dtype=numpy.dtype(
+            [('f%d' % i, d) for (i, d) in enumerate(dtypes)]))
+
+    @classmethod
+    def send(cls, value, socket):
+        count = len(value)
+        if cls.length_type is not None:
+            cls.length_type.send(count, socket)
+        elif count != cls.length:
+            raise ValueError('Expected %d elements, but got %d.'
+                             % (cls.length, count))
+
+        # A numpy array can only be given if numpy has already been imported.
+        if 'numpy' in sys.modules and numpy and \
+           isinstance(value, numpy.ndarray):
+            socket.send(cls._numpy_bytes(value))
+            return
+        if len(cls.element_types) > 1:
+            value = chain.from_iterable(value)
+        socket.send(struct.pack('>' + cls.element_format * count, *value))
+
+    @classmethod
+    def _numpy_bytes(cls, value):
+        dtypes = ['>' + f for f in cls.element_format]
+        if value.dtype.names is None:
+            return value.astype(dtypes[0]).tobytes()
+        return value.astype(numpy.dtype(
+            [(n, d) for (n, d) in zip(value.dtype.names, dtypes)])).tobytes()
+
+
+def _array_type(name, element_types, record_type, use_numpy, **attrs):
+    if not isinstance(element_types, (tuple, list)):
+        element_types = (element_types,)
+    try:
+        element_format = ''.join(STRUCT_FORMATS[t] for t in element_types)
+    except KeyError as e:
+        raise TypeError('%r is not a fixed-width type.' % (e.args[0],))
+
+    attrs.update(
+        __slots__=(),
+        element_types=tuple(element_types),
+        record_type=record_type,
+        use_numpy=use_numpy,
+        element_format=element_format,
+        element_size=struct.calcsize('>' + element_format))
+    return type(name, (FixedWidthArray,), attrs)
+
+
+def PrefixedArray(length_type, element_types, record_type=None,
+                  use_numpy=False):
+    """ Return a type representing an array of elements preceded by its
+        length, which is of type 'length_type'.
+
+        Each element consists of fields of the types given by 'element_types',
+        which is either a single type or a sequence of types, each of which
+        must be in 'STRUCT_FORMATS'. If there is one field, the array is read
+        as a list of its values; otherwise, as a list of tuples, or of objects
+        constructed by calling 'record_type' with the values as arguments.
+
+        If 'use_numpy' is True and numpy is installed, the array is instead
+        read as a numpy array, which has an extra dimension (or, if the fields
+        are of differing types, a structured data type) if there are several
+        fields. Either form, or a numpy array, may be written.
+    """
+    return _array_type('PrefixedArray', element_types, record_type,
+                       use_numpy, length_type=length_type)
+
+
+def FixedArray(length, element_types, record_type=None, use_numpy=False):
+    """ Return a type representing an array of exactly 'length' elements, as
+        in 'PrefixedArray', but without any length prefix.
+    """
+    return _array_type('FixedArray', element_types, record_type, use_numpy,
+                       length=length)
@@ -6,15 +6,20 @@ from __future__ import division
 import struct
 import uuid
 
+from ...compat import LazyModule
+
 from .utility import Vector
 
+# numpy is optional, and slow to import, so is imported only when first used.
+numpy = LazyModule('numpy')
+
 
 __all__ = (
     'Type', 'Boolean', 'UnsignedByte', 'Byte', 'Short', 'UnsignedShort',
-    'Integer', 'FixedPointInteger', 'Angle', 'VarInt', 'Long',
+    'Integer', 'FixedPointInteger', 'Angle', 'VarInt', 'VarLong', 'Long',
     'UnsignedLong', 'Float', 'Double', 'ShortPrefixedByteArray',
     'VarIntPrefixedByteArray', 'TrailingByteArray', 'String', 'UUID',
-    'Position',
+    'BinaryUUID', 'Position',
 )
 
 
@@ -108,21 +113,43 @@ class Integer(Type):
         socket.send(struct.pack('>i', value))
 
 
+# Precompiled structs for the types decoded most frequently.
+_INTEGER = struct.Struct('>i')
+_LONG = struct.Struct('>q')
+
+
 class FixedPointInteger(Type):
     @staticmethod
     def read(file_object):
-        return Integer.read(file_object) / 32
+        return _INTEGER.unpack(file_object.read(4))[0] / 32
 
     @staticmethod
     def send(value, socket):
         Integer.send(int(value * 32), socket)
 
 
+# The angle in degrees represented by each byte value of an 'Angle'.
+_ANGLES = tuple(360 * i / 256 for i in range(256))
+
+
 class Angle(Type):
     @staticmethod
     def read(file_object):
         # Linearly transform angle in steps of 1/256 into steps of 1/360
-        return 360 * UnsignedByte.read(file_object) / 256
+        data = file_object.read(1)
+        if len(data) < 1:
+            raise EOFError("Unexpected end of message.")
+        return _ANGLES[ord(data)]
+
+    @staticmethod
+    def decode_many(data):
+        """ Decode the angles in 'data', which is a byte string with one
+            angle in each byte, into a numpy float array if numpy is
+            installed, or otherwise into a list.
+        """
+        if numpy:
+            return numpy.frombuffer(data, dtype=numpy.uint8) * (360 / 256)
+        return [_ANGLES[i] for i in bytearray(data)]
 
     @staticmethod
     def send(value, socket):
@@ -130,46 +157,186 @@ class Angle(Type):
         UnsignedByte.send(round(256 * ((value % 360) / 360)), socket)
 
 
+# The encodings of the integers 0 to 127, which occupy a single byte.
+_SINGLE_BYTES = tuple(struct.pack('B', i) for i in range(0x80))
+
+# Maps each of these single-byte encodings to the integer it encodes.
+_SINGLE_BYTE_VALUES = {byte: value for value, byte in enumerate(_SINGLE_BYTES)}
+
+
+def _read_varint(file_object, max_bytes, byte=None):
+    # Read a value, of which the first byte may already have been read.
+    if byte is None:
+        byte = file_object.read(1)
+    if len(byte) < 1:
+        raise EOFError("Unexpected end of message.")
+    byte = ord(byte)
+    if not byte & 0x80:
+        return byte
+
+    number, shift = byte & 0x7F, 7
+    for _ in range(max_bytes - 1):
+        byte = file_object.read(1)
+        if len(byte) < 1:
+            raise EOFError("Unexpected end of message.")
+        byte = ord(byte)
+        number |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return number
+        shift += 7
+    raise ValueError("Tried to read too long of a VarInt")
+
+
+def _decode_varint(data, offset, max_bytes):
+    number, shift = 0, 0
+    try:
+        for offset in range(offset, offset + max_bytes):
+            byte = data[offset]
+            number |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return number, offset + 1
+            shift += 7
+    except IndexError:
+        raise EOFError("Unexpected end of message.")
+    raise ValueError("Tried to read too long of a VarInt")
+
+
+def _encode_varint(value):
+    if value < 0x80:
+        return _SINGLE_BYTES[value]
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
 class VarInt(Type):
-    @staticmethod
-    def read(file_object):
-        number = 0
+    """ A variable-length integer of up to 32 bits. Values are read as
+        unsigned integers, and negative values are sent in two's complement
+        form.
+
+        Besides the usual 'read' and 'send', the methods 'decode' and
+        'encode_into' operate on bytes in memory, and 'read_many',
+        'write_many' and 'decode_many' operate on several values at once.
+    """
+    max_bytes = 5
+    mask = 0xFFFFFFFF
+
+    @classmethod
+    def read(cls, file_object):
+        # Most values occupy a single byte, so are looked up directly.
+        byte = file_object.read(1)
+        value = _SINGLE_BYTE_VALUES.get(byte)
+        if value is not None:
+            return value
         # Limit of 5 bytes, otherwise its possible to cause
         # a DOS attack by sending VarInts that just keep
         # going
-        bytes_encountered = 0
-        while True:
-            byte = file_object.read(1)
-            if len(byte) < 1:
-                raise EOFError("Unexpected end of message.")
-
-            byte = ord(byte)
-            number |= (byte & 0x7F) << 7 * bytes_encountered
-            if not byte & 0x80:
-                break
+        return _read_varint(file_object, cls.max_bytes, byte)
 
-            bytes_encountered += 1
-            if bytes_encountered > 5:
-                raise ValueError("Tried to read too long of a VarInt")
-        return number
+    @classmethod
+    def send(cls, value, socket):
+        socket.send(cls.encode(value))
 
-    @staticmethod
-    def send(value, socket):
-        out = bytes()
-        while True:
-            byte = value & 0x7F
-            value >>= 7
-            out += struct.pack("B", byte | (0x80 if value > 0 else 0))
-            if value == 0:
-                break
-        socket.send(out)
+    @classmethod
+    def encode(cls, value):
+        """ Return the encoding of 'value' as a byte string. """
+        return _encode_varint(value & cls.mask if value < 0 else value)
+
+    @classmethod
+    def encode_into(cls, value, buffer, offset=None):
+        """ Write the encoding of 'value' into the bytearray 'buffer' at
+            'offset', or by default at its end, overwriting any existing
+            bytes, and return the offset of the end of the encoding.
+        """
+        data = cls.encode(value)
+        if offset is None:
+            offset = len(buffer)
+        end = offset + len(data)
+        buffer[offset:end] = data
+        return end
+
+    @classmethod
+    def decode(cls, data, offset=0):
+        """ Decode a value beginning at 'offset' in 'data', which is a
+            bytearray, or (in Python 3 only) a bytes or memoryview object.
+            Return a tuple of the value and the offset of its end.
+        """
+        return _decode_varint(data, offset, cls.max_bytes)
+
+    @classmethod
+    def read_many(cls, file_object, count):
+        """ Read 'count' consecutive values, returning them in a list. """
+        read, single_byte_values = file_object.read, _SINGLE_BYTE_VALUES
+        values, max_bytes = [], cls.max_bytes
+        for _ in range(count):
+            byte = read(1)
+            value = single_byte_values.get(byte)
+            if value is None:
+                value = _read_varint(file_object, max_bytes, byte)
+            values.append(value)
+        return values
+
+    @classmethod
+    def decode_many(cls, data, count, offset=0):
+        """ Decode 'count' consecutive values beginning at 'offset' in 'data'
+            (see 'decode'). Return a tuple of a list of the values and the
+            offset of the end of the last value.
+        """
+        values, max_bytes, end = [], cls.max_bytes, len(data)
+        for _ in range(count):
+            # Values of a single byte are decoded here, without a call.
+            if offset < end and data[offset] < 0x80:
+                values.append(data[offset])
+                offset += 1
+            else:
+                value, offset = _decode_varint(data, offset, max_bytes)
+                values.append(value)
+        return values, offset
+
+    @classmethod
+    def write_many(cls, values, socket):
+        """ Send the given values consecutively, in a single call. """
+        socket.send(b''.join(map(cls.encode, values)))
+
+    @classmethod
+    def size(cls, value):
+        """ The number of bytes in the encoding of 'value'. """
+        if value < 0:
+            value &= cls.mask
+        elif value > cls.mask:
+            raise ValueError("Integer too large")
+        return (value.bit_length() + 6) // 7 or 1
+
+
+class VarLong(VarInt):
+    """ A variable-length integer of up to 64 bits, which is signed. """
+    max_bytes = 10
+    mask = 0xFFFFFFFFFFFFFFFF
+
+    @classmethod
+    def read(cls, file_object):
+        return cls._signed(_read_varint(file_object, cls.max_bytes))
+
+    @classmethod
+    def decode(cls, data, offset=0):
+        value, offset = _decode_varint(data, offset, cls.max_bytes)
+        return cls._signed(value), offset
+
+    @classmethod
+    def read_many(cls, file_object, count):
+        return [cls.read(file_object) for _ in range(count)]
+
+    @classmethod
+    def decode_many(cls, data, count, offset=0):
+        values, offset = super(VarLong, cls).decode_many(data, count, offset)
+        return [cls._signed(value) for value in values], offset
 
     @staticmethod
-    def size(value):
-        for max_value, size in VARINT_SIZE_TABLE.items():
-            if value < max_value:
-                return size
-        raise ValueError("Integer too large")
+    def _signed(value):
+        return value - (1 << 64) if value >= 1 << 63 else value
 
 
 # Maps (maximum integer value -> size of VarInt in bytes)
@@ -279,14 +446,46 @@ class String(Type):
         socket.send(value)
 
 
+class BinaryUUID(bytes):
+    """ A UUID held as its raw 16 bytes, which is hashed and compared as
+        such, and converted to the usual hexadecimal form only by 'str'.
+    """
+    __slots__ = ()
+
+    @property
+    def int(self):
+        return uuid.UUID(bytes=bytes(self)).int
+
+    def __str__(self):
+        return str(uuid.UUID(bytes=bytes(self)))
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, str(self))
+
+
 class UUID(Type):
+    """ A UUID, which is read as a string, or, if the 'binary_uuids' attribute
+        of the connection's context is True, as a 'BinaryUUID'. Either form,
+        a 'uuid.UUID', or 16 bytes, may be sent.
+    """
     @staticmethod
     def read(file_object):
         return str(uuid.UUID(bytes=file_object.read(16)))
 
+    @classmethod
+    def read_with_context(cls, file_object, context):
+        if getattr(context, 'binary_uuids', False):
+            return BinaryUUID(file_object.read(16))
+        return cls.read(file_object)
+
     @staticmethod
     def send(value, socket):
-        socket.send(uuid.UUID(value).bytes)
+        if isinstance(value, bytes) and len(value) == 16:
+            socket.send(bytes(value))
+        elif isinstance(value, uuid.UUID):
+            socket.send(value.bytes)
+        else:
+            socket.send(uuid.UUID(value).bytes)
 
 
 class Position(Type, Vector):
@@ -295,26 +494,51 @@ class Position(Type, Vector):
 
     @staticmethod
     def read_with_context(file_object, context):
-        location = UnsignedLong.read(file_object)
-        x = int(location >> 38)                # 26 most significant bits
+        data = file_object.read(8)
+        if len(data) < 8:
+            raise EOFError("Unexpected end of message.")
+        return Position(*_unpack_position(
+            _LONG.unpack(data)[0], context.protocol_version >= 443))
 
-        if context.protocol_version >= 443:
-            z = int((location >> 12) & 0x3FFFFFF)  # 26 intermediate bits
-            y = int(location & 0xFFF)              # 12 least signficant bits
+    @classmethod
+    def read_many(cls, file_object, count, context):
+        """ Read 'count' consecutive positions (see 'decode_many'). """
+        size = 8 * count
+        data = file_object.read(size)
+        if len(data) < size:
+            raise EOFError("Unexpected end of message.")
+        return cls.decode_many(data, count, context)[0]
+
+    @staticmethod
+    def decode_many(data, count, context, offset=0):
+        """ Decode 'count' consecutive positions beginning at 'offset' in
+            'data', a byte string. Return a tuple of the positions and the
+            offset of their end. If numpy is installed, the positions are
+            given as an integer array of shape '(count, 3)', whose columns
+            are the x, y and z coordinates; otherwise, as a list of
+            'Position' objects.
+        """
+        end = offset + 8 * count
+        if len(data) < end:
+            raise EOFError("Unexpected end of message.")
+        y_last = context.protocol_version >= 443
+        if not numpy:
+            values = struct.unpack_from('>%dq' % count, data, offset)
+            return [Position(*_unpack_position(v, y_last))
+                    for v in values], end
+
+        values = numpy.frombuffer(data, dtype='>i8', count=count,
+                                  offset=offset).astype(numpy.int64)
+        positions = numpy.empty((count, 3), dtype=numpy.int32)
+        positions[:, 0] = values >> 38
+        if y_last:
+            positions[:, 1] = ((values & 0xFFF) ^ 0x800) - 0x800
+            positions[:, 2] = (((values >> 12) & 0x3FFFFFF)
+                               ^ 0x2000000) - 0x2000000
         else:
-            y = int((location >> 26) & 0xFFF)      # 12 intermediate bits
-            z = int(location & 0x3FFFFFF)          # 26 least significant bits
-
-        if x >= pow(2, 25):
-            x -= pow(2, 26)
-
-        if y >= pow(2, 11):
-            y -= pow(2, 12)
-
-        if z >= pow(2, 25):
-            z -= pow(2, 26)
-
-        return Position(x=x, y=y, z=z)
+            positions[:, 1] = (((values >> 26) & 0xFFF) ^ 0x800) - 0x800
+            positions[:, 2] = ((values & 0x3FFFFFF) ^ 0x2000000) - 0x2000000
+        return positions, end
 
     @staticmethod
     def send_with_context(position, socket, context):
@@ -324,3 +548,17 @@ class Position(Type, Vector):
                  if context.protocol_version >= 443 else
                  (x & 0x3FFFFFF) << 38 | (y & 0xFFF) << 26 | (z & 0x3FFFFFF))
         UnsignedLong.send(value, socket)
+
+
+def _unpack_position(value, y_last):
+    # The (x, y, z) coordinates encoded by the signed 64-bit integer 'value'.
+    # The sign of each field is extended by flipping and then subtracting its
+    # sign bit, which avoids a branch per coordinate. If 'y_last', the
+    # y coordinate occupies the least significant bits (since 1.14).
+    if y_last:
+        return (value >> 38,
+                ((value & 0xFFF) ^ 0x800) - 0x800,
+                ((value >> 12 & 0x3FFFFFF) ^ 0x2000000) - 0x2000000)
+    return (value >> 38,
+            ((value >> 26 & 0xFFF) ^ 0x800) - 0x800,
+            ((value & 0x3FFFFFF) ^ 0x2000000) - 0x2000000)
@@ -0,0 +1,296 @@
+"""Compact in-memory representations of chunks of blocks, as received in
+   'minecraft.networking.packets.clientbound.play.ChunkDataPacket'.
+"""
+import sys
+from array import array
+
+
+__all__ = (
+    'ChunkSection', 'Chunk',
+)
+
+
+# The typecode of an array of 64-bit unsigned integers. Python 2's 'array'
+# module lacks 'Q', but 'L' is equivalent on 64-bit platforms.
+try:
+    array('Q')
+    LONG_TYPECODE = 'Q'
+except ValueError:
+    LONG_TYPECODE = 'L'
+
+# The number of bits in each global block state ID, in Minecraft 1.13 and
+# later. This is the default for sections created without a context.
+DEFAULT_GLOBAL_BITS = 14
+
+# The minimum number of bits per block used with a section-local palette.
+MIN_PALETTE_BITS = 4
+
+# The maximum number of bits per block used with a section-local palette.
+MAX_PALETTE_BITS = 8
+
+# The number of blocks in each section.
+SECTION_VOLUME = 16 * 16 * 16
+
+
+def _longs_from_bytes(data):
+    # Convert big-endian 64-bit integers to an array.
+    longs = array(LONG_TYPECODE)
+    if hasattr(longs, 'frombytes'):
+        longs.frombytes(data)
+    else:
+        longs.fromstring(data)
+    if sys.byteorder == 'little':
+        longs.byteswap()
+    return longs
+
+
+def _longs_to_bytes(longs):
+    if sys.byteorder == 'little':
+        longs = array(LONG_TYPECODE, longs)
+        longs.byteswap()
+    return longs.tobytes() if hasattr(longs, 'tobytes') else longs.tostring()
+
+
+def pack_values(values, bits):
+    """ Pack a sequence of integers of 'bits' bits each into an array of
+        64-bit integers, least significant bits first, as in the chunk format
+        of Minecraft 1.9 to 1.15, where values may span two array elements.
+    """
+    longs = array(LONG_TYPECODE, [0]) * ((len(values) * bits + 63) // 64)
+    mask = (1 << bits) - 1
+    bit = 0
+    for value in values:
+        index, offset = bit >> 6, bit & 63
+        value &= mask
+        longs[index] |= (value << offset) & 0xFFFFFFFFFFFFFFFF
+        if offset + bits > 64:
+            longs[index + 1] |= value >> (64 - offset)
+        bit += bits
+    return longs
+
+
+def unpack_values(longs, bits, count):
+    """ The inverse of 'pack_values', returning a list of 'count' values. """
+    mask = (1 << bits) - 1
+    values = []
+    bit = 0
+    for _ in range(count):
+        index, offset = bit >> 6, bit & 63
+        value = longs[index] >> offset
+        if offset + bits > 64:
+            value |= longs[index + 1] << (64 - offset)
+        values.append(value & mask)
+        bit += bits
+    return values
+
+
+class ChunkSection(object):
+    """ A 16x16x16 section of a chunk, storing each block's state ID as an
+        index into a palette of the distinct state IDs in the section, packed
+        into 'bits_per_block' bits; or, if 'palette' is None, storing the
+        global state ID directly in 'global_bits' bits.
+
+        The packed array of indices, 'data', may be decoded from the network
+        only when first needed, so that sections which are never accessed
+        cost little more than their raw data.
+
+        Blocks are addressed by coordinates 'x', 'y', 'z' relative to the
+        section, each between 0 and 15 inclusive.
+    """
+    __slots__ = ('bits_per_block', 'global_bits', 'block_count',
+                 'block_light', 'sky_light', '_palette', '_data', '_source')
+
+    def __init__(self, bits_per_block=MIN_PALETTE_BITS, palette=(0,),
+                 data=None, global_bits=DEFAULT_GLOBAL_BITS, block_count=None,
+                 block_light=None, sky_light=None):
+        """
+        :param bits_per_block: The number of bits per block in 'data'.
+        :param palette: A sequence of global state IDs, or None.
+        :param data: An array of packed indices, or the raw big-endian bytes
+                     of one, or None for an array of zeros (i.e. filled with
+                     the first palette entry).
+        :param global_bits: The number of bits in a global state ID.
+        :param block_count: The number of non-air blocks, if this is tracked.
+        :param block_light: The raw block light data, if any.
+        :param sky_light: The raw sky light data, if any.
+        """
+        self.bits_per_block = bits_per_block
+        self.global_bits = global_bits
+        self.block_count = block_count
+        self.block_light = block_light
+        self.sky_light = sky_light
+        self._palette = list(palette) if palette is not None else None
+        if data is None:
+            self._data = array(LONG_TYPECODE, [0]) * \
+                (SECTION_VOLUME * bits_per_block // 64)
+            self._source = None
+        elif isinstance(data, array):
+            self._data, self._source = data, None
+        else:
+            self._data, self._source = None, data
+
+    @property
+    def palette(self):
+        return self._palette
+
+    @property
+    def data(self):
+        if self._source is not None:
+            self._data = _longs_from_bytes(self._source)
+            self._source = None
+        return self._data
+
+    @property
+    def is_decoded(self):
+        return self._source is None
+
+    def get(self, x, y, z):
+        """ The global state ID of the block at the given coordinates. """
+        data, bits = self.data, self.bits_per_block
+        bit = ((y << 8) | (z << 4) | x) * bits
+        index, offset = bit >> 6, bit & 63
+        value = data[index] >> offset
+        if offset + bits > 64:
+            value |= data[index + 1] << (64 - offset)
+        value &= (1 << bits) - 1
+        return value if self._palette is None else self._palette[value]
+
+    def set(self, x, y, z, state):
+        """ Set the global state ID of the block at the given coordinates,
+            enlarging the palette or switching to global IDs if necessary.
+        """
+        if self.block_count is not None:
+            previous = self.get(x, y, z)
+            self.block_count += (state != 0) - (previous != 0)
+
+        palette = self._palette
+        if palette is None:
+            value = state
+        else:
+            try:
+                value = palette.index(state)
+            except ValueError:
+                value = len(palette)
+                palette.append(state)
+                if value >= 1 << self.bits_per_block:
+                    self._resize(value.bit_length())
+                    if self._palette is None:
+                        value = state
+
+        data, bits = self.data, self.bits_per_block
+        mask = (1 << bits) - 1
+        bit = ((y << 8) | (z << 4) | x) * bits
+        index, offset = bit >> 6, bit & 63
+        data[index] = data[index] & ~(mask << offset) & 0xFFFFFFFFFFFFFFFF \
+            | (value << offset) & 0xFFFFFFFFFFFFFFFF
+        if offset + bits > 64:
+            shift = 64 - offset
+            data[index + 1] = data[index + 1] & ~(mask >> shift) \
+                | value >> shift
+
+    def _resize(self, bits):
+        # Re-pack the data with more bits per block, where the palette has
+        # already been extended with the new entry.
+        values = unpack_values(self.data, self.bits_per_block, SECTION_VOLUME)
+        if bits > MAX_PALETTE_BITS:
+            palette = self._palette
+            values = [palette[v] for v in values]
+            self._palette = None
+            bits = self.global_bits
+        self.bits_per_block = bits
+        self._data = pack_values(values, bits)
+
+    def states(self):
+        """ A list of the global state IDs of all blocks in the section, in
+            order of increasing 'x', then 'z', then 'y' coordinates.
+        """
+        values = unpack_values(self.data, self.bits_per_block, SECTION_VOLUME)
+        palette = self._palette
+        return values if palette is None else [palette[v] for v in values]
+
+    @classmethod
+    def from_states(cls, states, global_bits=DEFAULT_GLOBAL_BITS, **kwds):
+        """ Create a section from a sequence of 4096 global state IDs, in the
+            order given by 'states', using the most compact representation.
+        """
+        palette = []
+        indices = {}
+        values = []
+        for state in states:
+            value = indices.get(state)
+            if value is None:
+                value = indices[state] = len(palette)
+                palette.append(state)
+            values.append(value)
+        bits = max(MIN_PALETTE_BITS, (len(palette) - 1).bit_length())
+        if bits > MAX_PALETTE_BITS:
+            palette, values, bits = None, list(states), global_bits
+        return cls(bits_per_block=bits, palette=palette,
+                   data=pack_values(values, bits), global_bits=global_bits,
+                   **kwds)
+
+    def data_bytes(self):
+        """ The packed data, as big-endian bytes. """
+        if self._source is not None:
+            return self._source
+        return _longs_to_bytes(self._data)
+
+    def __repr__(self):
+        return '%s(bits_per_block=%r, palette=%r)' % (
+            type(self).__name__, self.bits_per_block, self._palette)
+
+
+class Chunk(object):
+    """ A 16x256x16 column of blocks, consisting of up to 16 'ChunkSection's
+        stacked vertically. Missing sections are filled with air.
+
+        Blocks are addressed by absolute coordinates, of which only the 4
+        least significant bits of 'x' and 'z' are significant.
+    """
+    __slots__ = 'x', 'z', 'sections', 'biomes', 'global_bits'
+
+    def __init__(self, x, z, sections=None, biomes=None,
+                 global_bits=DEFAULT_GLOBAL_BITS):
+        self.x = x
+        self.z = z
+        self.sections = list(sections) if sections is not None \
+            else [None] * 16
+        self.biomes = biomes
+        self.global_bits = global_bits
+
+    def get_block_state(self, x, y, z):
+        """ The global state ID of the block at the given coordinates, or 0
+            (air) if it lies in a missing section or outside the chunk.
+        """
+        if not 0 <= y < 256:
+            return 0
+        section = self.sections[y >> 4]
+        if section is None:
+            return 0
+        return section.get(x & 15, y & 15, z & 15)
+
+    def set_block_state(self, x, y, z, state):
+        """ Set the global state ID of the block at the given coordinates. """
+        if not 0 <= y < 256:
+            return
+        section = self.sections[y >> 4]
+        if section is None:
+            if state == 0:
+                return
+            section = self.sections[y >> 4] = ChunkSection(
+                global_bits=self.global_bits, block_count=0)
+        section.set(x & 15, y & 15, z & 15, state)
+
+    def update(self, sections, biomes=None, full=True):
+        """ Replace the sections of this chunk that are not None in the list
+            'sections', or, if 'full' is True, replace all sections and the
+            biome data.
+        """
+        for index, section in enumerate(sections):
+            if full or section is not None:
+                self.sections[index] = section
+        if full:
+            self.biomes = biomes
+
+    def __repr__(self):
+        return '%s(x=%r, z=%r)' % (type(self).__name__, self.x, self.z)
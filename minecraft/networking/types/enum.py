@@ -7,36 +7,87 @@
    instantiatable class may subclass Enum to provide class enum attributes in
    addition to other functionality.
 """
-from .utility import Vector
+from ...compat import with_metaclass
+
+from .utility import Vector, CachingType
 
 
 __all__ = (
-    'Enum', 'BitFieldEnum', 'AbsoluteHand', 'RelativeHand', 'BlockFace',
-    'Difficulty', 'Dimension', 'GameMode', 'OriginPoint'
+    'Enum', 'BitFieldEnum', 'VersionedEnum', 'AbsoluteHand', 'RelativeHand',
+    'BlockFace', 'Difficulty', 'Dimension', 'GameMode', 'OriginPoint'
 )
 
 
-class Enum(object):
+class Enum(with_metaclass(CachingType, object)):
     # Return a human-readable string representation of an enum value.
     @classmethod
     def name_from_value(cls, value):
+        names = cls._names_by_value()
+        if names is not None:
+            try:
+                return names.get(value)
+            except TypeError:
+                pass
         for name, name_value in cls.__dict__.items():
             if name.isupper() and name_value == value:
                 return name
 
+    # A dict mapping each value to the first name having that value, or None
+    # if some value is not hashable.
+    @classmethod
+    def _names_by_value(cls):
+        cache = cls.class_cache()
+        if 'names_by_value' not in cache:
+            names = {}
+            try:
+                for name, name_value in cls.__dict__.items():
+                    if name.isupper() and name_value not in names:
+                        names[name_value] = name
+            except TypeError:
+                names = None
+            cache['names_by_value'] = names
+        return cache['names_by_value']
+
+
+# The maximum number of distinct values whose names are remembered by each
+# 'BitFieldEnum', so that the cache cannot grow without bound.
+MAX_CACHED_NAMES = 1024
+
 
 class BitFieldEnum(Enum):
     @classmethod
     def name_from_value(cls, value):
         if not isinstance(value, int):
             return
+        cache = cls.class_cache()
+        names = cache.get('names')
+        if names is None:
+            names = cache['names'] = {}
+        elif value in names:
+            return names[value]
+        name = cls._name_from_value(value, cls._members(cache))
+        if len(names) < MAX_CACHED_NAMES:
+            names[value] = name
+        return name
+
+    # The (name, value) pairs of all integer members, largest value first.
+    @classmethod
+    def _members(cls, cache):
+        members = cache.get('members')
+        if members is None:
+            members = cache['members'] = sorted(
+                [(n, v) for (n, v) in cls.__dict__.items()
+                 if isinstance(v, int) and n.isupper()],
+                reverse=True, key=lambda p: p[1])
+        return members
+
+    @staticmethod
+    def _name_from_value(value, members):
         ret_names = []
         ret_value = 0
-        for cls_name, cls_value in sorted(
-            [(n, v) for (n, v) in cls.__dict__.items()
-             if isinstance(v, int) and n.isupper() and v | value == value],
-            reverse=True, key=lambda p: p[1]
-        ):
+        for cls_name, cls_value in members:
+            if cls_value | value != value:
+                continue
             if ret_value | cls_value != ret_value or cls_value == value:
                 ret_names.append(cls_name)
                 ret_value |= cls_value
@@ -44,6 +95,45 @@ class BitFieldEnum(Enum):
             return '|'.join(reversed(ret_names)) if ret_names else '0'
 
 
+class VersionedEnum(object):
+    """A family of 'Enum' classes, one for each protocol version, used when
+       the members of an enum differ between protocol versions, such as in
+       registries of blocks, items or entities.
+
+       A subclass overrides 'get_members', which returns a dict mapping the
+       name of each member to its value in a given protocol version. Then,
+       'for_version' returns the corresponding 'Enum' subclass, which is
+       created only once for each distinct set of members, and whose
+       value-to-name lookup table is built in advance.
+    """
+    # The base class of the 'Enum' classes created by 'for_version'.
+    enum_base = Enum
+
+    @classmethod
+    def get_members(cls, protocol_version):
+        raise NotImplementedError(
+            'This abstract method must be overridden in a subclass.')
+
+    @classmethod
+    def for_version(cls, protocol_version):
+        versions = cls.__dict__.get('_versions')
+        if versions is None:
+            versions = cls._versions = {}
+            cls._enums = {}
+        enum_class = versions.get(protocol_version)
+        if enum_class is None:
+            members = cls.get_members(protocol_version)
+            key = frozenset(members.items())
+            enum_class = cls._enums.get(key)
+            if enum_class is None:
+                enum_class = type(cls.__name__, (cls.enum_base,), members)
+                enum_class.__module__ = cls.__module__
+                enum_class._names_by_value()
+                cls._enums[key] = enum_class
+            versions[protocol_version] = enum_class
+        return enum_class
+
+
 # Designation of one of a player's hands, in absolute terms.
 class AbsoluteHand(Enum):
     LEFT = 0
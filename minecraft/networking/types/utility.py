@@ -5,11 +5,14 @@ from __future__ import division
 
 from collections import namedtuple
 from itertools import chain
+from operator import attrgetter
+
+from ...compat import with_metaclass
 
 
 __all__ = (
     'Vector', 'MutableRecord', 'Direction', 'PositionAndLook', 'descriptor',
-    'attribute_alias', 'multi_attribute_alias',
+    'attribute_alias', 'multi_attribute_alias', 'CachingType',
 )
 
 
@@ -52,7 +55,29 @@ class Vector(namedtuple('BaseVector', ('x', 'y', 'z'))):
         return '%s(%r, %r, %r)' % (type(self).__name__, self.x, self.y, self.z)
 
 
-class MutableRecord(object):
+class RecordType(type):
+    """The metaclass of 'MutableRecord', which computes the names of the slots
+       of each class, and a function giving the values of these slots as a
+       tuple, when the class is created.
+    """
+    def __init__(cls, name, bases, namespace):
+        super(RecordType, cls).__init__(name, bases, namespace)
+        names = []
+        for supcls in reversed(cls.__mro__):
+            slots = supcls.__dict__.get('__slots__', ())
+            slots = (slots,) if isinstance(slots, str) else slots
+            names.extend(slots)
+        cls._slot_names = tuple(names)
+        if len(names) > 1:
+            cls._slot_values = staticmethod(attrgetter(*names))
+        elif names:
+            cls._slot_values = staticmethod(
+                lambda self, name=names[0]: (getattr(self, name),))
+        else:
+            cls._slot_values = staticmethod(lambda self: ())
+
+
+class MutableRecord(with_metaclass(RecordType, object)):
     """An abstract base class providing namedtuple-like repr(), ==, hash(), and
        iter(), implementations for types containing mutable fields given by
        __slots__.
@@ -65,30 +90,29 @@ class MutableRecord(object):
 
     def __repr__(self):
         return '%s(%s)' % (type(self).__name__, ', '.join(
-            '%s=%r' % (a, getattr(self, a)) for a in self._all_slots()
+            '%s=%r' % (a, getattr(self, a)) for a in self._slot_names
             if hasattr(self, a)))
 
     def __eq__(self, other):
-        return type(self) is type(other) and all(
-            getattr(self, a) == getattr(other, a) for a in self._all_slots())
+        return type(self) is type(other) and \
+            self._slot_values(self) == other._slot_values(other)
 
     def __ne__(self, other):
         return not (self == other)
 
     def __hash__(self):
-        values = tuple(getattr(self, a, None) for a in self._all_slots())
+        try:
+            values = self._slot_values(self)
+        except AttributeError:
+            values = tuple(getattr(self, a, None) for a in self._slot_names)
         return hash((type(self), values))
 
     def __iter__(self):
-        return iter(getattr(self, a) for a in self._all_slots())
+        return iter(self._slot_values(self))
 
     @classmethod
     def _all_slots(cls):
-        for supcls in reversed(cls.__mro__):
-            slots = supcls.__dict__.get('__slots__', ())
-            slots = (slots,) if isinstance(slots, str) else slots
-            for slot in slots:
-                yield slot
+        return iter(cls._slot_names)
 
 
 def attribute_alias(name):
@@ -144,6 +168,41 @@ def multi_attribute_alias(container, *arg_names, **kwd_names):
     return alias
 
 
+class CachingType(type):
+    """A metaclass providing each class with a private dict, returned by
+       'class_cache', in which values derived from the attributes of the
+       class may be kept, such as reverse lookup tables.
+
+       A class's dict is emptied whenever an attribute of that class, or of
+       any of its base classes, is set or deleted, so that the cached values
+       never become stale. The caches of unrelated classes are unaffected.
+    """
+    def __setattr__(cls, name, value):
+        super(CachingType, cls).__setattr__(name, value)
+        cls._clear_class_caches()
+
+    def __delattr__(cls, name):
+        super(CachingType, cls).__delattr__(name)
+        cls._clear_class_caches()
+
+    def class_cache(cls):
+        cache = cls.__dict__.get('_class_cache')
+        if cache is None:
+            cache = {}
+            type.__setattr__(cls, '_class_cache', cache)
+        return cache
+
+    def _clear_class_caches(cls):
+        # Discard the caches of this class and of its subclasses, whose
+        # cached values may depend on the attributes of this class.
+        pending = [cls]
+        while pending:
+            subclass = pending.pop()
+            if '_class_cache' in subclass.__dict__:
+                type.__delattr__(subclass, '_class_cache')
+            pending.extend(type.__subclasses__(subclass))
+
+
 class descriptor(object):
     """Behaves identically to the builtin 'property' function of Python,
        except that the getter, setter and deleter functions given by the
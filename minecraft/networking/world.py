@@ -0,0 +1,171 @@
+"""
+Contains 'World', which maintains the blocks of the chunks loaded by a
+'Connection', for fast lookup of the block at any position.
+"""
+import threading
+from collections import OrderedDict
+
+from .packets import clientbound
+
+
+__all__ = ('World', 'chunk_key')
+
+
+def chunk_key(chunk_x, chunk_z):
+    """ The integer key of the chunk at the given chunk coordinates, in which
+        each coordinate occupies 32 bits. Integers are hashed and compared
+        faster than tuples.
+    """
+    return (chunk_x & 0xFFFFFFFF) << 32 | chunk_z & 0xFFFFFFFF
+
+
+class World(object):
+    """ The blocks of the chunks currently loaded by a client, as given by
+        'ChunkDataPacket', 'UnloadChunkPacket', 'BlockChangePacket' and
+        'MultiBlockChangePacket', which are applied by 'register'.
+
+        Each block is represented by its global block state ID. The block data
+        of each 'ChunkSection' is decoded when it is first accessed, and then
+        kept, so that repeated lookups in the same section are cheap.
+
+        Before Minecraft 1.9 (protocol 107), there is no 'UnloadChunkPacket',
+        and a 'ChunkDataPacket' of a full chunk with no sections unloads the
+        chunk instead. Most chunks were then sent in 'MapChunkBulk' packets,
+        which are not supported, so the world is only complete for protocol
+        107 and later.
+
+        If 'max_chunks' is not None, at most that many chunks are kept: when a
+        chunk is loaded beyond this limit, the least recently used chunk is
+        discarded, so that memory use remains bounded even if the server does
+        not unload chunks as the client moves.
+    """
+    def __init__(self, max_chunks=None):
+        """
+        :param max_chunks: The maximum number of chunks to keep, or None.
+        """
+        self.max_chunks = max_chunks
+        self.evicted = 0   # The number of chunks discarded due to the limit.
+
+        # Maps 'chunk_key(x, z)' to each 'Chunk', least recently used first.
+        self._chunks = OrderedDict()
+        self._lock = threading.Lock()
+
+        # The most recently accessed chunk, which need not be looked up again.
+        self._last_chunk = None
+
+    def register(self, connection):
+        """ Keep this world updated from the packets received by
+            'connection'. The world is cleared when the client joins the game
+            or changes dimension.
+        """
+        play = clientbound.play
+        connection.register_packet_listener(
+            self.load_chunk, play.ChunkDataPacket)
+        connection.register_packet_listener(
+            self.unload_chunk, play.UnloadChunkPacket)
+        connection.register_packet_listener(
+            self.apply, play.BlockChangePacket, play.MultiBlockChangePacket)
+        connection.register_packet_listener(
+            lambda packet: self.clear(),
+            play.JoinGamePacket, play.RespawnPacket)
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def __contains__(self, chunk_pos):
+        return chunk_key(*chunk_pos) in self._chunks
+
+    def get_chunk(self, chunk_x, chunk_z):
+        """ The 'Chunk' at the given chunk coordinates, or None if it is not
+            loaded.
+        """
+        chunk = self._last_chunk
+        if chunk is not None and chunk.x == chunk_x and chunk.z == chunk_z:
+            return chunk
+        key = chunk_key(chunk_x, chunk_z)
+        with self._lock:
+            chunk = self._chunks.get(key)
+            if chunk is not None:
+                self._touch(key)
+                self._last_chunk = chunk
+        return chunk
+
+    def get_block(self, x, y, z):
+        """ The global block state ID of the block at the given absolute
+            coordinates, or None if its chunk is not loaded. A 'Position' or
+            'Vector' 'pos' may be given as 'get_block(*pos)'.
+        """
+        chunk = self._last_chunk
+        if chunk is None or chunk.x != x >> 4 or chunk.z != z >> 4:
+            chunk = self.get_chunk(x >> 4, z >> 4)
+            if chunk is None:
+                return None
+        return chunk.get_block_state(x, y, z)
+
+    def set_block(self, x, y, z, state):
+        """ Set the global block state ID of the block at the given absolute
+            coordinates, if its chunk is loaded.
+        """
+        chunk = self.get_chunk(x >> 4, z >> 4)
+        if chunk is not None:
+            chunk.set_block_state(x, y, z, state)
+
+    # Allow block change packets to be applied directly to the world.
+    set_block_state = set_block
+
+    def load_chunk(self, packet):
+        """ Apply a 'ChunkDataPacket'. """
+        if packet.full_chunk and not packet.primary_bit_mask and \
+           packet.context.protocol_version < 107:
+            self.unload_chunk(packet)
+            return
+        key = chunk_key(packet.chunk_x, packet.chunk_z)
+        with self._lock:
+            chunk = self._chunks.get(key)
+            if chunk is None or packet.full_chunk:
+                self._invalidate(key)
+                self._chunks[key] = packet.chunk()
+                self._evict()
+            else:
+                packet.apply(chunk)
+                self._touch(key)
+
+    def unload_chunk(self, packet):
+        """ Apply an 'UnloadChunkPacket', or a 'ChunkDataPacket' which
+            unloads a chunk.
+        """
+        key = chunk_key(packet.chunk_x, packet.chunk_z)
+        with self._lock:
+            self._invalidate(key)
+            self._chunks.pop(key, None)
+
+    def apply(self, packet):
+        """ Apply a 'BlockChangePacket' or 'MultiBlockChangePacket'. """
+        packet.apply(self)
+
+    def clear(self):
+        """ Discard all chunks. """
+        with self._lock:
+            self._last_chunk = None
+            self._chunks.clear()
+
+    def _touch(self, key):
+        # Mark the chunk with the given key as the most recently used.
+        if hasattr(self._chunks, 'move_to_end'):
+            self._chunks.move_to_end(key)
+        else:
+            self._chunks[key] = self._chunks.pop(key)
+
+    def _invalidate(self, key):
+        # Forget the most recently accessed chunk if it has the given key.
+        chunk = self._last_chunk
+        if chunk is not None and chunk_key(chunk.x, chunk.z) == key:
+            self._last_chunk = None
+
+    def _evict(self):
+        if self.max_chunks is None:
+            return
+        while len(self._chunks) > self.max_chunks:
+            key, _ = self._chunks.popitem(last=False)
+            self._invalidate(key)
+            self.evicted += 1
@@ -81,6 +81,16 @@ class LegacyPacketNamesTest(unittest.TestCase):
         self.assertEqual(packets.state_playing_serverbound,
                          serverbound.play.get_packets)
 
+    def test_all_legacy_packets(self):
+        self.assertEqual(len(packets.__all_legacy_packets__),
+                         len(packets.__all_legacy_packet_names__))
+        for name, packet in zip(packets.__all_legacy_packet_names__,
+                                packets.__all_legacy_packets__):
+            self.assertIs(packet, getattr(packets, name))
+        self.assertIn(serverbound.play.ChatPacket,
+                      packets.__all_legacy_packets__)
+        self.assertIn(packets.KeepAlivePacket, packets.__all_legacy_packets__)
+
 
 class ClassMemberAliasesTest(unittest.TestCase):
     def test_alias_values(self):
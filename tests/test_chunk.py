@@ -0,0 +1,129 @@
+import unittest
+import logging
+
+from minecraft.networking.connection import ConnectionContext
+from minecraft.networking.types import (
+    VarInt, ChunkSection, Chunk, Position,
+)
+from minecraft.networking.types.chunk import pack_values, unpack_values
+from minecraft.networking.packets import PacketBuffer, clientbound
+
+from tests.test_packets import TEST_VERSIONS
+
+
+class ChunkSectionTest(unittest.TestCase):
+    def test_pack_values(self):
+        for bits in (4, 5, 13, 14):
+            values = [(i * 7919) % (1 << bits) for i in range(4096)]
+            longs = pack_values(values, bits)
+            self.assertEqual(len(longs), 4096 * bits // 64)
+            self.assertEqual(unpack_values(longs, bits, 4096), values)
+
+    def test_set_and_get(self):
+        section = ChunkSection(block_count=0)
+        self.assertEqual(section.get(3, 4, 5), 0)
+
+        # Enough distinct states to grow the palette beyond 4 bits...
+        for i in range(1, 40):
+            section.set(i & 15, i >> 8, i >> 4 & 15, 100 + i)
+        self.assertEqual(section.bits_per_block, 6)
+        self.assertEqual(section.block_count, 39)
+
+        # ...and then beyond the maximum palette size.
+        for i in range(40, 300):
+            section.set(i & 15, i >> 8, i >> 4 & 15, 100 + i)
+        self.assertIsNone(section.palette)
+        self.assertEqual(section.bits_per_block, 14)
+
+        for i in range(1, 300):
+            self.assertEqual(section.get(i & 15, i >> 8, i >> 4 & 15), 100 + i)
+        self.assertEqual(section.get(0, 0, 0), 0)
+
+        section.set(1, 0, 0, 0)
+        self.assertEqual(section.get(1, 0, 0), 0)
+        self.assertEqual(section.block_count, 298)
+
+    def test_lazy_decoding(self):
+        states = [i % 3 for i in range(4096)]
+        packed = ChunkSection.from_states(states).data_bytes()
+        section = ChunkSection(palette=[0, 1, 2], data=packed)
+        self.assertFalse(section.is_decoded)
+        self.assertEqual(section.data_bytes(), packed)
+        self.assertEqual(section.states(), states)
+        self.assertTrue(section.is_decoded)
+
+
+class ChunkDataPacketTest(unittest.TestCase):
+    def make_packet(self, context, full_chunk, sky_light):
+        global_bits = clientbound.play.ChunkDataPacket.global_bits(context)
+        light = b'\x42' * 2048 if context.protocol_version < 443 else None
+        sections = [None] * 16
+        sections[0] = ChunkSection.from_states(
+            [i % 5 for i in range(4096)], global_bits=global_bits,
+            block_count=3276, block_light=light,
+            sky_light=light if sky_light else None)
+        sections[3] = ChunkSection.from_states(
+            range(4096), global_bits=global_bits, block_count=4095,
+            block_light=light, sky_light=light if sky_light else None)
+
+        packet = clientbound.play.ChunkDataPacket(
+            context, chunk_x=-3, chunk_z=12, full_chunk=full_chunk,
+            primary_bit_mask=0b1001, sections=sections)
+        if full_chunk:
+            packet.biomes = b'\x01' * packet.biomes_size()
+        return packet
+
+    def test_read_write(self):
+        for protocol_version in TEST_VERSIONS:
+            logging.debug('protocol_version = %r' % protocol_version)
+            context = ConnectionContext(protocol_version=protocol_version)
+            for full_chunk, sky_light in (True, True), (False, False):
+                packet_in = self.make_packet(context, full_chunk, sky_light)
+                packet_buffer = PacketBuffer()
+                packet_in.write(packet_buffer)
+                packet_buffer.reset_cursor()
+
+                packet_out = self.read_packet(packet_buffer, context)
+                self.assertEqual((packet_out.chunk_x, packet_out.chunk_z),
+                                 (-3, 12))
+                self.assertEqual(packet_out.full_chunk, full_chunk)
+                self.assertEqual(packet_out.biomes, packet_in.biomes)
+                for index in range(16):
+                    section_in = packet_in.sections[index]
+                    section_out = packet_out.sections[index]
+                    if section_in is None:
+                        self.assertIsNone(section_out)
+                        continue
+                    self.assertEqual(section_out.states(),
+                                     section_in.states())
+                    self.assertEqual(section_out.sky_light,
+                                     section_in.sky_light)
+
+                chunk = packet_out.chunk()
+                self.assertEqual(chunk.get_block_state(-46, 2, 195), 2)
+                self.assertEqual(chunk.get_block_state(5, 48, 0), 5)
+                self.assertEqual(chunk.get_block_state(5, 20, 0), 0)
+
+    def read_packet(self, packet_buffer, context):
+        VarInt.read(packet_buffer)
+        packet_id = VarInt.read(packet_buffer)
+        packet = clientbound.play.ChunkDataPacket(context)
+        self.assertEqual(packet_id, packet.id)
+        packet.read(packet_buffer)
+        return packet
+
+    def test_block_change(self):
+        chunk = Chunk(-1, 2)
+        clientbound.play.BlockChangePacket(
+            location=Position(-5, 70, 33), block_state_id=9).apply(chunk)
+        self.assertEqual(chunk.get_block_state(-5, 70, 33), 9)
+        self.assertEqual(chunk.sections[4].block_count, 1)
+
+        Record = clientbound.play.MultiBlockChangePacket.Record
+        clientbound.play.MultiBlockChangePacket(
+            chunk_x=-1, chunk_z=2, records=[
+                Record(x=11, y=70, z=1, block_state_id=0),
+                Record(x=0, y=255, z=15, block_state_id=33)]).apply(chunk)
+        self.assertEqual(chunk.get_block_state(-5, 70, 33), 0)
+        self.assertEqual(chunk.get_block_state(-16, 255, 47), 33)
+        self.assertEqual(chunk.sections[4].block_count, 0)
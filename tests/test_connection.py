@@ -1,17 +1,35 @@
 from minecraft import SUPPORTED_MINECRAFT_VERSIONS
 from minecraft import SUPPORTED_PROTOCOL_VERSIONS
+from minecraft.networking import packets
 from minecraft.networking.packets import clientbound, serverbound
-from minecraft.networking.connection import Connection
+from minecraft.networking.connection import (
+    Connection, ConnectionContext, ProtocolVersionCache, PacketReactor,
+    PlayingReactor, StatusReactor, PlayingStatusReactor, warm_packet_tables,
+    LIGHTWEIGHT_STACK_SIZE,
+)
+from minecraft.networking import connection, encryption
+from minecraft.networking.outgoing import OutgoingPacketQueue
 from minecraft.exceptions import (
     VersionMismatch, LoginDisconnect, InvalidState, IgnorePacket
 )
-from minecraft.compat import unicode
+from minecraft.compat import unicode, LazyModule
 
 from . import fake_server
 
+import unittest
+import subprocess
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+import json
 import sys
 import re
 import io
+import socket
+import select
+import struct
+import threading
 
 
 class ConnectTest(fake_server._FakeServerTest):
@@ -32,6 +50,61 @@ class ConnectTest(fake_server._FakeServerTest):
                 raise fake_server.FakeServerDisconnect
 
 
+class SerializeInCallerTest(ConnectTest):
+    compression_threshold = 0
+
+    def connection_type(self, *args, **kwds):
+        return Connection(*args, serialize_in_caller=True, **kwds)
+
+    def _start_client(self, client):
+        # Early outgoing packet listeners prevent early serialisation.
+        client.early_outgoing_packet_listeners = []
+
+        @client.listener(serverbound.play.KeepAlivePacket, outgoing=True)
+        def handle_outgoing_keep_alive(packet):
+            assert getattr(packet, '_serialized', None) is None
+        super(SerializeInCallerTest, self)._start_client(client)
+
+    def test_serialized_when_queued(self):
+        for serialize_in_caller in True, False:
+            client = Connection('localhost', username='TestUser',
+                                serialize_in_caller=serialize_in_caller)
+            client._outgoing_packet_queue = OutgoingPacketQueue()
+            packet = serverbound.play.ChatPacket(message='original')
+            client.write_packet(packet)
+
+            # The packet is serialised by the time 'write_packet' returns,
+            # before it is removed from the queue, and so later changes to
+            # its fields are not written.
+            self.assertEqual(getattr(packet, '_serialized', None) is not None,
+                             serialize_in_caller)
+            packet.message = 'changed'
+            written = packets.PacketBuffer()
+            client._outgoing_packet_queue.pop().write(written)
+
+            expected = packets.PacketBuffer()
+            serverbound.play.ChatPacket(
+                context=client.context,
+                message='original' if serialize_in_caller else 'changed',
+            ).write(expected)
+            self.assertEqual(written.get_writable(), expected.get_writable())
+
+
+class LightweightConnectTest(ConnectTest):
+    def connection_type(self, *args, **kwds):
+        return Connection(*args, lightweight=True, **kwds)
+
+    def _start_client(self, client):
+        assert client.player_list is None
+        assert client.options.thread_stack_size == LIGHTWEIGHT_STACK_SIZE
+        super(LightweightConnectTest, self)._start_client(client)
+
+
+class UnpipelinedConnectTest(ConnectTest):
+    def connection_type(self, *args, **kwds):
+        return Connection(*args, pipeline_setup=False, **kwds)
+
+
 class ReconnectTest(ConnectTest):
     phase = 0
 
@@ -80,6 +153,17 @@ class PingTest(ConnectTest):
         client.status(handle_status=False, handle_ping=handle_ping)
 
 
+class PipelinedPingTest(ConnectTest):
+    def _start_client(self, client):
+        statuses = []
+
+        def handle_ping(latency_ms):
+            assert statuses and 0 <= latency_ms < 60000
+            raise fake_server.FakeServerTestSuccess
+        client.status(handle_status=statuses.append, handle_ping=handle_ping,
+                      pipeline_ping=True)
+
+
 class StatusTest(ConnectTest):
     def _start_client(self, client):
         def handle_status(status_dict):
@@ -142,6 +226,120 @@ class AllowedVersionsTest(fake_server._FakeServerTest):
                 server_version=version, client_versions=client_versions)
 
 
+class ProtocolVersionCacheTest(fake_server._FakeServerTest):
+    lowest_version = min(SUPPORTED_PROTOCOL_VERSIONS)
+    highest_version = max(SUPPORTED_PROTOCOL_VERSIONS)
+
+    def test_cache_expiry(self):
+        cache = ProtocolVersionCache(ttl=0)
+        cache.set('localhost', 25565, self.highest_version)
+        self.assertIsNone(cache.get('localhost', 25565))
+
+        cache = ProtocolVersionCache(ttl=300)
+        cache.set('localhost', 25565, self.highest_version)
+        self.assertEqual(cache.get('localhost', 25565), self.highest_version)
+        self.assertIsNone(cache.get('localhost', 25566))
+        cache.discard('localhost', 25565)
+        self.assertIsNone(cache.get('localhost', 25565))
+
+    def test_cache_populated(self):
+        cache = ProtocolVersionCache()
+        self._test_cached_connect(cache, expect_status=True)
+        port = self.status_requests[0]
+        self.assertEqual(cache.get('localhost', port), self.highest_version)
+
+    def test_cache_hit(self):
+        self._test_cached_connect(self.highest_version, expect_status=False)
+
+    def test_cache_stale(self):
+        self._test_cached_connect(self.lowest_version, expect_status=True)
+
+    def test_cache_refreshed(self):
+        self._test_cached_connect(self.highest_version, expect_status=False)
+        (entry,) = self.cache._versions.values()
+        self.assertGreater(entry[1], self.stored_expiry)
+
+    def test_cache_login_failure(self):
+        class ClientHandler(ConnectTest.client_handler_type):
+            def handle_login(self, login_start_packet):
+                raise fake_server.FakeServerDisconnect('Server is restarting.')
+
+        with self.assertRaisesRegexp(LoginDisconnect, 'restarting'):
+            self._test_cached_connect(
+                self.highest_version, expect_status=False,
+                client_handler_type=ClientHandler)
+        self.assertEqual(self.cache._versions, {})
+
+    def test_cache_handshake_failure(self):
+        connected = threading.Event()
+
+        class ClientHandler(ConnectTest.client_handler_type):
+            def run(self):
+                # Reset the connection once the client has connected, but
+                # before its handshake is written.
+                connected.wait(fake_server.THREAD_TIMEOUT_S)
+                self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER,
+                                       struct.pack('ii', 1, 0))
+                self.socket.close()
+                self.socket_file.close()
+
+        def setup_connection(connection):
+            def handle_handshake(packet):
+                # Wait for the reset, so that writing the handshake fails.
+                connected.set()
+                select.select([connection.socket], [], [],
+                              fake_server.THREAD_TIMEOUT_S)
+            connection.register_packet_listener(
+                handle_handshake, serverbound.handshake.HandShakePacket,
+                outgoing=True, early=True)
+
+        with self.assertRaises(IOError):
+            self._test_cached_connect(
+                self.highest_version, expect_status=False,
+                client_handler_type=ClientHandler,
+                setup_connection=setup_connection)
+        self.assertEqual(self.cache._versions, {})
+
+    def _test_cached_connect(self, cache_or_version, expect_status,
+                             client_handler_type=None, setup_connection=None):
+        test_case = self
+        self.status_requests = []
+
+        class ClientHandler(client_handler_type or
+                            ConnectTest.client_handler_type):
+            def handle_status(self, request_packet):
+                port = self.server.listen_socket.getsockname()[1]
+                test_case.status_requests.append(port)
+                super(ClientHandler, self).handle_status(request_packet)
+
+        class Server(fake_server.FakeServer):
+            def __init__(self, *args, **kwds):
+                super(Server, self).__init__(*args, **kwds)
+                if not isinstance(cache_or_version, ProtocolVersionCache):
+                    port = self.listen_socket.getsockname()[1]
+                    test_case.cache.set('localhost', port, cache_or_version)
+                    (entry,) = test_case.cache._versions.values()
+                    test_case.stored_expiry = entry[1]
+
+        if isinstance(cache_or_version, ProtocolVersionCache):
+            self.cache = cache_or_version
+        else:
+            self.cache = ProtocolVersionCache()
+
+        def make_connection(*args, **kwds):
+            kwds['protocol_version_cache'] = self.cache
+            connection = Connection(*args, **kwds)
+            if setup_connection is not None:
+                setup_connection(connection)
+            return connection
+
+        self._test_connect(server_version=self.highest_version,
+                           server_type=Server,
+                           client_handler_type=ClientHandler,
+                           connection_type=make_connection)
+        self.assertEqual(bool(self.status_requests), expect_status)
+
+
 class LoginDisconnectTest(fake_server._FakeServerTest):
     def test_login_disconnect(self):
         with self.assertRaisesRegexp(LoginDisconnect, r'You are banned'):
@@ -443,3 +641,110 @@ class VersionNegotiationEdgeCases(fake_server._FakeServerTest):
         self._test_connect(server_version=self.lowest_version,
                            client_handler_type=ClientHandler,
                            connection_type=make_connection)
+
+
+class PacketTableTest(unittest.TestCase):
+    def test_packet_table(self):
+        version = max(SUPPORTED_PROTOCOL_VERSIONS)
+        context = ConnectionContext(protocol_version=version)
+        table = PlayingReactor.packet_table(context)
+        self.assertIs(table[clientbound.play.KeepAlivePacket.get_id(
+            context)], clientbound.play.KeepAlivePacket)
+        self.assertIs(PlayingReactor.packet_table(
+            ConnectionContext(protocol_version=version)), table)
+        self.assertIs(StatusReactor.packet_table(context),
+                      PlayingStatusReactor.packet_table(context))
+        if sys.version_info[0] >= 3:
+            with self.assertRaises(TypeError):
+                table[0x7F] = PacketReactor
+
+    def test_warm_packet_tables(self):
+        version = min(SUPPORTED_PROTOCOL_VERSIONS)
+        tables = connection._packet_tables
+        for reactor in PacketReactor, PlayingReactor:
+            tables.pop((reactor.get_clientbound_packets, version), None)
+        warm_packet_tables([version], [PlayingReactor])
+        self.assertIn(
+            (PlayingReactor.get_clientbound_packets, version), tables)
+        self.assertNotIn(
+            (PacketReactor.get_clientbound_packets, version), tables)
+
+
+class ReadableWaiterTest(unittest.TestCase):
+    def test_wait(self):
+        waiter = connection._ReadableWaiter()
+        pairs = [socket.socketpair() for _ in range(2)]
+        try:
+            for reader, writer in pairs:
+                self.assertFalse(waiter.wait(reader, 0))
+                writer.sendall(b'x')
+                self.assertTrue(waiter.wait(reader, 1))
+                poller = waiter._poller
+
+                # The same poll object is used for each wait.
+                self.assertTrue(waiter.wait(reader, 0))
+                self.assertIs(waiter._poller, poller)
+                reader.recv(1)
+                self.assertFalse(waiter.wait(reader, 0))
+
+                # The previous socket is no longer waited for.
+                writer.sendall(b'x')
+        finally:
+            for pair in pairs:
+                for sock in pair:
+                    sock.close()
+
+
+class LazyImportTest(unittest.TestCase):
+    def test_lazy_import(self):
+        if sys.version_info < (3, 7):
+            self.skipTest('Module attributes are not lazy before Python 3.7.')
+
+        # Importing 'connection' should not import the packets of the play
+        # state, nor any of the slow optional or cryptographic libraries.
+        deferred = ('minecraft.networking.packets.clientbound.play',
+                    'minecraft.networking.packets.serverbound.play',
+                    'minecraft.networking.encryption', 'cryptography',
+                    'numpy', 'dns')
+        script = ('import sys; import minecraft.networking.connection; '
+                  'print(" ".join(m for m in %r if m in sys.modules))'
+                  % (deferred,))
+        output = subprocess.check_output([sys.executable, '-c', script])
+        self.assertEqual(output.decode('ascii').strip(), '')
+
+        self.assertIs(connection.encryption.generate_shared_secret,
+                      encryption.generate_shared_secret)
+        context = ConnectionContext(
+            protocol_version=max(SUPPORTED_PROTOCOL_VERSIONS))
+        self.assertEqual(PlayingReactor.get_clientbound_packets(context),
+                         clientbound.play.get_packets(context))
+
+    def test_lazy_module(self):
+        missing = LazyModule('minecraft.no_such_module')
+        self.assertFalse(missing)
+        with self.assertRaises(ImportError):
+            missing.attribute
+        self.assertTrue(LazyModule('json'))
+        self.assertIs(LazyModule('json').loads, json.loads)
+
+
+class PipelineSetupTest(unittest.TestCase):
+    def test_write_setup(self):
+        client = Connection('localhost', allowed_versions=[
+            max(SUPPORTED_PROTOCOL_VERSIONS)])
+        client.socket = mock.Mock()
+        outgoing = []
+        client.register_packet_listener(
+            outgoing.append, serverbound.login.LoginStartPacket,
+            outgoing=True)
+        handshake = client._handshake_packet()
+        login_start = serverbound.login.LoginStartPacket(name='Player')
+        client._write_setup(handshake, login_start)
+
+        expected = packets.PacketBuffer()
+        handshake.write(expected)
+        login_start.write(expected)
+        client.socket.sendall.assert_called_once_with(
+            expected.get_writable())
+        self.assertFalse(client.socket.send.called)
+        self.assertEqual(outgoing, [login_start])
@@ -0,0 +1,243 @@
+import unittest
+import random
+
+from minecraft import SUPPORTED_PROTOCOL_VERSIONS
+from minecraft.networking import entities
+from minecraft.networking.connection import ConnectionContext
+from minecraft.networking.entities import (
+    EntityTracker, SpatialIndex, PLAYER_TYPE,
+)
+from minecraft.networking.types import VarInt, Vector, Direction
+from minecraft.networking.packets import PacketBuffer, clientbound
+
+
+class EntityTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.context = ConnectionContext(
+            protocol_version=SUPPORTED_PROTOCOL_VERSIONS[-1])
+
+    def packet(self, packet_type, **kwds):
+        return packet_type(self.context, **kwds)
+
+    def make_tracker(self):
+        play = clientbound.play
+        tracker = EntityTracker()
+        tracker.apply(self.packet(
+            play.SpawnPlayerPacket, entity_id=1, player_UUID=None,
+            x=10.0, y=64.0, z=10.0, yaw=90.0, pitch=0.0))
+        tracker.apply(self.packet(
+            play.SpawnObjectPacket, entity_id=2, object_uuid=None,
+            type_id=7, x=12.0, y=64.0, z=10.0, yaw=0.0, pitch=0.0, data=0,
+            velocity_x=8000, velocity_y=0, velocity_z=-4000))
+        tracker.apply(self.packet(
+            play.SpawnObjectPacket, entity_id=3, object_uuid=None,
+            type_id=7, x=100.0, y=64.0, z=10.0, yaw=0.0, pitch=0.0, data=0,
+            velocity_x=0, velocity_y=0, velocity_z=0))
+        return tracker
+
+    def test_packets(self):
+        play = clientbound.play
+        tracker = self.make_tracker()
+        self.assertEqual(len(tracker), 3)
+        self.assertEqual(tracker.type_id(1), PLAYER_TYPE)
+        self.assertEqual(tracker.velocity(2), Vector(1.0, 0.0, -0.5))
+
+        tracker.apply(self.packet(
+            play.EntityVelocityPacket, entity_id=2,
+            velocity_x=0, velocity_y=800, velocity_z=0))
+        self.assertEqual(tracker.velocity(2), Vector(0.0, 0.1, 0.0))
+
+        tracker.apply(self.packet(
+            play.EntityRelativeMovePacket, entity_id=1,
+            delta_x=4096, delta_y=-2048, delta_z=0, on_ground=True))
+        self.assertEqual(tracker.position(1), Vector(11.0, 63.5, 10.0))
+
+        tracker.apply(self.packet(
+            play.EntityLookAndRelativeMovePacket, entity_id=1,
+            delta_x=0, delta_y=0, delta_z=1024, yaw=180.0, pitch=45.0,
+            on_ground=True))
+        self.assertEqual(tracker.position(1), Vector(11.0, 63.5, 10.25))
+        self.assertEqual(tracker.look(1), Direction(180.0, 45.0))
+
+        tracker.apply(self.packet(
+            play.EntityLookPacket, entity_id=1, yaw=90.0, pitch=0.0,
+            on_ground=True))
+        self.assertEqual(tracker.look(1), Direction(90.0, 0.0))
+
+        tracker.apply(self.packet(
+            play.EntityTeleportPacket, entity_id=3, x=-5.0, y=70.0, z=2.0,
+            yaw=0.0, pitch=0.0, on_ground=False))
+        self.assertEqual(tracker.position(3), Vector(-5.0, 70.0, 2.0))
+
+        # Packets about unknown entities are ignored.
+        tracker.apply(self.packet(
+            play.EntityTeleportPacket, entity_id=4, x=0.0, y=0.0, z=0.0,
+            yaw=0.0, pitch=0.0, on_ground=False))
+        self.assertNotIn(4, tracker)
+
+        tracker.apply(self.packet(
+            play.DestroyEntitiesPacket, entity_ids=[1, 4]))
+        self.assertEqual(sorted(tracker), [2, 3])
+        self.assertIsNone(tracker.position(1))
+        self.assertEqual(tracker.position(3), Vector(-5.0, 70.0, 2.0))
+
+        tracker.clear()
+        self.assertEqual(len(tracker), 0)
+        self.assertEqual(tracker.within((0, 0, 0), 1000), [])
+
+    def test_uuids(self):
+        tracker = EntityTracker()
+        player_uuid = '12345678-1234-5678-1234-567812345678'
+        tracker.add(1, PLAYER_TYPE, 0.0, 0.0, 0.0, uuid=player_uuid)
+        tracker.add(2, 7, 0.0, 0.0, 0.0)
+        self.assertEqual(tracker.by_uuid(player_uuid), 1)
+        self.assertEqual(tracker.by_uuid(tracker.uuid(1)), 1)
+        self.assertIsNone(tracker.uuid(2))
+        tracker.remove(1)
+        self.assertIsNone(tracker.by_uuid(player_uuid))
+
+    def test_within(self):
+        tracker = self.make_tracker()
+        for numpy in (entities.numpy, None):
+            if numpy is None and not entities.numpy:
+                continue
+            original, entities.numpy = entities.numpy, numpy
+            try:
+                self.assertEqual(
+                    sorted(tracker.within((10, 64, 10), 5)), [1, 2])
+                self.assertEqual(
+                    tracker.within((10, 64, 10), 5, type_id=7), [2])
+                self.assertEqual(
+                    sorted(tracker.within(Vector(50, 64, 10), 50)), [1, 2, 3])
+                self.assertEqual(tracker.within((0, 0, 0), 1), [])
+            finally:
+                entities.numpy = original
+
+    def read_packet(self, packet_type, **kwds):
+        # Return the given packet as read from its serialised form.
+        buffer = PacketBuffer()
+        self.packet(packet_type, **kwds).write(buffer)
+        buffer.reset_cursor()
+        VarInt.read(buffer)
+        VarInt.read(buffer)
+        packet = packet_type(self.context)
+        packet.read(buffer)
+        return packet
+
+    def test_large_entity_ids(self):
+        # IDs of -1 and 2**31 are read from VarInts as 2**32 - 1 and 2**31.
+        play = clientbound.play
+        tracker = EntityTracker(SpatialIndex())
+        for entity_id in -1, 2 ** 31:
+            player_uuid = '00000000-0000-0000-0000-%012x' % (entity_id & 1)
+            packet = self.read_packet(
+                play.SpawnPlayerPacket, entity_id=entity_id,
+                player_UUID=player_uuid, x=10.0, y=64.0, z=10.0,
+                yaw=90.0, pitch=0.0)
+            tracker.apply(packet)
+            self.assertIn(packet.entity_id, tracker)
+        self.assertEqual(sorted(tracker), [-2 ** 31, -1])
+        self.assertEqual(tracker.type_id(2 ** 32 - 1), PLAYER_TYPE)
+
+        tracker.apply(self.read_packet(
+            play.EntityTeleportPacket, entity_id=-1, x=-5.0, y=70.0, z=2.0,
+            yaw=0.0, pitch=0.0, on_ground=False))
+        self.assertEqual(tracker.position(-1), Vector(-5.0, 70.0, 2.0))
+        self.assertEqual(tracker.index.nearest((-5.0, 70.0, 2.0), 1), [-1])
+        self.assertEqual(tracker.within((-5.0, 70.0, 2.0), 1), [-1])
+
+        tracker.apply(self.read_packet(
+            play.DestroyEntitiesPacket, entity_ids=[-1, 2 ** 31]))
+        self.assertEqual(len(tracker), 0)
+        self.assertEqual(len(tracker.index), 0)
+
+    def test_destroy_entities_packet(self):
+        for protocol_version in (47, SUPPORTED_PROTOCOL_VERSIONS[-1]):
+            context = ConnectionContext(protocol_version=protocol_version)
+            packet = clientbound.play.DestroyEntitiesPacket(
+                context, entity_ids=[1, 300, 70000])
+            buffer = PacketBuffer()
+            packet.write(buffer)
+            buffer.reset_cursor()
+            VarInt.read(buffer)
+            self.assertEqual(VarInt.read(buffer), packet.id)
+            packet_out = clientbound.play.DestroyEntitiesPacket(context)
+            packet_out.read(buffer)
+            self.assertEqual(packet_out.entity_ids, [1, 300, 70000])
+
+
+class SpatialIndexTest(unittest.TestCase):
+    def test_queries(self):
+        rng = random.Random(1)
+        index = SpatialIndex(cell_size=8)
+        positions = {}
+        for entity_id in range(300):
+            positions[entity_id] = tuple(
+                rng.uniform(-100, 100) for _ in range(3))
+            index.update(entity_id, *positions[entity_id])
+        # Move some entities, and remove others.
+        for entity_id in range(0, 300, 3):
+            positions[entity_id] = tuple(
+                rng.uniform(-100, 100) for _ in range(3))
+            index.update(entity_id, *positions[entity_id])
+        for entity_id in range(1, 300, 7):
+            del positions[entity_id]
+            index.remove(entity_id)
+        self.assertEqual(len(index), len(positions))
+
+        def distance(entity_id, point):
+            return sum((a - b) ** 2 for (a, b) in
+                       zip(positions[entity_id], point)) ** 0.5
+
+        for _ in range(20):
+            point = tuple(rng.uniform(-120, 120) for _ in range(3))
+            radius = rng.uniform(0, 60)
+            self.assertEqual(
+                sorted(index.within(point, radius)),
+                sorted(e for e in positions if distance(e, point) <= radius))
+
+            corner = tuple(c + rng.uniform(0, 50) for c in point)
+            self.assertEqual(
+                sorted(index.in_box(point, corner)),
+                sorted(e for e in positions if all(
+                    a <= p <= b for (a, p, b)
+                    in zip(point, positions[e], corner))))
+
+            expected = sorted(positions, key=lambda e: distance(e, point))
+            self.assertEqual(index.nearest(point, k=5), expected[:5])
+            self.assertEqual(
+                index.nearest(point, k=3, predicate=lambda e: e % 2 == 0),
+                [e for e in expected if e % 2 == 0][:3])
+            self.assertEqual(
+                index.nearest(point, k=300, max_distance=radius),
+                [e for e in expected if distance(e, point) <= radius])
+
+        # Entities far from the query point are still found.
+        index.clear()
+        index.update(1, 1e6, 0, -1e6)
+        self.assertEqual(index.nearest((0, 0, 0)), [1])
+        self.assertEqual(index.nearest((0, 0, 0), max_distance=1e3), [])
+        self.assertEqual(index.nearest((0, 0, 0), k=0), [])
+
+    def test_tracker(self):
+        context = ConnectionContext(
+            protocol_version=SUPPORTED_PROTOCOL_VERSIONS[-1])
+        index = SpatialIndex()
+        tracker = EntityTracker(index=index)
+        tracker.add(1, PLAYER_TYPE, 0.0, 64.0, 0.0)
+        tracker.add(2, 7, 40.0, 64.0, 0.0)
+        self.assertEqual(index.nearest((30, 64, 0)), [2])
+
+        tracker.apply(clientbound.play.EntityTeleportPacket(
+            context, entity_id=2, x=-40.0, y=64.0, z=0.0, yaw=0.0,
+            pitch=0.0, on_ground=True))
+        tracker.apply(clientbound.play.EntityRelativeMovePacket(
+            context, entity_id=1, delta_x=4096 * 5, delta_y=0, delta_z=0,
+            on_ground=True))
+        self.assertEqual(index.position(1), Vector(5.0, 64.0, 0.0))
+        self.assertEqual(index.nearest((30, 64, 0), k=2), [1, 2])
+
+        tracker.remove(1)
+        self.assertEqual(index.within((0, 64, 0), 100), [2])
+        tracker.clear()
+        self.assertEqual(len(index), 0)
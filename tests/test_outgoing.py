@@ -0,0 +1,216 @@
+import unittest
+import threading
+import time
+
+from minecraft.networking.outgoing import (
+    OutgoingPacketQueue, TokenBucket, PRIORITY_CONTROL, PRIORITY_MOVEMENT,
+    PRIORITY_DEFAULT
+)
+from minecraft.networking.packets import serverbound
+
+
+class OutgoingPacketQueueTest(unittest.TestCase):
+    def test_priority_order(self):
+        queue = OutgoingPacketQueue()
+        chat_1 = serverbound.play.ChatPacket(message='1')
+        move_1 = serverbound.play.PositionAndLookPacket()
+        keep_alive = serverbound.play.KeepAlivePacket(keep_alive_id=1)
+        chat_2 = serverbound.play.ChatPacket(message='2')
+        move_2 = serverbound.play.PositionAndLookPacket()
+        teleport = serverbound.play.TeleportConfirmPacket(teleport_id=1)
+        for packet in chat_1, move_1, keep_alive, chat_2, move_2, teleport:
+            queue.put(packet)
+
+        self.assertEqual(queue.priority(keep_alive), PRIORITY_CONTROL)
+        self.assertEqual(queue.priority(move_1), PRIORITY_MOVEMENT)
+        self.assertEqual(queue.priority(chat_1), PRIORITY_DEFAULT)
+
+        self.assertEqual(len(queue), 6)
+        popped = []
+        while len(queue):
+            popped.append(queue.pop())
+        self.assertEqual(popped, [keep_alive, teleport, move_1, move_2,
+                                  chat_1, chat_2])
+        self.assertIsNone(queue.pop())
+        self.assertIsNone(queue.ready_delay())
+
+    def test_rate_limits(self):
+        queue = OutgoingPacketQueue(rate_limits={PRIORITY_DEFAULT: (1, 2)})
+        for i in range(4):
+            queue.put(serverbound.play.ChatPacket(message=str(i)))
+        queue.put(serverbound.play.KeepAlivePacket(keep_alive_id=1))
+
+        # The control packet is not limited, and a burst of two chat packets
+        # is allowed; the remaining chat packets must wait.
+        self.assertIsInstance(queue.pop(), serverbound.play.KeepAlivePacket)
+        self.assertEqual(queue.pop().message, '0')
+        self.assertEqual(queue.pop().message, '1')
+        self.assertIsNone(queue.pop())
+        self.assertTrue(0 < queue.ready_delay() <= 1)
+
+        self.assertEqual(queue.pop(rate_limited=False).message, '2')
+        self.assertEqual(len(queue), 1)
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+        now = bucket.time
+        self.assertTrue(bucket.take(now))
+        self.assertFalse(bucket.take(now))
+        self.assertAlmostEqual(bucket.delay(now), 0.1)
+        self.assertAlmostEqual(bucket.delay(now + 0.05), 0.05)
+        self.assertTrue(bucket.take(now + 0.11))
+        self.assertEqual(bucket.delay(now + 10), 0)
+
+    def test_backpressure(self):
+        queue = OutgoingPacketQueue(max_size=2)
+        for i in range(2):
+            queue.put(serverbound.play.ChatPacket(message=str(i)))
+
+        # Control packets and non-blocking calls are always accepted.
+        queue.put(serverbound.play.KeepAlivePacket(keep_alive_id=1))
+        queue.put(serverbound.play.ChatPacket(message='2'), block=False)
+        self.assertEqual(len(queue), 4)
+
+        done = []
+        thread = threading.Thread(target=lambda: done.append(queue.put(
+            serverbound.play.ChatPacket(message='3'))))
+        thread.daemon = True
+        thread.start()
+        time.sleep(0.05)
+        self.assertEqual(done, [])
+
+        for _ in range(3):
+            queue.pop()
+        thread.join(2)
+        self.assertEqual(done, [None])
+        self.assertEqual([queue.pop().message for _ in range(2)], ['2', '3'])
+
+    def test_coalesce_backpressure(self):
+        # Replaced packets do not count towards the size of the queue.
+        queue = OutgoingPacketQueue(max_size=2, coalesce=True)
+        queue.put(serverbound.play.ChatPacket(message='chat'))
+        moves = [serverbound.play.PositionAndLookPacket(x=i)
+                 for i in range(5)]
+        thread = threading.Thread(target=lambda: [
+            queue.put(move) for move in moves])
+        thread.daemon = True
+        thread.start()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(queue), 2)
+
+        self.assertIs(queue.pop(), moves[-1])
+        self.assertEqual(queue.elided, 4)
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.pop().message, 'chat')
+        self.assertEqual(len(queue), 0)
+
+        # A packet which has been sent is no longer counted when replaced.
+        queue.put(moves[0])
+        self.assertIs(queue.pop(), moves[0])
+        queue.put(moves[1])
+        self.assertEqual(len(queue), 1)
+
+    def test_close(self):
+        queue = OutgoingPacketQueue(max_size=1)
+        queue.put(serverbound.play.ChatPacket(message='0'))
+        thread = threading.Thread(target=lambda: queue.put(
+            serverbound.play.ChatPacket(message='1')))
+        thread.daemon = True
+        thread.start()
+        time.sleep(0.05)
+        queue.close()
+        thread.join(2)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(queue), 1)
+
+    def test_empty_queues(self):
+        # The queue of each priority is only created when first needed.
+        queue = OutgoingPacketQueue()
+        self.assertEqual(len(queue), 0)
+        self.assertIsNone(queue.pop())
+        self.assertIsNone(queue.ready_delay())
+        chat = serverbound.play.ChatPacket(message='chat')
+        queue.put(chat)
+        self.assertEqual([q is not None for q in queue._queues],
+                         [False, False, True])
+        self.assertEqual(len(queue), 1)
+        self.assertIs(queue.pop(), chat)
+        queue.close()
+
+    def test_coalesce(self):
+        for coalesce in False, True:
+            queue = OutgoingPacketQueue(coalesce=coalesce, priorities={})
+            moves = [serverbound.play.PositionAndLookPacket(x=i)
+                     for i in range(3)]
+            chat = serverbound.play.ChatPacket(message='chat')
+            for packet in moves[0], moves[1], chat, moves[2]:
+                queue.put(packet)
+
+            popped = list(iter(queue.pop, None))
+            self.assertEqual(len(queue), 0)
+            if coalesce:
+                self.assertEqual(popped, [chat, moves[2]])
+                self.assertEqual(queue.elided, 2)
+            else:
+                self.assertEqual(popped, [moves[0], moves[1], chat, moves[2]])
+                self.assertEqual(queue.elided, 0)
+
+        # Once sent, a packet is no longer replaced.
+        queue = OutgoingPacketQueue(coalesce=True)
+        queue.put(moves[0])
+        self.assertIs(queue.pop(), moves[0])
+        queue.put(moves[1])
+        self.assertEqual(queue.elided, 0)
+        self.assertIs(queue.pop(), moves[1])
+        self.assertIsNone(queue.ready_delay())
+
+    def test_concurrent_producers(self):
+        queue = OutgoingPacketQueue(coalesce=True)
+
+        def produce(thread_id):
+            for i in range(1000):
+                queue.put(serverbound.play.ChatPacket(
+                    message='%d %d' % (thread_id, i)))
+                queue.put(serverbound.play.PositionAndLookPacket(x=i))
+
+        threads = [threading.Thread(target=produce, args=(i,))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        packets = list(iter(queue.pop, None))
+        chat = [p.message for p in packets
+                if isinstance(p, serverbound.play.ChatPacket)]
+        self.assertEqual(len(chat), 4000)
+        for thread_id in range(4):
+            self.assertEqual(
+                [m for m in chat if m.startswith('%d ' % thread_id)],
+                ['%d %d' % (thread_id, i) for i in range(1000)])
+        moves = [p for p in packets
+                 if isinstance(p, serverbound.play.PositionAndLookPacket)]
+        self.assertEqual(len(moves), 1)
+        self.assertEqual(len(moves) + queue.elided, 4000)
+
+    def test_coalesce_rate_limited(self):
+        # A rate limit token is not spent on a packet replaced while it is
+        # being popped.
+        queue = OutgoingPacketQueue(
+            coalesce=True, rate_limits={PRIORITY_MOVEMENT: (1, 1)})
+        moves = [serverbound.play.PositionAndLookPacket(x=i)
+                 for i in range(2)]
+        queue.put(moves[0])
+        discard_elided = queue._discard_elided
+
+        def replace_then_discard(q):
+            result = discard_elided(q)
+            if q is queue._queues[PRIORITY_MOVEMENT]:
+                queue._discard_elided = discard_elided
+                queue.put(moves[1])
+            return result
+        queue._discard_elided = replace_then_discard
+        self.assertIs(queue.pop(), moves[1])
+        self.assertEqual(queue.elided, 1)
+        self.assertIsNone(queue.pop())
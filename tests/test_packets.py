@@ -3,6 +3,7 @@ import unittest
 import string
 import logging
 import struct
+import sys
 from zlib import decompress
 from random import choice
 
@@ -12,8 +13,8 @@ from minecraft.networking.types import (
     VarInt, Enum, Vector, PositionAndLook, OriginPoint,
 )
 from minecraft.networking.packets import (
-    Packet, PacketBuffer, PacketListener, KeepAlivePacket, serverbound,
-    clientbound
+    Packet, PacketBuffer, PacketListener, PacketTemplate, KeepAlivePacket,
+    slotted_packet, serverbound, clientbound
 )
 
 TEST_VERSIONS = list(RELEASE_PROTOCOL_VERSIONS)
@@ -81,6 +82,28 @@ class PacketSerializationTest(unittest.TestCase):
             self.write_read_packet(packet, 20)
             self.write_read_packet(packet, -1)
 
+    def test_serialize(self):
+        context = ConnectionContext(protocol_version=TEST_VERSIONS[-1])
+
+        def packet_bytes(packet):
+            packet_buffer = PacketBuffer()
+            packet.write(packet_buffer)
+            return packet_buffer.get_writable()
+
+        before = packet_bytes(serverbound.play.ChatPacket(
+            context, message=u"before"))
+        after = packet_bytes(serverbound.play.ChatPacket(
+            context, message=u"after"))
+
+        packet = serverbound.play.ChatPacket(context, message=u"before")
+        packet.serialize()
+        packet.message = u"after"
+        self.assertEqual(packet_bytes(packet), before)
+
+        # The serialised data is used only once.
+        self.assertEqual(packet_bytes(packet), after)
+        self.assertFalse(hasattr(packet, '_serialized'))
+
     def write_read_packet(self, packet, compression_threshold):
         for protocol_version in TEST_VERSIONS:
             logging.debug('protocol_version = %r' % protocol_version)
@@ -109,6 +132,41 @@ class PacketSerializationTest(unittest.TestCase):
             self.assertEqual(packet.message, deserialized.message)
 
 
+class PacketTemplateTest(unittest.TestCase):
+    def test_template(self):
+        context = ConnectionContext(protocol_version=TEST_VERSIONS[0])
+        keep_alive = PacketTemplate(serverbound.play.KeepAlivePacket, context)
+        chat = PacketTemplate(
+            serverbound.play.ChatPacket, context, message=u"/spawn")
+
+        def packet_bytes(packet):
+            packet_buffer = PacketBuffer()
+            packet.write(packet_buffer)
+            return packet_buffer.get_writable()
+
+        # The templates are re-encoded when the protocol version changes.
+        for protocol_version in TEST_VERSIONS:
+            context.protocol_version = protocol_version
+
+            expected = serverbound.play.KeepAlivePacket(
+                context, keep_alive_id=1234)
+            packet = keep_alive.packet(keep_alive_id=1234)
+            self.assertEqual(packet.id, expected.id)
+            self.assertEqual(packet.keep_alive_id, 1234)
+            self.assertEqual(packet_bytes(packet), packet_bytes(expected))
+
+            expected = serverbound.play.ChatPacket(context, message=u"/spawn")
+            packet = chat.packet()
+            self.assertEqual(packet.message, u"/spawn")
+            self.assertEqual(packet_bytes(packet), packet_bytes(expected))
+            self.assertEqual(chat.encode(), packet_bytes(expected)[1:])
+
+        with self.assertRaises(ValueError):
+            keep_alive.packet()
+        with self.assertRaises(ValueError):
+            chat.packet(message=u"/home")
+
+
 class PacketListenerTest(unittest.TestCase):
 
     def test_listener(self):
@@ -152,6 +210,91 @@ class PacketEnumTest(unittest.TestCase):
             '0x00 ExamplePacket(alpha=ZERO, beta=0, gamma=0)'
         )
 
+        # The enum associated with each field is cached, but not beyond
+        # changes to the packet class.
+        self.assertIs(ExamplePacket.field_enum('alpha'), ExamplePacket.Alpha)
+        self.assertIsNone(ExamplePacket.field_enum('gamma'))
+
+        class Gamma(Enum):
+            TWO = 2
+        ExamplePacket.Gamma = Gamma
+        self.assertIs(ExamplePacket.field_enum('gamma'), Gamma)
+        self.assertEqual(
+            str(ExamplePacket(ConnectionContext(), alpha=0, beta=0, gamma=2)),
+            '0x00 ExamplePacket(alpha=ZERO, beta=0, gamma=TWO)'
+        )
+
+
+class SlottedPacketTest(unittest.TestCase):
+    def test_slotted_packet(self):
+        packet_type = clientbound.play.EntityRelativeMovePacket
+        self.assertEqual(packet_type.__slots__, (
+            'entity_id', 'delta_x', 'delta_y', 'delta_z', 'on_ground'))
+
+        for protocol_version in TEST_VERSIONS:
+            context = ConnectionContext(protocol_version=protocol_version)
+            packet_in = packet_type(context, entity_id=7, delta=(1, -2, 3),
+                                    on_ground=True)
+            self.assertFalse(hasattr(packet_in, '__dict__'))
+            self.assertEqual(packet_in.id, packet_type.get_id(context))
+
+            packet_buffer = PacketBuffer()
+            packet_in.write(packet_buffer)
+            packet_buffer.reset_cursor()
+            VarInt.read(packet_buffer)
+            self.assertEqual(VarInt.read(packet_buffer), packet_in.id)
+            packet_out = packet_type(context)
+            packet_out.read(packet_buffer)
+            self.assertEqual(str(packet_out), str(packet_in))
+
+            self.assertFalse(hasattr(packet_out, '__dict__'))
+            with self.assertRaises(AttributeError):
+                packet_out.other = None
+
+        # Slotted packets are smaller than otherwise identical packets,
+        # including the '__dict__' of the latter.
+        class UnslottedPacket(Packet):
+            definition = [{name: VarInt} for name in packet_type.__slots__]
+
+        def size(packet):
+            packet.set_values(**{name: 1 for name in packet_type.__slots__})
+            return sys.getsizeof(packet) + (
+                sys.getsizeof(packet.__dict__)
+                if hasattr(packet, '__dict__') else 0)
+        self.assertLess(size(packet_type()), size(UnslottedPacket()))
+
+    def test_slotted_packet_base(self):
+        class UnslottedPacket(Packet):
+            pass
+
+        with self.assertRaises(TypeError):
+            @slotted_packet
+            class ExamplePacket(UnslottedPacket):
+                definition = [{'field': VarInt}]
+
+    def test_base_packet_attributes(self):
+        # Any attribute, including the ID, may be set on an ordinary packet.
+        packet = Packet(ConnectionContext(), id=0x7F, other=1)
+        self.assertEqual((packet.id, packet.other), (0x7F, 1))
+        self.assertIsInstance(packet, Packet)
+        self.assertEqual(repr(packet), '0x7F Packet')
+
+    def test_context_cache(self):
+        class ExamplePacket(Packet):
+            calls = []
+
+            @classmethod
+            def get_id(cls, context):
+                cls.calls.append(context.protocol_version)
+                return context.protocol_version & 0x7F
+
+        self.assertIsNone(ExamplePacket().id)
+        for protocol_version in (TEST_VERSIONS * 2):
+            packet = ExamplePacket(
+                ConnectionContext(protocol_version=protocol_version))
+            self.assertEqual(packet.id, protocol_version & 0x7F)
+        self.assertEqual(ExamplePacket.calls, TEST_VERSIONS)
+
 
 class TestReadWritePackets(unittest.TestCase):
     maxDiff = None
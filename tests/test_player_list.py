@@ -0,0 +1,104 @@
+import unittest
+import uuid
+
+from minecraft import SUPPORTED_PROTOCOL_VERSIONS
+from minecraft.networking.connection import Connection, ConnectionContext
+from minecraft.networking.player_list import (
+    PlayerListTracker, uuid_key, PLAYER_ADDED, PLAYER_UPDATED, PLAYER_REMOVED,
+)
+from minecraft.networking.packets import PacketBuffer
+from minecraft.networking.packets.clientbound.play import PlayerListItemPacket
+from minecraft.networking.types import VarInt, BinaryUUID
+
+
+UUID_1 = '12345678-1234-5678-1234-567812345678'
+UUID_2 = '87654321-4321-8765-4321-876543218765'
+SUPPORTED_VERSION = SUPPORTED_PROTOCOL_VERSIONS[-1]
+
+
+class PlayerListTrackerTest(unittest.TestCase):
+    def packet(self, action_type, *actions):
+        return PlayerListItemPacket(action_type=action_type, actions=[
+            action_type(**action) for action in actions])
+
+    def add(self, player_uuid, name, ping=0):
+        return dict(uuid=player_uuid, name=name, properties=[], gamemode=0,
+                    ping=ping, display_name=None)
+
+    def test_uuid_key(self):
+        raw = uuid.UUID(UUID_1).bytes
+        self.assertEqual(uuid_key(UUID_1), raw)
+        self.assertEqual(uuid_key(uuid.UUID(UUID_1)), raw)
+        self.assertEqual(uuid_key(uuid.UUID(UUID_1).int), raw)
+        self.assertIs(uuid_key(raw), raw)
+
+    def test_apply(self):
+        player_list = PlayerListTracker()
+        changes = []
+        player_list.register_listener(
+            lambda change, player: changes.append((change, player.name)))
+
+        player_list.apply(self.packet(
+            PlayerListItemPacket.AddPlayerAction,
+            self.add(UUID_1, 'Alice'), self.add(UUID_2, 'Bob')))
+        self.assertEqual(len(player_list), 2)
+        self.assertEqual(changes, [(PLAYER_ADDED, 'Alice'),
+                                   (PLAYER_ADDED, 'Bob')])
+        alice = player_list.get(UUID_1)
+        self.assertIs(player_list.by_name('ALICE'), alice)
+        self.assertIs(player_list.get(uuid.UUID(UUID_1).bytes), alice)
+        self.assertIn(uuid.UUID(UUID_2).int, player_list)
+
+        del changes[:]
+        player_list.apply(self.packet(
+            PlayerListItemPacket.UpdateLatencyAction,
+            dict(uuid=UUID_1, ping=120), dict(uuid=UUID_2, ping=30)))
+        self.assertEqual(alice.ping, 120)
+        self.assertEqual(changes, [(PLAYER_UPDATED, 'Alice'),
+                                   (PLAYER_UPDATED, 'Bob')])
+
+        # Adding an existing player updates the same object.
+        player_list.apply(self.packet(
+            PlayerListItemPacket.AddPlayerAction,
+            self.add(UUID_1, 'Alicia', ping=5)))
+        self.assertIs(player_list.get(UUID_1), alice)
+        self.assertEqual(alice.ping, 5)
+        self.assertIsNone(player_list.by_name('alice'))
+        self.assertIs(player_list.by_name('alicia'), alice)
+
+        del changes[:]
+        player_list.apply(self.packet(
+            PlayerListItemPacket.RemovePlayerAction,
+            dict(uuid=UUID_1), dict(uuid=UUID_1)))
+        self.assertEqual(changes, [(PLAYER_REMOVED, 'Alicia')])
+        self.assertIsNone(player_list.get(UUID_1))
+        self.assertIsNone(player_list.by_name('alicia'))
+        self.assertEqual([p.name for p in player_list], ['Bob'])
+
+    def test_binary_uuids(self):
+        context = ConnectionContext(protocol_version=SUPPORTED_VERSION,
+                                    binary_uuids=True)
+        packet = self.packet(PlayerListItemPacket.AddPlayerAction,
+                             self.add(UUID_1, 'Alice'))
+        packet.context = context
+        packet_buffer = PacketBuffer()
+        packet.write(packet_buffer)
+        packet_buffer.reset_cursor()
+        VarInt.read(packet_buffer)
+        VarInt.read(packet_buffer)
+        packet = PlayerListItemPacket(context)
+        packet.read(packet_buffer)
+
+        player_list = PlayerListTracker()
+        player_list.apply(packet)
+        player = player_list.by_name('alice')
+        self.assertIsInstance(player.uuid, BinaryUUID)
+        self.assertEqual(str(player.uuid), UUID_1)
+        self.assertIs(player_list.get(uuid.UUID(UUID_1).bytes), player)
+        self.assertIs(player_list.get(UUID_1), player)
+
+    def test_connection(self):
+        connection = Connection('localhost')
+        self.assertIsInstance(connection.player_list, PlayerListTracker)
+        connection = Connection('localhost', track_player_list=False)
+        self.assertIsNone(connection.player_list)
@@ -0,0 +1,147 @@
+import unittest
+import threading
+import time
+
+from minecraft.networking.connection import Connection
+from minecraft.networking.reconnect import ReconnectSupervisor
+from minecraft.networking.packets import clientbound
+from minecraft.exceptions import VersionMismatch
+
+from . import fake_server
+
+
+class ReconnectSupervisorTest(fake_server._FakeServerTest):
+    def test_reconnect(self):
+        self.phase = 0
+        self.status_requests = 0
+        self._test_connect()
+        self.assertEqual(self.phase, 2)
+        self.assertEqual(self.status_requests, 1)
+
+    def _start_client(self, client):
+        supervisor = ReconnectSupervisor(initial_delay=0.01)
+
+        @client.listener(clientbound.play.DisconnectPacket)
+        def handle_disconnect(packet):
+            if 'Test successful' in packet.json_data:
+                supervisor.stop()
+                raise fake_server.FakeServerTestSuccess
+
+        supervisor.supervise(client)
+
+    class client_handler_type(fake_server.FakeClientHandler):
+        def handle_status(self, request_packet):
+            self.server.test_case.status_requests += 1
+            super(ReconnectSupervisorTest.client_handler_type, self) \
+                .handle_status(request_packet)
+
+        def handle_play_start(self):
+            super(ReconnectSupervisorTest.client_handler_type, self) \
+                .handle_play_start()
+            test_case = self.server.test_case
+            test_case.phase += 1
+            if test_case.phase == 1:
+                raise fake_server.FakeServerDisconnect('Please reconnect.')
+            raise fake_server.FakeServerDisconnect('Test successful.')
+
+
+class ReconnectSchedulingTest(unittest.TestCase):
+    def make_connections(self, count):
+        started = []
+        lock = threading.Lock()
+
+        def make_connect(connection):
+            def connect():
+                with lock:
+                    started.append(connection)
+            return connect
+
+        connections = []
+        for i in range(count):
+            connection = Connection('localhost', username='Bot%d' % i)
+            connection.connect = make_connect(connection)
+            connections.append(connection)
+        return connections, started
+
+    def wait_for(self, condition, timeout=2):
+        end = time.time() + timeout
+        while not condition() and time.time() < end:
+            time.sleep(0.01)
+        self.assertTrue(condition())
+
+    def test_max_concurrent(self):
+        connections, started = self.make_connections(10)
+        supervisor = ReconnectSupervisor(max_concurrent=3)
+        try:
+            for connection in connections:
+                supervisor.supervise(connection)
+            self.wait_for(lambda: len(started) == 3)
+            time.sleep(0.05)
+            self.assertEqual(len(started), 3)
+
+            # Joining the game ends a connection attempt.
+            for connection in list(started):
+                for listener in connection.packet_listeners:
+                    listener.call_packet(clientbound.play.JoinGamePacket())
+            self.wait_for(lambda: len(started) == 6)
+
+            # So does termination of the connection, with or without an
+            # exception, though this does not count towards the limit
+            # once the connection has been released.
+            started[3].handle_exit()
+            started[4].handle_exception(IOError(), None)
+            supervisor.release(started[5])
+            self.wait_for(lambda: len(started) == 9)
+        finally:
+            supervisor.stop()
+
+    def test_blocked_connect(self):
+        # A connection whose 'connect' blocks does not prevent others from
+        # being connected.
+        connections, started = self.make_connections(3)
+        unblock = threading.Event()
+        blocked_connect = connections[0].connect
+
+        def block():
+            blocked_connect()
+            unblock.wait(5)
+        connections[0].connect = block
+
+        supervisor = ReconnectSupervisor(max_concurrent=3)
+        try:
+            for connection in connections:
+                supervisor.supervise(connection)
+            self.wait_for(lambda: len(started) == 3)
+        finally:
+            unblock.set()
+            supervisor.stop()
+
+    def test_release(self):
+        connections, started = self.make_connections(2)
+        supervisor = ReconnectSupervisor(max_attempts=1)
+        try:
+            exits = []
+            connections[0].handle_exit = lambda: exits.append(True)
+            supervisor.supervise(connections[0], connect=False)
+            supervisor.supervise(connections[1], connect=False)
+            self.assertEqual(len(connections[0].packet_listeners), 1)
+
+            supervisor.release(connections[0])
+            self.assertEqual(connections[0].packet_listeners, [])
+            connections[0].handle_exit()
+            self.assertEqual(exits, [True])
+
+            # Version mismatches are not retried by default.
+            connections[1].handle_exception(VersionMismatch(), None)
+            self.assertIsNone(connections[1].handle_exception)
+            self.assertEqual(started, [])
+        finally:
+            supervisor.stop()
+
+    def test_backoff_delay(self):
+        supervisor = ReconnectSupervisor(
+            initial_delay=1, multiplier=2, max_delay=10)
+        for attempts, bound in (0, 1), (1, 2), (3, 8), (4, 10), (20, 10):
+            for _ in range(20):
+                self.assertTrue(
+                    0 <= supervisor.backoff_delay(attempts) <= bound)
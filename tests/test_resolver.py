@@ -0,0 +1,90 @@
+import unittest
+import socket
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from minecraft.networking import resolver
+from minecraft.networking.resolver import Resolver, connect_socket
+
+
+def addrinfo(family, host, port):
+    return (family, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', (host, port))
+
+
+class ResolverTest(unittest.TestCase):
+    def test_family_order(self):
+        info = [addrinfo(socket.AF_INET6, '::1', 1),
+                addrinfo(socket.AF_INET6, '::2', 1),
+                addrinfo(socket.AF_INET, '127.0.0.1', 1),
+                addrinfo(socket.AF_INET, '127.0.0.2', 1),
+                addrinfo(socket.AF_INET, '127.0.0.3', 1)]
+        with mock.patch('socket.getaddrinfo', return_value=info):
+            addresses = Resolver().resolve('example.com', 1)
+        self.assertEqual([ai[4][0] for ai in addresses],
+                         ['127.0.0.1', '::1', '127.0.0.2', '::2', '127.0.0.3'])
+
+    def test_cache(self):
+        info = [addrinfo(socket.AF_INET, '127.0.0.1', 1)]
+        with mock.patch('socket.getaddrinfo', return_value=info) as gai:
+            cached, uncached = Resolver(ttl=300), Resolver(ttl=0)
+            for _ in range(3):
+                self.assertEqual(cached.resolve('example.com', 1), info)
+                self.assertEqual(uncached.resolve('example.com', 1), info)
+            self.assertEqual(gai.call_count, 1 + 3)
+
+            cached.clear()
+            cached.resolve('example.com', 1)
+            self.assertEqual(gai.call_count, 1 + 3 + 1)
+
+    def test_srv(self):
+        if not resolver.dns:
+            self.skipTest('dnspython is not installed.')
+        record = mock.MagicMock(priority=0, weight=5, port=25570)
+        record.target = 'mc.example.com.'
+        info = [addrinfo(socket.AF_INET, '127.0.0.1', 25570)]
+        with mock.patch('dns.resolver.resolve', create=True,
+                        return_value=[record]) as resolve, \
+                mock.patch('socket.getaddrinfo', return_value=info) as gai:
+            srv_resolver = Resolver(srv=True)
+            for _ in range(2):
+                srv_resolver.resolve('example.com', 25565)
+            resolve.assert_called_once_with(
+                '_minecraft._tcp.example.com', 'SRV')
+            gai.assert_called_once_with(
+                'mc.example.com', 25570, 0, socket.SOCK_STREAM)
+
+
+class ConnectSocketTest(unittest.TestCase):
+    def setUp(self):
+        self.listen_socket = socket.socket()
+        self.listen_socket.bind(('127.0.0.1', 0))
+        self.listen_socket.listen(1)
+
+        # Find a local port that refuses connections.
+        closed_socket = socket.socket()
+        closed_socket.bind(('127.0.0.1', 0))
+        self.closed_port = closed_socket.getsockname()[1]
+        closed_socket.close()
+
+    def tearDown(self):
+        self.listen_socket.close()
+
+    def test_connect_after_failure(self):
+        port = self.listen_socket.getsockname()[1]
+        addresses = [addrinfo(socket.AF_INET, '127.0.0.1', self.closed_port),
+                     addrinfo(socket.AF_INET, '127.0.0.1', port)]
+        sock = connect_socket(addresses, timeout=5, attempt_delay=5)
+        try:
+            self.assertEqual(sock.getpeername(), ('127.0.0.1', port))
+            self.assertIsNone(sock.gettimeout())
+        finally:
+            sock.close()
+
+    def test_connect_failure(self):
+        addresses = [addrinfo(socket.AF_INET, '127.0.0.1', self.closed_port)]
+        with self.assertRaises(socket.error):
+            connect_socket(addresses, timeout=5)
+        with self.assertRaises(socket.error):
+            connect_socket([])
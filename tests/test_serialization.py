@@ -1,12 +1,16 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import io
 import unittest
+import uuid
 from minecraft.networking.types import (
     Type, Boolean, UnsignedByte, Byte, Short, UnsignedShort,
-    Integer, FixedPointInteger, Angle, VarInt, Long, Float, Double,
+    Integer, FixedPointInteger, Angle, VarInt, VarLong, Long, Float, Double,
     ShortPrefixedByteArray, VarIntPrefixedByteArray, UUID,
     String as StringType, Position, TrailingByteArray, UnsignedLong,
+    PrefixedArray, FixedArray, Vector, BinaryUUID,
 )
+from minecraft.networking.types import arrays, basic
 from minecraft.networking.packets import PacketBuffer
 from minecraft.networking.connection import ConnectionContext
 from minecraft import SUPPORTED_PROTOCOL_VERSIONS, RELEASE_PROTOCOL_VERSIONS
@@ -27,6 +31,7 @@ TEST_DATA = {
     FixedPointInteger: [float(-13098.3435), float(-0.83), float(1000)],
     Angle: [0, 360.0, 720, 47.12947238973, -108.7],
     VarInt: [1, 250, 50000, 10000000],
+    VarLong: [0, 1, -1, 2 ** 40, -2 ** 63, 2 ** 63 - 1],
     Long: [50000000],
     Float: [21.000301],
     Double: [36.004002],
@@ -39,12 +44,19 @@ TEST_DATA = {
 }
 
 
+def all_subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        for subsubclass in all_subclasses(subclass):
+            yield subsubclass
+
+
 class SerializationTest(unittest.TestCase):
     def test_serialization(self):
         for protocol_version in TEST_VERSIONS:
             context = ConnectionContext(protocol_version=protocol_version)
 
-            for data_type in Type.__subclasses__():
+            for data_type in all_subclasses(Type):
                 if data_type in TEST_DATA:
                     test_cases = TEST_DATA[data_type]
 
@@ -110,3 +122,183 @@ class SerializationTest(unittest.TestCase):
         packet_buffer.reset_cursor()
 
         self.assertEqual(VarInt.read(packet_buffer), 50000)
+
+    def test_varint_codecs(self):
+        values = [0, 1, 127, 128, 255, 2 ** 14, 2 ** 21 - 1, 2 ** 31 - 1,
+                  2 ** 32 - 1]
+        for value in values:
+            packet_buffer = PacketBuffer()
+            VarInt.send(value, packet_buffer)
+            data = packet_buffer.get_writable()
+            self.assertEqual(VarInt.size(value), len(data))
+            self.assertEqual(VarInt.encode(value), data)
+            self.assertEqual(VarInt.decode(bytearray(b'xx' + data), 2),
+                             (value, 2 + len(data)))
+
+        # Negative values are encoded in two's complement form.
+        self.assertEqual(VarInt.encode(-1), b'\xff\xff\xff\xff\x0f')
+        self.assertEqual(VarInt.size(-1), 5)
+        self.assertEqual(VarLong.size(-1), 10)
+        self.assertEqual(VarLong.decode(bytearray(VarLong.encode(-2))),
+                         (-2, 10))
+
+        # Encoding into a preallocated buffer, or at its end.
+        buffer = bytearray(8)
+        self.assertEqual(VarInt.encode_into(300, buffer, 1), 3)
+        self.assertEqual(buffer, bytearray(b'\x00\xac\x02' + b'\x00' * 5))
+        self.assertEqual(VarInt.encode_into(1, buffer), 9)
+        self.assertEqual(buffer[-1], 1)
+
+        packet_buffer = PacketBuffer()
+        VarInt.write_many(values, packet_buffer)
+        data = packet_buffer.get_writable()
+        self.assertEqual(VarInt.decode_many(bytearray(data), len(values)),
+                         (values, len(data)))
+        packet_buffer.reset_cursor()
+        self.assertEqual(VarInt.read_many(packet_buffer, len(values)), values)
+
+        packet_buffer = PacketBuffer()
+        VarLong.write_many([-1, 5], packet_buffer)
+        packet_buffer.reset_cursor()
+        self.assertEqual(VarLong.read_many(packet_buffer, 2), [-1, 5])
+        self.assertEqual(VarLong.decode_many(
+            bytearray(packet_buffer.get_writable()), 2), ([-1, 5], 11))
+
+        with self.assertRaises(EOFError):
+            VarInt.decode(bytearray(b'\x80'))
+        with self.assertRaises(EOFError):
+            VarInt.decode_many(bytearray(b'\x01'), 2)
+        for data in b'', b'\x80':
+            with self.assertRaises(EOFError):
+                VarInt.read(io.BytesIO(data))
+            with self.assertRaises(EOFError):
+                VarInt.read_many(io.BytesIO(b'\x01' + data), 2)
+        with self.assertRaises(ValueError):
+            VarInt.decode(bytearray(b'\x80' * 5 + b'\x00'))
+
+    def test_binary_uuid(self):
+        text = '12345678-1234-5678-1234-567812345678'
+        raw = uuid.UUID(text).bytes
+        context = ConnectionContext(protocol_version=TEST_VERSIONS[-1],
+                                    binary_uuids=True)
+        packet_buffer = PacketBuffer()
+        UUID.send(text, packet_buffer)
+        packet_buffer.reset_cursor()
+        value = UUID.read_with_context(packet_buffer, context)
+        self.assertIsInstance(value, BinaryUUID)
+        self.assertEqual(value, raw)
+        self.assertEqual(hash(value), hash(raw))
+        self.assertEqual(str(value), text)
+        self.assertEqual(value.int, uuid.UUID(text).int)
+        self.assertEqual(repr(value), "BinaryUUID(%r)" % text)
+
+        # Each form of UUID is sent identically.
+        for form in (text, value, raw, uuid.UUID(text)):
+            packet_buffer = PacketBuffer()
+            UUID.send(form, packet_buffer)
+            self.assertEqual(packet_buffer.get_writable(), raw)
+
+        # Without the option, UUIDs are read as strings.
+        packet_buffer.reset_cursor()
+        self.assertEqual(UUID.read_with_context(
+            packet_buffer, ConnectionContext(protocol_version=47)), text)
+
+    def test_position_many(self):
+        positions = [(758, 0, 691), (-500, -12, -684),
+                     (-(1 << 25), -(1 << 11), (1 << 25) - 1)]
+        for protocol_version in (TEST_VERSIONS[0], TEST_VERSIONS[-1]):
+            context = ConnectionContext(protocol_version=protocol_version)
+            packet_buffer = PacketBuffer()
+            for position in positions:
+                Position.send_with_context(position, packet_buffer, context)
+            data = packet_buffer.get_writable()
+            numpy = basic.numpy
+            for basic.numpy in (None, numpy):
+                try:
+                    packet_buffer.reset_cursor()
+                    values = Position.read_many(packet_buffer, 3, context)
+                    self.assertEqual(packet_buffer.read(), b'')
+                    self.assertEqual(
+                        [tuple(p) for p in values], positions)
+                    values, end = Position.decode_many(
+                        b'\x00' + data, 2, context, offset=9)
+                    self.assertEqual(end, 25)
+                    self.assertEqual(
+                        [tuple(p) for p in values], positions[1:])
+                finally:
+                    basic.numpy = numpy
+
+        with self.assertRaises(EOFError):
+            Position.decode_many(data, 4, context)
+
+    def test_angle_many(self):
+        data = b'\x00\x40\x80\xff'
+        expected = [0.0, 90.0, 180.0, 358.59375]
+        numpy = basic.numpy
+        basic.numpy = None
+        try:
+            self.assertEqual(Angle.decode_many(data), expected)
+        finally:
+            basic.numpy = numpy
+        if numpy:
+            self.assertEqual(Angle.decode_many(data).tolist(), expected)
+
+
+class ArrayTest(unittest.TestCase):
+    def round_trip(self, data_type, value):
+        packet_buffer = PacketBuffer()
+        data_type.send(value, packet_buffer)
+        packet_buffer.reset_cursor()
+        result = data_type.read(packet_buffer)
+        self.assertEqual(packet_buffer.read(), b'')
+        return result, packet_buffer.get_writable()
+
+    def test_prefixed_array(self):
+        data_type = PrefixedArray(VarInt, Short)
+        self.assertEqual(self.round_trip(data_type, [1, -2, 3]),
+                         ([1, -2, 3], b'\x03\x00\x01\xff\xfe\x00\x03'))
+
+        data_type = PrefixedArray(Integer, (Byte, Float, Boolean), Record)
+        value = [Record(1, 2.5, True), Record(-1, 0.0, False)]
+        self.assertEqual(self.round_trip(data_type, value)[0], value)
+
+        data_type = PrefixedArray(VarInt, (Byte, Byte))
+        self.assertEqual(self.round_trip(data_type, [])[0], [])
+        self.assertEqual(self.round_trip(data_type, [(1, 2)])[0], [(1, 2)])
+
+        with self.assertRaises(TypeError):
+            PrefixedArray(VarInt, VarInt)
+
+        packet_buffer = PacketBuffer()
+        packet_buffer.send(b'\x02\x00\x01')
+        packet_buffer.reset_cursor()
+        with self.assertRaises(EOFError):
+            PrefixedArray(VarInt, Short).read(packet_buffer)
+
+    def test_fixed_array(self):
+        data_type = FixedArray(3, Double)
+        self.assertEqual(self.round_trip(data_type, [1.0, 2.0, 3.0])[0],
+                         [1.0, 2.0, 3.0])
+        with self.assertRaises(ValueError):
+            data_type.send([1.0], PacketBuffer())
+
+    def test_numpy(self):
+        if not arrays.numpy:
+            self.skipTest('numpy is not installed.')
+        numpy = arrays.numpy
+
+        data_type = PrefixedArray(Integer, (Byte, Byte, Byte), use_numpy=True)
+        value = numpy.array([[1, 2, 3], [-4, -5, -6]])
+        result, data = self.round_trip(data_type, value)
+        self.assertEqual(result.tolist(), value.tolist())
+        self.assertEqual(data, self.round_trip(
+            PrefixedArray(Integer, (Byte, Byte, Byte)), value.tolist())[1])
+
+        data_type = FixedArray(2, (Byte, Float), use_numpy=True)
+        result, data = self.round_trip(data_type, [(1, 0.5), (2, 1.5)])
+        self.assertEqual(result.tolist(), [(1, 0.5), (2, 1.5)])
+        self.assertEqual(self.round_trip(data_type, result)[1], data)
+
+
+class Record(Vector):
+    __slots__ = ()
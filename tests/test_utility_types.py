@@ -1,7 +1,8 @@
 import unittest
 
 from minecraft.networking.types import (
-    Enum, BitFieldEnum, Vector, Position, PositionAndLook
+    Enum, BitFieldEnum, VersionedEnum, Vector, Position, PositionAndLook,
+    MutableRecord,
 )
 
 
@@ -16,6 +17,53 @@ class EnumTest(unittest.TestCase):
             list(map(Example.name_from_value, range(5))),
             [None, 'ONE', 'TWO', 'THREE', None])
 
+    def test_cache_invalidation(self):
+        class Example(Enum):
+            ONE = 1
+            TWO = 2
+
+        self.assertEqual(Example.name_from_value(2), 'TWO')
+        Example.DEUX = 2
+        Example.THREE = 3
+        del Example.TWO
+        self.assertEqual(Example.name_from_value(2), 'DEUX')
+        self.assertEqual(Example.name_from_value(3), 'THREE')
+
+    def test_cache_scope(self):
+        class Base(Enum):
+            ONE = 1
+
+        class Derived(Base):
+            TWO = 2
+
+        class Unrelated(Enum):
+            THREE = 3
+
+        caches = [cls.class_cache() for cls in (Base, Derived, Unrelated)]
+        for cache in caches:
+            cache['key'] = 'value'
+
+        # Changing a class empties its own cache and those of its subclasses,
+        # but not those of other classes.
+        Base.FOUR = 4
+        self.assertEqual(Base.class_cache(), {})
+        self.assertEqual(Derived.class_cache(), {})
+        self.assertIs(Unrelated.class_cache(), caches[2])
+        self.assertEqual(Base.name_from_value(4), 'FOUR')
+
+        Derived.class_cache()['key'] = 'value'
+        Unrelated.FIVE = 5
+        self.assertEqual(Derived.class_cache(), {'key': 'value'})
+
+    def test_unhashable(self):
+        class Example(Enum):
+            ONE = 1
+            LIST = [1, 2]
+
+        self.assertEqual(Example.name_from_value(1), 'ONE')
+        self.assertEqual(Example.name_from_value([1, 2]), 'LIST')
+        self.assertIsNone(Example.name_from_value({}))
+
 
 class BitFieldEnumTest(unittest.TestCase):
     def test_name_from_value(self):
@@ -41,6 +89,37 @@ class BitFieldEnumTest(unittest.TestCase):
             ['0', 'ONE', 'TWO', 'ONE|TWO', 'FOUR',
              'ONE|FOUR', 'TWO|FOUR', 'ONE|TWO|FOUR', None])
 
+        # The results are cached, but not beyond changes to the class.
+        self.assertEqual(Example2.name_from_value(3), 'ONE|TWO')
+        Example2.THREE = 3
+        self.assertEqual(Example2.name_from_value(3), 'THREE')
+
+
+class VersionedEnumTest(unittest.TestCase):
+    def test_for_version(self):
+        class Example(VersionedEnum):
+            calls = []
+
+            @classmethod
+            def get_members(cls, protocol_version):
+                cls.calls.append(protocol_version)
+                members = {'ONE': 1, 'TWO': 2}
+                if protocol_version >= 10:
+                    members['TWO'] = 3
+                return members
+
+        old, new = Example.for_version(5), Example.for_version(10)
+        self.assertTrue(issubclass(old, Enum))
+        self.assertEqual((old.TWO, new.TWO), (2, 3))
+        self.assertEqual(new.name_from_value(3), 'TWO')
+        self.assertIsNone(new.name_from_value(2))
+
+        # Each version is built once, and versions with the same members
+        # share the same class.
+        self.assertIs(Example.for_version(6), old)
+        self.assertIs(Example.for_version(10), new)
+        self.assertEqual(Example.calls, [5, 10, 6])
+
 
 class VectorTest(unittest.TestCase):
     def test_operators(self):
@@ -57,6 +136,32 @@ class VectorTest(unittest.TestCase):
         self.assertEqual(str(Position(1, 2, 3)), 'Position(1, 2, 3)')
 
 
+class MutableRecordTest(unittest.TestCase):
+    def test_record(self):
+        class Base(MutableRecord):
+            __slots__ = 'a'
+
+        class Example(Base):
+            __slots__ = 'b', 'c'
+
+        self.assertEqual(Base._slot_names, ('a',))
+        self.assertEqual(Example._slot_names, ('a', 'b', 'c'))
+
+        record = Example(a=1, b=2, c=3)
+        self.assertEqual(list(record), [1, 2, 3])
+        self.assertEqual(list(Base(a=1)), [1])
+        self.assertEqual(repr(record), 'Example(a=1, b=2, c=3)')
+        self.assertEqual(record, Example(a=1, b=2, c=3))
+        self.assertNotEqual(record, Example(a=1, b=2, c=4))
+        self.assertNotEqual(Base(a=1), Example(a=1, b=2, c=3))
+        self.assertEqual(hash(record), hash(Example(c=3, b=2, a=1)))
+
+        # Unset fields are omitted from repr() and hashed as None.
+        partial = Example(a=1, c=3)
+        self.assertEqual(repr(partial), 'Example(a=1, c=3)')
+        self.assertEqual(hash(partial), hash(Example(a=1, b=None, c=3)))
+
+
 class PositionAndLookTest(unittest.TestCase):
     """ This also tests the MutableRecord base type. """
     def test_properties(self):
@@ -0,0 +1,98 @@
+import unittest
+
+from minecraft import SUPPORTED_PROTOCOL_VERSIONS
+from minecraft.networking.connection import ConnectionContext
+from minecraft.networking.world import World
+from minecraft.networking.types import (
+    ChunkSection, Position, Integer, Boolean, UnsignedShort, VarInt,
+)
+from minecraft.networking.packets import PacketBuffer, clientbound
+
+
+class WorldTest(unittest.TestCase):
+    def setUp(self):
+        self.context = ConnectionContext(
+            protocol_version=SUPPORTED_PROTOCOL_VERSIONS[-1])
+
+    def chunk_packet(self, chunk_x, chunk_z, state, full_chunk=True):
+        sections = [None] * 16
+        sections[4] = ChunkSection.from_states([state] * 4096)
+        return clientbound.play.ChunkDataPacket(
+            self.context, chunk_x=chunk_x, chunk_z=chunk_z,
+            full_chunk=full_chunk, primary_bit_mask=1 << 4,
+            sections=sections, biomes=b'')
+
+    def test_blocks(self):
+        world = World()
+        self.assertIsNone(world.get_block(0, 64, 0))
+
+        world.load_chunk(self.chunk_packet(0, 0, 1))
+        world.load_chunk(self.chunk_packet(-1, 0, 2))
+        self.assertEqual(len(world), 2)
+        self.assertIn((-1, 0), world)
+        self.assertEqual(world.get_block(0, 64, 15), 1)
+        self.assertEqual(world.get_block(-1, 64, 15), 2)
+        self.assertEqual(world.get_block(-1, 0, 15), 0)
+        self.assertIsNone(world.get_block(0, 64, 16))
+
+        world.apply(clientbound.play.BlockChangePacket(
+            location=Position(-16, 70, 3), block_state_id=7))
+        self.assertEqual(world.get_block(*Position(-16, 70, 3)), 7)
+
+        # A partial chunk replaces only the sections it contains.
+        sections = [None] * 16
+        sections[0] = ChunkSection.from_states([5] * 4096)
+        world.load_chunk(clientbound.play.ChunkDataPacket(
+            self.context, chunk_x=-1, chunk_z=0, full_chunk=False,
+            primary_bit_mask=1, sections=sections))
+        self.assertEqual(world.get_block(-16, 0, 3), 5)
+        self.assertEqual(world.get_block(-16, 70, 3), 7)
+
+        world.unload_chunk(clientbound.play.UnloadChunkPacket(
+            chunk_x=-1, chunk_z=0))
+        self.assertIsNone(world.get_block(-16, 70, 3))
+        self.assertEqual(len(world), 1)
+
+        world.clear()
+        self.assertIsNone(world.get_block(0, 64, 15))
+
+    def test_eviction(self):
+        world = World(max_chunks=2)
+        world.load_chunk(self.chunk_packet(0, 0, 1))
+        world.load_chunk(self.chunk_packet(0, 1, 2))
+        self.assertEqual(world.get_block(0, 64, 0), 1)
+        world.load_chunk(self.chunk_packet(0, 2, 3))
+
+        # The least recently used chunk, (0, 1), is evicted.
+        self.assertEqual(len(world), 2)
+        self.assertEqual(world.evicted, 1)
+        self.assertIsNone(world.get_chunk(0, 1))
+        self.assertEqual(world.get_block(0, 64, 0), 1)
+        self.assertEqual(world.get_block(0, 64, 32), 3)
+
+    def test_unload_1_8(self):
+        # Before protocol 107, a full chunk with no sections unloads it.
+        self.context = ConnectionContext(protocol_version=47)
+        world = World()
+        world.load_chunk(self.chunk_packet(0, 0, 1))
+        world.load_chunk(self.chunk_packet(0, 1, 2))
+        self.assertEqual(world.get_block(0, 64, 0), 1)
+
+        world.load_chunk(clientbound.play.ChunkDataPacket(
+            self.context, chunk_x=0, chunk_z=0, full_chunk=True,
+            primary_bit_mask=0, sections=[None] * 16, biomes=b'\0' * 256))
+        self.assertIsNone(world.get_block(0, 64, 0))
+        self.assertEqual(len(world), 1)
+
+        # Such a packet may also have no biomes.
+        buffer = PacketBuffer()
+        Integer.send(0, buffer)
+        Integer.send(1, buffer)
+        Boolean.send(True, buffer)
+        UnsignedShort.send(0, buffer)
+        VarInt.send(0, buffer)
+        buffer.reset_cursor()
+        packet = clientbound.play.ChunkDataPacket(self.context)
+        packet.read(buffer)
+        world.load_chunk(packet)
+        self.assertEqual(len(world), 0)